@@ -0,0 +1,77 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+try:
+    from utils.offline import collect_videos, process_many # Tanpa Qt: aman dijalankan headless
+except ImportError as e:
+    print(f"Penting: Gagal mengimpor modul dari folder 'utils'. Pastikan file ada dan benar: {e}")
+    sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Estimasi HR rPPG secara offline (tanpa GUI) dari file video atau direktori video.")
+    parser.add_argument("inputs", nargs="+", help="File video dan/atau direktori berisi video")
+    parser.add_argument("-o", "--output-dir", default="results", help="Direktori output (default: results)")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], default="csv",
+                        help="Format output; parquet membutuhkan pandas + pyarrow")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Jumlah proses worker (default: jumlah CPU - 1)")
+    parser.add_argument("--model", default="models/blaze_face_short_range.tflite",
+                        help="Path model deteksi wajah MediaPipe")
+    parser.add_argument("--hop", type=float, default=0.5, help="Jarak antar estimasi HR, dalam detik")
+    parser.add_argument("--filter-mode", choices=["accurate", "streaming"], default="accurate")
+    parser.add_argument("--detection-max-side", type=int, default=320,
+                        help="Sisi terpanjang input detektor dalam piksel (0 = resolusi penuh)")
+    parser.add_argument("--roi-mode", choices=["forehead", "multi"], default="forehead",
+                        help="ROI dahi saja, atau dahi + kedua pipi dengan fusi berbobot SNR")
+    parser.add_argument("--skin-mask", action="store_true", help="Gunakan masker kulit YCrCb pada ROI")
+    parser.add_argument("--algorithm", choices=["green", "chrom", "pos", "ica"], default="green",
+                        help="Algoritma pulsa untuk kolom hr_bpm")
+    parser.add_argument("--compare", nargs="*", default=[], choices=["green", "chrom", "pos", "ica"],
+                        help="Algoritma tambahan yang dihitung pada jendela yang sama (kolom hr_<nama>_bpm)")
+    parser.add_argument("--no-tracker", action="store_true",
+                        help="Jalankan detektor di setiap frame, tanpa pelacak optical flow")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    videos = collect_videos(args.inputs)
+    if not videos:
+        print("Tidak ada file video yang ditemukan.")
+        return 1
+    if not os.path.exists(args.model):
+        print(f"Model deteksi wajah tidak ditemukan: {args.model}")
+        return 1
+
+    print(f"Memproses {len(videos)} video...")
+    start = time.perf_counter()
+    summaries = process_many(videos, args.output_dir, face_model_path=os.path.abspath(args.model),
+                             workers=args.workers, fmt=args.format, hop_seconds=args.hop,
+                             filter_mode=args.filter_mode,
+                             detection_max_side=args.detection_max_side or None,
+                             use_tracker=not args.no_tracker,
+                             roi_mode=args.roi_mode, skin_mask=args.skin_mask,
+                             rppg_algorithm=args.algorithm, compare_algorithms=args.compare)
+
+    # Ringkasan seluruh batch dalam satu CSV
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, "summary.csv")
+    fields = ["video", "frames", "samples", "mean_hr_bpm", "mean_respiration_rpm", "beats", "processing_fps", "error"]
+    with open(summary_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, restval="")
+        writer.writeheader()
+        writer.writerows(summaries)
+
+    failed = sum(1 for s in summaries if "error" in s)
+    print(f"Selesai dalam {time.perf_counter() - start:.1f} s: {len(summaries) - failed} berhasil, "
+          f"{failed} gagal. Ringkasan: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+try:
+    from utils.signal_processing import (HealthAnalyzer, extract_rppg_signal, green_chromaticity,
+                                         calculate_rate_from_fft)
+    from utils.spectral import SpectralEstimator
+    from utils.synthetic import SyntheticFaceVideo, PULSE_SIGNATURE
+    from utils.offline import process_video
+    from utils.tracking import FaceTrackingController, AdaptiveInferenceController
+except ImportError as e:
+    print(f"Penting: Gagal mengimpor modul dari folder 'utils'. Pastikan file ada dan benar: {e}")
+    sys.exit(1)
+
+# Kondisi video sintetis untuk uji end-to-end (argumen SyntheticFaceVideo)
+SCENARIOS = {
+    "clean": {},
+    "noise": {"noise_std": 6.0},
+    "motion": {"motion_amplitude": 15.0},
+    "drift": {"illumination_drift": 0.15},
+    "combined": {"noise_std": 4.0, "motion_amplitude": 10.0, "illumination_drift": 0.1},
+    # Napas 15/menit memodulasi volume darah dan HR (RSA ±3 BPM): juga mengukur galat laju napas
+    "breathing": {"respiration_amplitude": 0.5, "rsa_bpm": 3.0},
+}
+
+
+def _time_call(fn, repeat, warmup=3):
+    """Median dan p95 waktu satu pemanggilan `fn`, dalam mikrodetik."""
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return {"median_us": float(np.median(timings) * 1e6), "p95_us": float(np.percentile(timings, 95) * 1e6)}
+
+
+def _synthetic_samples(n, fps, hr_bpm=72.0, seed=0):
+    # Trace RGB rata-rata ROI (n, 3) dengan pulsa diketahui, tanpa merender frame
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / fps
+    pulse = np.sin(2 * np.pi * hr_bpm / 60.0 * t)
+    rgb = np.array([215.0, 170.0, 140.0]) * (1 + 0.01 * pulse[:, None] * PULSE_SIGNATURE)
+    return t, rgb + rng.normal(0, 0.3, rgb.shape)
+
+
+def run_micro(args):
+    results = {}
+    frame = SyntheticFaceVideo(width=640, height=480).render(0)
+    for w, h in ((40, 16), (75, 30), (150, 150), (300, 300)):
+        results[f"extract_rppg_signal/roi_{w}x{h}"] = _time_call(
+            lambda: extract_rppg_signal(frame, (170, 100, w, h)), args.repeat)
+
+    for window_s in args.windows:
+        for mode in ("accurate", "streaming"):
+            analyzer = HealthAnalyzer(face_model_path=None, fps=args.fps, frame_buffer_factor=window_s,
+                                      filter_mode=mode, rppg_algorithm=args.algorithm)
+            n = analyzer.rppg_signal_buffer.capacity
+            times, rgb = _synthetic_samples(n + args.repeat + 10, args.fps)
+            for i in range(n):
+                analyzer.feed_sample(green_chromaticity(rgb[i]), rgb[i], times[i])
+            position = [n]
+
+            def step():
+                # Satu sampel baru + pembaruan HR, seperti satu frame di pipeline
+                i = position[0]
+                analyzer.feed_sample(green_chromaticity(rgb[i]), rgb[i], times[i])
+                position[0] += 1
+                analyzer.filter_and_calculate_hr()
+
+            results[f"filter_and_calculate_hr/{mode}/{args.algorithm}/{window_s}s"] = _time_call(step, args.repeat)
+
+    estimators = {"bin": None, "zeropad4_parabolic": SpectralEstimator(zero_pad_factor=4, interpolation="parabolic")}
+    for n in (128, 300, 600, 900):
+        values = np.sin(2 * np.pi * 1.2 * np.arange(n) / args.fps)
+        for name, estimator in estimators.items():
+            results[f"calculate_rate_from_fft/{name}/n{n}"] = _time_call(
+                lambda: calculate_rate_from_fft(values, args.fps, 0.67, 4.0, estimator=estimator), args.repeat)
+    return results
+
+
+def run_end_to_end(args):
+    analyzer = HealthAnalyzer(face_model_path=args.model, fps=args.fps, filter_mode=args.filter_mode,
+                              running_mode="video", detection_max_side=args.detection_max_side or None,
+                              detection_crop_margin=0.75, roi_mode=args.roi_mode, skin_mask=args.skin_mask,
+                              rppg_algorithm=args.algorithm)
+    tracking = None if args.no_tracker else FaceTrackingController(controller=AdaptiveInferenceController(1, 15))
+    results = {}
+    for scenario in args.scenarios:
+        errors, confidences, resp_errors, frames, pipeline_s, samples = [], [], [], 0, 0.0, 0
+        for hr_bpm in args.hr:
+            video = SyntheticFaceVideo(hr_bpm=hr_bpm, fps=args.fps, duration=args.duration, seed=args.seed,
+                                       **SCENARIOS[scenario])
+            result = process_video(video, analyzer, hop_seconds=0.5, tracking=tracking)
+            frames += result.frame_count
+            samples += len(result.raw_values)
+            # Waktu pipeline saja: waktu render frame sintetis tidak dihitung
+            pipeline_s += result.elapsed_s - result.read_s
+            hr_times, hr_values = np.asarray(result.hr_times), np.asarray(result.hr_values)
+            # HR 0 (belum/tidak ada estimasi) setelah warm-up otomatis bergalat penuh
+            settled = hr_values[hr_times >= args.warmup]
+            errors.extend(np.abs(settled - hr_bpm) if len(settled) else [hr_bpm])
+            confidences.extend(np.asarray(result.hr_confidence)[hr_times >= args.warmup])
+            if video.respiration_amplitude:
+                respiration = np.asarray(result.respiration_rpm)[hr_times >= args.warmup]
+                resp_errors.extend(np.abs(respiration[respiration > 0] - video.respiration_bpm))
+        errors = np.asarray(errors, dtype=np.float64)
+        results[scenario] = {
+            "fps": frames / pipeline_s if pipeline_s > 0 else 0.0,
+            "ms_per_frame": pipeline_s / frames * 1000 if frames else 0.0,
+            "mae_bpm": float(np.mean(errors)),
+            "rmse_bpm": float(np.sqrt(np.mean(errors ** 2))),
+            "within_5bpm": float(np.mean(errors <= 5.0)),
+            "face_coverage": samples / frames if frames else 0.0,
+            # Confidence rata-rata (indeks kualitas sinyal); 0 untuk jendela yang tidak dipublikasikan
+            "mean_confidence": float(np.mean(confidences)) if confidences else 0.0,
+        }
+        if resp_errors:
+            results[scenario]["respiration_mae_rpm"] = float(np.mean(resp_errors))
+        print(f"  {scenario:<10} {results[scenario]['fps']:7.1f} FPS  MAE {results[scenario]['mae_bpm']:5.2f} BPM  "
+              f"RMSE {results[scenario]['rmse_bpm']:5.2f}  <=5 BPM {results[scenario]['within_5bpm'] * 100:5.1f}%"
+              + (f"  napas MAE {results[scenario]['respiration_mae_rpm']:4.2f}/menit" if resp_errors else ""))
+    return results
+
+
+def _git_revision():
+    try:
+        root = os.path.dirname(os.path.abspath(__file__))
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_comparison(report, baseline):
+    """Tampilkan selisih terhadap laporan lama (mis. dari commit sebelumnya)."""
+    print(f"\nPerbandingan dengan {baseline.get('revision', '?')} -> {report['revision']}:")
+    for name, current in report.get("micro", {}).items():
+        old = baseline.get("micro", {}).get(name)
+        if old:
+            change = (current["median_us"] / old["median_us"] - 1) * 100 if old["median_us"] > 0 else 0.0
+            print(f"  {name:<52} {old['median_us']:9.1f} -> {current['median_us']:9.1f} us ({change:+.1f}%)")
+    for name, current in report.get("end_to_end", {}).items():
+        old = baseline.get("end_to_end", {}).get(name)
+        if old:
+            print(f"  e2e/{name:<48} FPS {old['fps']:7.1f} -> {current['fps']:7.1f}   "
+                  f"MAE {old['mae_bpm']:5.2f} -> {current['mae_bpm']:5.2f} BPM")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark throughput dan akurasi rPPG dengan video sintetis (ground truth diketahui).")
+    parser.add_argument("--model", default="models/blaze_face_short_range.tflite",
+                        help="Path model deteksi wajah MediaPipe")
+    parser.add_argument("--fps", type=float, default=30.0, help="Laju frame video sintetis")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durasi tiap video sintetis, dalam detik")
+    parser.add_argument("--hr", type=float, nargs="+", default=[60.0, 75.0, 100.0],
+                        help="HR ground truth (BPM) yang diuji pada setiap skenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--warmup", type=float, default=10.0,
+                        help="Estimasi HR sebelum detik ini tidak dihitung dalam galat")
+    parser.add_argument("--windows", type=int, nargs="+", default=[4, 10, 20, 30],
+                        help="Panjang jendela sinyal (detik) untuk micro-benchmark filter_and_calculate_hr")
+    parser.add_argument("--repeat", type=int, default=200, help="Jumlah pengulangan per micro-benchmark")
+    parser.add_argument("--filter-mode", choices=["accurate", "streaming"], default="accurate")
+    parser.add_argument("--algorithm", choices=["green", "chrom", "pos", "ica"], default="green")
+    parser.add_argument("--roi-mode", choices=["forehead", "multi"], default="forehead")
+    parser.add_argument("--skin-mask", action="store_true")
+    parser.add_argument("--detection-max-side", type=int, default=320,
+                        help="Sisi terpanjang input detektor dalam piksel (0 = resolusi penuh)")
+    parser.add_argument("--no-tracker", action="store_true")
+    parser.add_argument("--seed", type=int, default=0, help="Seed noise video sintetis")
+    parser.add_argument("--skip-micro", action="store_true", help="Lewati micro-benchmark")
+    parser.add_argument("--skip-e2e", action="store_true", help="Lewati benchmark end-to-end")
+    parser.add_argument("-o", "--output", help="Simpan laporan JSON ke path ini")
+    parser.add_argument("--baseline", help="Laporan JSON lama sebagai pembanding")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.model):
+        print(f"Model deteksi wajah tidak ditemukan: {args.model}")
+        return 1
+
+    report = {
+        "revision": _git_revision(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+    }
+    if not args.skip_micro:
+        print("Micro-benchmark...")
+        report["micro"] = run_micro(args)
+        for name, timing in report["micro"].items():
+            print(f"  {name:<52} median {timing['median_us']:9.1f} us   p95 {timing['p95_us']:9.1f} us")
+    if not args.skip_e2e:
+        print("End-to-end (video sintetis)...")
+        report["end_to_end"] = run_end_to_end(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan: {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,39 @@
+import time
+_STARTUP_T0 = time.perf_counter() # Acuan laporan startup, diambil sebelum import apa pun
+
 import sys
+import threading
 import cv2
 import numpy as np
-import mediapipe as mp 
-from PyQt5.QtWidgets import QApplication, QMainWindow
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication, QMainWindow, QShortcut
+from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
 import os
 
 try:
     from utils.gui import HealthTrackerUI
     from utils.signal_processing import HealthAnalyzer # Kelas utama untuk pemrosesan sinyal
+    from utils.pipeline import RppgPipeline, SubjectSnapshot # Pipeline multi-thread capture -> detect -> DSP
+    from utils.history import TrendHistory # Tren HR + kualitas multi-resolusi bermemori tetap
+    from utils.tracking import FaceTrackingController, AdaptiveInferenceController, bbox_from_detection
+    from utils.subjects import MultiSubjectAnalyzer # Pengukuran banyak wajah sekaligus
+    from utils.instrumentation import PerfMonitor # Latensi per stage + counter frame drop/deteksi
+    from utils.load_shedding import LoadSheddingController # Adaptasi laju pemrosesan terhadap CPU
+    from utils.recording import SessionRecorder, RECORDING_EXTENSION # Rekaman trace sinyal untuk replay
+    from utils.startup import StartupReport # Waktu startup + durasi import tertunda (mediapipe, scipy)
+    from utils.multicam import MultiCameraHost # Satu proses worker per kamera, frame lewat shared memory
+    from utils.telemetry import TelemetryServer, TelemetryPublisher # Server telemetri lokal (NDJSON/WebSocket)
 except ImportError as e:
     print(f"Penting: Gagal mengimpor modul dari folder 'utils'. Pastikan file ada dan benar: {e}")
     print("Harap buat file 'utils/gui.py' dan 'utils/signal_processing.py' sesuai kebutuhan.")
     sys.exit(1)
 
+STARTUP = StartupReport(_STARTUP_T0)
+STARTUP.mark("imports")
+
 def draw_landmarks_on_image(rgb_image, detection_result):
     """Menggambar landmark pose pada gambar untuk debugging."""
+    import mediapipe as mp
     from mediapipe.python.solutions import drawing_utils as mp_drawing
     pose_landmarks_list = detection_result.pose_landmarks
     annotated_image = np.copy(rgb_image)
@@ -31,6 +48,12 @@ def draw_landmarks_on_image(rgb_image, detection_result):
         )
     return annotated_image
 
+class PipelineSignals(QObject):
+    """Jembatan sinyal Qt agar thread pipeline dan pemuat model dapat memberi tahu GUI secara thread-safe."""
+    result_ready = pyqtSignal()
+    analyzer_ready = pyqtSignal(object)
+    analyzer_failed = pyqtSignal(str)
+
 class MainWindow(QMainWindow):
     """
     Kelas utama window aplikasi yang mengatur GUI, input video,
@@ -38,65 +61,226 @@ class MainWindow(QMainWindow):
     """
     def __init__(self):
         """
-        Inisialisasi MainWindow, UI, HealthAnalyzer, dan parameter aplikasi.
+        Inisialisasi MainWindow, UI, dan parameter aplikasi. HealthAnalyzer
+        (import MediaPipe + pembuatan FaceDetector) dimuat di thread latar.
         """
         super().__init__()
         self.setWindowTitle("Realtime rPPG Tracker")
-        self.ui = HealthTrackerUI() # Inisialisasi Antarmuka Pengguna
+        # Backend plot: "qt" (widget QPainter ringan) atau "matplotlib" (canvas Agg)
+        self.plot_backend_config = "qt"
+        self.ui = HealthTrackerUI(plot_backend=self.plot_backend_config) # Inisialisasi Antarmuka Pengguna
         self.setCentralWidget(self.ui)
         self.setMinimumSize(1000, 600)
 
         # Konfigurasi path model dan FPS
         self.face_model_path_config = "models/blaze_face_short_range.tflite"
         self.fps_config = 30 # FPS target untuk kamera dan pemrosesan
+        # Mode filter: "accurate" (filtfilt seluruh jendela) atau "streaming" (filter kausal inkremental)
+        self.filter_mode_config = "accurate"
+        # True: capture, deteksi, dan DSP berjalan di thread terpisah; False: semua di QTimer (GUI thread)
+        self.use_threaded_pipeline_config = True
+        # Running mode MediaPipe: "image" (sinkron), "video", atau "live_stream" (detect_async, eksperimental)
+        self.detector_running_mode_config = "image"
+        # Resolusi input detektor (sisi terpanjang, px) dan margin crop di sekitar box sebelumnya
+        self.detection_max_side_config = 320
+        self.detection_crop_margin_config = 0.75
+        # Laju refresh video di GUI (terpisah dari laju analisis) dan kualitas skala tampilan
+        self.display_fps_config = 30
+        self.display_smooth_scaling_config = False # True: Qt.SmoothTransformation (lebih mahal)
+        # "forehead": ROI dahi saja; "multi": dahi + kedua pipi via integral image dengan fusi berbobot SNR
+        self.roi_mode_config = "forehead"
+        self.roi_grid_config = None # Mis. (3, 3) untuk grid sub-patch tambahan
+        self.skin_mask_config = False # True: masker kulit YCrCb (mengabaikan poni, kacamata, latar)
+        # Sampel diresample ke grid seragam berdasarkan timestamp capture ("linear"/"cubic", None: anggap fps tetap)
+        self.resample_method_config = "linear"
+        # Batasi FPS kamera (mis. 15-20 pada mesin lemah); None: bawaan kamera
+        self.capture_fps_config = None
+        # Algoritma pulsa dari trace RGB: "green", "chrom", "pos", atau "ica" (mode accurate)
+        self.rppg_algorithm_config = "green"
+        # True: ukur semua wajah di frame (mis. ruang tunggu); HR utama mengikuti wajah terbesar
+        self.multi_subject_config = False
+        self.max_subjects_config = 6
+        # Instrumentasi latensi per stage (p50/p95/p99) dan counter; overlay bisa di-toggle dengan F3
+        self.perf_instrumentation_config = True
+        self.perf_overlay_config = False
+        self.perf_dump_path_config = None # Mis. "perf_report.json": ditulis saat sesi berakhir (.json/.csv)
+        self.perf = PerfMonitor(enabled=self.perf_instrumentation_config)
+        # Turunkan laju deteksi, DSP, refresh tampilan, lalu resolusi deteksi saat loop frame melebihi anggaran
+        self.load_shedding_config = True
+        # Direktori rekaman sesi (timestamp, box, RGB, nilai rPPG per frame) untuk replay offline; None: tidak merekam.
+        # Mode multi-subjek tidak direkam.
+        self.session_record_dir_config = None
+        self.session_recorder = None
+        # Laporan waktu startup (fase + import tertunda) ditulis setelah model siap; None: hanya dicetak
+        self.startup_report_path_config = None # Mis. "startup_report.json"
+        # Sumber kamera (indeks) dan/atau file video untuk mode multi-kamera, mis. [0, 1, "bay2.mp4"].
+        # Setiap sumber diproses di proses worker sendiri; None: satu webcam seperti biasa.
+        self.camera_sources_config = None
+        self.multi_camera = None
+        self.selected_camera = 0
+        self._last_dsp_count = -1
+        self.multi_camera_timer = QTimer(self) # Membaca frame terbaru setiap kamera dari shared memory
+        self.multi_camera_timer.timeout.connect(self._update_multi_camera)
+        # Server telemetri lokal untuk dashboard, mis. {"tcp_port": 8765, "ws_port": 8766} (argumen
+        # TelemetryServer); None: tidak ada server. Dimulai pada START pertama, berhenti saat window ditutup
+        self.telemetry_config = None
+        self.telemetry = None
+        self._telemetry_publishers = {} # Sumber (None = kamera tunggal, indeks = multi-kamera) -> publisher
+        self._telemetry_dsp_counts = {} # Indeks kamera -> dsp_count terakhir yang sudah dikirim
 
-        self.analyzer = None 
-        try:
-            # Inisialisasi HealthAnalyzer dengan konfigurasi yang ditentukan
-            self.analyzer = HealthAnalyzer(
-                face_model_path=self.face_model_path_config,
-                fps=self.fps_config
-            )
-            if not self.analyzer.has_models():
-                 raise RuntimeError("Model MediaPipe gagal dimuat di HealthAnalyzer.")
-            print("HealthAnalyzer berhasil diinisialisasi dengan model.")
-        except Exception as e:
-            print(f"Error saat inisialisasi HealthAnalyzer: {e}")
-            if hasattr(self.ui, 'video_label') and self.ui.video_label:
-                self.ui.video_label.setText(f"Error init Analyzer: {e}\nPastikan file model ada.")
-            # self.analyzer akan tetap None, start_processing akan dicegah
+        self.analyzer = None # Diisi oleh _on_analyzer_ready setelah model selesai dimuat
 
         # Referensi ke elemen UI untuk kemudahan akses
         self.video_label = self.ui.video_label
         self.hr_label = self.ui.hr_value_label
-        self.ax_rppg = self.ui.ax_rppg
-        self.canvas_rppg = self.ui.hr_canvas
+        self.ax_rppg = getattr(self.ui, 'ax_rppg', None)
+        self.canvas_rppg = getattr(self.ui, 'hr_canvas', None)
+
+        # Inisialisasi garis plot untuk sinyal rPPG (hanya backend matplotlib)
+        self.rppg_line = None
+        if self.ax_rppg is not None:
+            self.rppg_line, = self.ax_rppg.plot([], [], color='#FF6B6B')
 
-        # Inisialisasi garis plot untuk sinyal rPPG
-        self.rppg_line, = self.ax_rppg.plot([], [], color='#FF6B6B')
+        # Riwayat HR + indeks kualitas sepanjang sesi bermemori tetap: sampel penuh terbaru ditambah
+        # tier min/mean/max 1 detik, 10 detik, dan 1 menit. Plot tren (backend qt) menampilkan seluruh sesi
+        # dengan paling banyak trend_plot_points_config titik
+        self.hr_history = TrendHistory(channels=("hr", "quality"))
+        self.trend_plot_points_config = 600
+        # Direktori CSV tren per sesi (bin 1 detik, ditulis tiap trend_flush_interval_config detik); None: tidak
+        self.trend_dir_config = None
+        self.trend_flush_interval_config = 60.0
+        self._session_start_time = time.monotonic()
 
         self.cap = None # Objek VideoCapture
         self.timer = QTimer(self) # Timer untuk memicu update_frame secara periodik
         self.timer.timeout.connect(self.update_frame)
 
         # Kontrol frekuensi inferensi model (setiap N frame)
-        self.inference_interval = 3
+        # detect_async tidak memblokir loop frame, sehingga setiap frame bisa dikirim ke detektor
+        self.inference_interval = 1 if self.detector_running_mode_config == "live_stream" else 3
         self.frame_count_for_inference = 0
         self.last_face_detection_result = None # Menyimpan hasil deteksi wajah terakhir
+        self.last_frame_timestamp = 0.0
+        self._capture_buffer = None # Buffer frame yang dipakai ulang pada jalur QTimer
+        self._last_display_time = 0.0
+        self._last_tick_time = None # Waktu tick QTimer sebelumnya, untuk menghitung frame yang terlewat
+
+        # Panel performa di atas feed video, diperbarui 2x per detik
+        self.perf_timer = QTimer(self)
+        self.perf_timer.timeout.connect(self._refresh_perf_overlay)
+        self.perf_shortcut = QShortcut(QKeySequence("F3"), self)
+        self.perf_shortcut.activated.connect(lambda: self._set_perf_overlay(not self.perf_overlay_config))
+
+        # Track per subjek (ID stabil, buffer & HR sendiri) untuk mode multi-subjek
+        self.subjects = None
+        if self.multi_subject_config:
+            self.subjects = MultiSubjectAnalyzer(fps=self.fps_config, max_subjects=self.max_subjects_config,
+                                                 skin_mask=self.skin_mask_config,
+                                                 resample_method=self.resample_method_config)
+
+        # Pelacak box wajah di antara deteksi + interval inferensi adaptif (None: interval tetap)
+        # Pelacak satu wajah tidak dipakai pada mode multi-subjek
+        self.use_face_tracker_config = not self.multi_subject_config
+        self.face_tracking = None
+        if self.use_face_tracker_config:
+            self.face_tracking = FaceTrackingController(
+                controller=AdaptiveInferenceController(min_interval=1, max_interval=self.fps_config // 2))
 
         # Kontrol frekuensi pemrosesan sinyal (filtering & FFT, setiap M frame)
-        self.process_interval = self.fps_config // 2 # Setengah detik
+        # Mode streaming cukup murah untuk diproses setiap frame
+        self.process_interval = 1 if self.filter_mode_config == "streaming" else self.fps_config // 2 # Setengah detik
         self.frames_since_last_process = 0
         self.last_processed_hr = 0.0 # Menyimpan nilai HR terakhir yang valid
         self.last_filtered_rppg = [] # Menyimpan data plot rPPG terakhir
+        self._plots_live = False # Plot sinyal sedang menampilkan data (dibersihkan saat sinyal tidak layak)
+
+        # Pipeline multi-thread; GUI hanya mengonsumsi hasil terbaru melalui sinyal Qt
+        self.pipeline = None
+        self.pipeline_signals = PipelineSignals(self)
+        self.pipeline_signals.result_ready.connect(self._on_pipeline_result)
+
+        # Pengendali beban: dibuat setelah analyzer siap (knob resolusi deteksi bergantung padanya)
+        self.load_controller = None
 
         # Hubungkan tombol Start/End ke metode terkait
         self.ui.start_button.clicked.connect(self.start_processing)
         self.ui.end_button.clicked.connect(self.end_processing)
         self.ui.end_button.setEnabled(False) # Awalnya tombol End nonaktif
+
+        if self.camera_sources_config:
+            # Model dimuat oleh setiap proses kamera, bukan oleh GUI
+            self.video_label.setText(f"{len(self.camera_sources_config)} sumber kamera. Tekan START.")
+            STARTUP.mark("model_ready")
+            return
+
+        # Window tampil lebih dulu; START aktif setelah model selesai dimuat
+        self.ui.start_button.setEnabled(False)
+        self.ui.start_button.setText("MEMUAT MODEL...")
+        self.video_label.setText("Memuat model deteksi wajah...")
+        self.pipeline_signals.analyzer_ready.connect(self._on_analyzer_ready)
+        self.pipeline_signals.analyzer_failed.connect(self._on_analyzer_failed)
+        self._loader_thread = threading.Thread(target=self._load_analyzer, name="model-loader", daemon=True)
+        self._loader_thread.start()
+
+    def _load_analyzer(self):
+        # Thread latar: import mediapipe/scipy dan pembuatan FaceDetector tidak memblokir GUI
+        try:
+            analyzer = HealthAnalyzer(
+                face_model_path=self.face_model_path_config,
+                fps=self.fps_config,
+                filter_mode=self.filter_mode_config,
+                running_mode=self.detector_running_mode_config,
+                detection_max_side=self.detection_max_side_config,
+                # Mode multi-subjek butuh deteksi frame penuh agar wajah baru tetap terlihat
+                detection_crop_margin=None if self.multi_subject_config else self.detection_crop_margin_config,
+                roi_mode=self.roi_mode_config,
+                roi_grid=self.roi_grid_config,
+                skin_mask=self.skin_mask_config,
+                rppg_algorithm=self.rppg_algorithm_config,
+                resample_method=self.resample_method_config,
+                perf_monitor=self.perf
+            )
+            if not analyzer.has_models():
+                raise RuntimeError("Model MediaPipe gagal dimuat di HealthAnalyzer.")
+        except Exception as e:
+            print(f"Error saat inisialisasi HealthAnalyzer: {e}")
+            self.pipeline_signals.analyzer_failed.emit(str(e))
+            return
+        self.pipeline_signals.analyzer_ready.emit(analyzer)
+
+    def _on_analyzer_ready(self, analyzer):
+        self.analyzer = analyzer
+        print("HealthAnalyzer berhasil diinisialisasi dengan model.")
+        # Pengendali beban: interval di atas menjadi nilai awal (kualitas penuh) setiap knob
+        if self.load_shedding_config:
+            self.load_controller = self._build_load_controller()
+        self.ui.start_button.setText("START MONITORING")
+        self.ui.start_button.setEnabled(True)
         self.video_label.setText("Tekan START untuk memulai feed kamera")
+        STARTUP.mark("model_ready")
+        self._report_startup()
+
+    def _on_analyzer_failed(self, message):
+        # self.analyzer tetap None, start_processing akan dicegah
+        self.ui.start_button.setText("START MONITORING")
+        self.video_label.setText(f"Error init Analyzer: {message}\nPastikan file model ada.")
+        STARTUP.mark("model_failed")
+        self._report_startup()
+
+    def _report_startup(self):
+        print(STARTUP.summary_text())
+        if not self.startup_report_path_config:
+            return
+        try:
+            STARTUP.dump(self.startup_report_path_config)
+        except OSError as e:
+            print(f"Gagal menyimpan laporan startup: {e}")
 
     def start_processing(self):
+        self._start_telemetry()
+        if self.camera_sources_config:
+            self._start_multi_camera()
+            return
         # Cek apakah HealthAnalyzer dan modelnya siap
         if self.analyzer is None or not self.analyzer.has_models():
             self.ui.video_label.setText("Analyzer/Model tidak termuat. Proses tidak dapat dimulai.")
@@ -110,12 +294,10 @@ class MainWindow(QMainWindow):
             self.ui.video_label.setText("Error: Tidak dapat membuka webcam!")
             self.cap = None
             return
+        if self.capture_fps_config:
+            self.cap.set(cv2.CAP_PROP_FPS, self.capture_fps_config)
 
-        self.timer.start(int(1000.0 / self.fps_config)) # Mulai timer sesuai FPS
-        self.ui.start_button.setEnabled(False) # Nonaktifkan tombol Start
-        self.ui.end_button.setEnabled(True)   # Aktifkan tombol End
-        
-        if self.analyzer: # Bersihkan buffer sinyal di HealthAnalyzer
+        if self.analyzer: # Bersihkan buffer sinyal di HealthAnalyzer sebelum thread/timer berjalan
             self.analyzer.clear_buffers()
 
         # Reset state variabel
@@ -124,6 +306,34 @@ class MainWindow(QMainWindow):
         self.last_filtered_rppg = []
         self.frame_count_for_inference = 0
         self.last_face_detection_result = None
+        self._start_trend()
+        self._last_tick_time = None
+        self.perf.reset()
+        if self.load_controller:
+            self.load_controller.reset() # Mulai setiap sesi dengan kualitas penuh
+        if self.face_tracking:
+            self.face_tracking.reset()
+        if self.subjects:
+            self.subjects.reset()
+        self._start_session_recording()
+
+        if self.use_threaded_pipeline_config:
+            self.pipeline = RppgPipeline(
+                self.cap, self.analyzer,
+                fps=self.fps_config,
+                inference_interval=self.inference_interval,
+                process_interval=self.process_interval,
+                on_result_ready=self.pipeline_signals.result_ready.emit,
+                tracking=self.face_tracking,
+                subjects=self.subjects,
+                load_controller=self.load_controller
+            )
+            self.pipeline.start()
+        else:
+            self.timer.start(int(1000.0 / self.fps_config)) # Mulai timer sesuai FPS
+        self.ui.start_button.setEnabled(False) # Nonaktifkan tombol Start
+        self.ui.end_button.setEnabled(True)   # Aktifkan tombol End
+        self._set_perf_overlay(self.perf_overlay_config)
         
         # Tampilkan frame kosong sebagai placeholder awal di GUI
         placeholder_height = self.video_label.height() if self.video_label.height() > 10 else 480
@@ -135,6 +345,17 @@ class MainWindow(QMainWindow):
 
     def end_processing(self):
         self.timer.stop() # Hentikan timer
+        self._stop_multi_camera()
+        self.perf_timer.stop()
+        self.ui.set_perf_overlay_visible(False)
+        session_active = self.pipeline is not None or self.cap is not None
+        if self.pipeline is not None: # Hentikan thread pipeline sebelum kamera dilepas
+            self.pipeline.stop()
+            self.pipeline = None
+        if session_active:
+            self._dump_perf_report()
+        self._stop_session_recording()
+        self.hr_history.close()
         if self.cap is not None:
             self.cap.release() # Lepaskan resource kamera
             self.cap = None
@@ -144,54 +365,355 @@ class MainWindow(QMainWindow):
         self.video_label.setText("Feed Kamera Berakhir. Tekan START.")
         # (Styling video_label lainnya tetap sama)
         self.hr_label.setText("-- BPM") # Reset label HR
+        self.ui.set_signal_quality(None)
+        self.ui.set_vitals(None)
+        self.ui.set_beats(None)
         
         # Reset data plot terakhir
+        self._plots_live = False
         self.last_filtered_rppg = []
         self.last_processed_hr = 0.0
-        self.rppg_line.set_data([], []) # Kosongkan plot
-        
-        if hasattr(self.ui, '_apply_styles'): self.ui._apply_styles()
-        self.canvas_rppg.draw_idle() # Perbarui canvas plot
+        if self.rppg_line is not None:
+            self.rppg_line.set_data([], []) # Kosongkan plot
+            if hasattr(self.ui, '_apply_styles'): self.ui._apply_styles()
+            self.canvas_rppg.draw_idle() # Perbarui canvas plot
+        else:
+            self.ui.rppg_plot.clear()
+            self.ui.spectrum_plot.clear()
+            self.ui.hr_trend_plot.clear()
         print("Proses dihentikan.")
 
+    def _start_multi_camera(self):
+        try:
+            self.multi_camera = MultiCameraHost(
+                self.camera_sources_config, self.face_model_path_config, fps=self.fps_config,
+                process_interval=self.process_interval,
+                analyzer_config={
+                    "filter_mode": self.filter_mode_config,
+                    "detection_max_side": self.detection_max_side_config,
+                    "detection_crop_margin": self.detection_crop_margin_config,
+                    "roi_mode": self.roi_mode_config,
+                    "roi_grid": self.roi_grid_config,
+                    "skin_mask": self.skin_mask_config,
+                    "rppg_algorithm": self.rppg_algorithm_config,
+                    "resample_method": self.resample_method_config,
+                })
+            self.multi_camera.start()
+        except (OSError, ValueError) as e:
+            self.video_label.setText(f"Error: Gagal memulai proses kamera: {e}")
+            self.multi_camera = None
+            return
+
+        names = [f"Kamera {s}" if isinstance(s, int) else os.path.basename(str(s))
+                 for s in self.camera_sources_config]
+        grid = self.ui.show_camera_grid(names)
+        grid.camera_selected.connect(self._select_camera)
+        self.selected_camera = 0
+        self._last_dsp_count = -1
+        self._start_trend("cam0")
+        self.multi_camera_timer.start(int(1000.0 / self.display_fps_config))
+        self.ui.start_button.setEnabled(False)
+        self.ui.end_button.setEnabled(True)
+        print(f"Proses multi-kamera dimulai ({len(names)} sumber).")
+
+    def _stop_multi_camera(self):
+        self.multi_camera_timer.stop()
+        if self.multi_camera is None:
+            return
+        self.multi_camera.stop()
+        self.multi_camera = None
+        self.ui.hide_camera_grid()
+
+    def _select_camera(self, index):
+        # Panel kanan (HR, kualitas, plot) mengikuti kamera yang dipilih
+        self.selected_camera = index
+        self._last_dsp_count = -1
+        self._start_trend(f"cam{index}") # Tren (dan file CSV-nya) per kamera, bukan disambung
+        self._clear_signal_plots()
+        if self.rppg_line is None:
+            self.ui.hr_trend_plot.clear()
+
+    def _update_multi_camera(self):
+        host, grid = self.multi_camera, self.ui.camera_grid
+        if host is None or grid is None:
+            return
+        for index, message in host.poll_errors().items():
+            print(f"Kamera {index} berhenti: {message}")
+            grid.set_status(index, "Error")
+        for index in range(len(host.sources)):
+            frame = host.latest(index)
+            if frame is None:
+                if not host.is_running(index) and not grid.tiles[index].status:
+                    grid.set_status(index, "Berakhir")
+                continue
+            grid.update_camera(index, frame)
+            if self.telemetry is not None and frame.dsp_count and self._telemetry_dsp_counts.get(index) != frame.dsp_count:
+                self._telemetry_dsp_counts[index] = frame.dsp_count
+                self._publish_telemetry(index, frame.hr, frame.quality, frame.waveform, frame.vitals, frame.beats,
+                                        fs=frame.fs or self.fps_config)
+            if index != self.selected_camera:
+                continue
+            # Hanya kamera terpilih yang menggerakkan plot; frame tidak digambar ulang di video_label
+            dsp_updated = frame.dsp_count != self._last_dsp_count
+            self._last_dsp_count = frame.dsp_count
+            self._update_gui_plots_and_labels(None, frame.waveform.tolist() if dsp_updated else [], frame.hr,
+                                              force_plot_update=dsp_updated, quality=frame.quality,
+                                              vitals=frame.vitals, beats=frame.beats)
+
+    def _set_perf_overlay(self, visible):
+        self.perf_overlay_config = visible
+        running = self.pipeline is not None or self.timer.isActive()
+        self.ui.set_perf_overlay_visible(visible and running and self.perf.enabled)
+        if visible and running and self.perf.enabled:
+            self._refresh_perf_overlay()
+            self.perf_timer.start(500)
+        else:
+            self.perf_timer.stop()
+
+    def _refresh_perf_overlay(self):
+        text = self.perf.summary_text()
+        if self.load_controller:
+            text += "\n" + self.load_controller.summary_text()
+        self.ui.set_perf_text(text)
+
+    def _dump_perf_report(self):
+        if not (self.perf.enabled and self.perf_dump_path_config):
+            return
+        try:
+            extra = None
+            if self.load_controller:
+                extra = {"load_decisions": [d._asdict() for d in self.load_controller.decisions]}
+            self.perf.dump(self.perf_dump_path_config, extra)
+            print(f"Laporan performa disimpan: {self.perf_dump_path_config}")
+        except OSError as e:
+            print(f"Gagal menyimpan laporan performa: {e}")
+
+    def _start_trend(self, label=None):
+        # Setiap sesi (dan setiap pergantian kamera) mendapat file tren sendiri dengan waktu mulai dari 0
+        self.hr_history.close()
+        self.hr_history.clear()
+        self._session_start_time = time.monotonic()
+        self.hr_history.flush_path = None
+        self.hr_history.flush_interval_s = self.trend_flush_interval_config
+        if not self.trend_dir_config:
+            return
+        try:
+            os.makedirs(self.trend_dir_config, exist_ok=True)
+            stem = time.strftime("trend_%Y%m%d_%H%M%S") + (f"_{label}" if label else "")
+            path, n = os.path.join(self.trend_dir_config, stem + ".csv"), 1
+            while os.path.exists(path): # Pergantian kamera dalam detik yang sama
+                path, n = os.path.join(self.trend_dir_config, f"{stem}_{n}.csv"), n + 1
+            self.hr_history.flush_path = path
+        except OSError as e:
+            print(f"Gagal menyiapkan file tren: {e}")
+
+    def _record_trend(self, hr, quality):
+        # Satu titik per hasil DSP; HR yang tidak dipublikasikan disimpan sebagai NaN (tidak diagregasi)
+        t = time.monotonic() - self._session_start_time
+        try:
+            self.hr_history.append(t, (hr if hr > 0 else np.nan, quality.index if quality is not None else np.nan))
+        except OSError as e:
+            print(f"Gagal menulis file tren: {e}")
+            self.hr_history.flush_path = None
+        if self.rppg_line is not None:
+            return
+        series = self.hr_history.query("hr", max_points=self.trend_plot_points_config)
+        valid = np.isfinite(series.mean)
+        self.ui.hr_trend_plot.set_data(series.mean[valid], series.times[valid],
+                                       band=(series.min[valid], series.max[valid]))
+
+    def _start_telemetry(self):
+        self._telemetry_publishers = {}
+        self._telemetry_dsp_counts = {}
+        if not self.telemetry_config or self.telemetry is not None:
+            return
+        try:
+            self.telemetry = TelemetryServer(**self.telemetry_config)
+            self.telemetry.start()
+            print(f"Server telemetri aktif: tcp={self.telemetry.tcp_port}, ws={self.telemetry.ws_port}")
+        except (OSError, ValueError) as e:
+            print(f"Gagal memulai server telemetri: {e}")
+            self.telemetry = None
+
+    def _publish_telemetry(self, source, hr, quality, filtered_rppg, vitals, beats, fs=None):
+        # Hanya memasukkan pesan ke antrian server; klien lambat tidak pernah menahan GUI/pipeline
+        if self.telemetry is None or not self.telemetry.clients:
+            return
+        publisher = self._telemetry_publishers.get(source)
+        if publisher is None:
+            publisher = self._telemetry_publishers[source] = TelemetryPublisher(self.telemetry)
+        if fs is None and self.analyzer is not None:
+            fs = self.analyzer.waveform_fs
+        confidence = quality.index if quality is not None and quality.usable and hr > 0 else 0.0
+        now = time.monotonic()
+        publisher.publish_result(now, hr, confidence, filtered_rppg, fs, quality, vitals, beats, source=source)
+        if source is None:
+            publisher.publish_timings(self.perf, now)
+
+    def _start_session_recording(self):
+        if not self.session_record_dir_config or self.subjects:
+            return
+        try:
+            os.makedirs(self.session_record_dir_config, exist_ok=True)
+            path = os.path.join(self.session_record_dir_config,
+                                time.strftime("session_%Y%m%d_%H%M%S") + RECORDING_EXTENSION)
+            self.session_recorder = SessionRecorder(path, metadata={
+                "fps": self.fps_config, "roi_mode": self.roi_mode_config,
+                "rppg_algorithm": self.rppg_algorithm_config})
+            self.analyzer.recorder = self.session_recorder
+        except OSError as e:
+            print(f"Gagal memulai rekaman sesi: {e}")
+
+    def _stop_session_recording(self):
+        # Dipanggil setelah pipeline berhenti, sehingga tidak ada lagi thread yang menulis
+        if self.session_recorder is None:
+            return
+        self.analyzer.recorder = None
+        self.session_recorder.close()
+        print(f"Rekaman sesi disimpan: {self.session_recorder.path} ({self.session_recorder.records_written} frame)")
+        self.session_recorder = None
+
+    def _build_load_controller(self):
+        # Urutan pendaftaran = urutan prioritas pengorbanan; pengambilan sampel sinyal tidak pernah dikurangi.
+        # Mode thread: setiap knob terikat pada stage (thread) yang diringankannya; mode timer: satu loop (None)
+        threaded = self.use_threaded_pipeline_config
+        controller = LoadSheddingController(budget_s=1.0 / self.fps_config, on_decision=self._on_load_decision)
+        base_detect = self.face_tracking.controller.min_interval if self.face_tracking else self.inference_interval
+        controller.add_knob("detect_interval", [base_detect * k for k in (1, 2, 3, 4)], self._set_detect_interval,
+                            stage="detect" if threaded else None)
+        controller.add_knob("dsp_interval", [self.process_interval * k for k in (1, 2, 3, 4)],
+                            self._set_process_interval, stage="dsp" if threaded else None)
+        controller.add_knob("display_fps", [self.display_fps_config * k for k in (1, 2 / 3, 1 / 2, 1 / 3)],
+                            self._set_display_fps, stage="display" if threaded else None)
+        scaler = self.analyzer.detection_scaler
+        if scaler is not None:
+            controller.add_knob("detect_side", [int(scaler.max_side * k) for k in (1, 0.8, 0.6, 0.5)],
+                                self._set_detection_side, stage="detect" if threaded else None)
+        return controller
+
+    # Setter knob; pada mode thread dipanggil dari thread stage-nya (penugasan atribut tunggal)
+    def _set_detect_interval(self, interval):
+        self.inference_interval = interval
+        if self.face_tracking:
+            self.face_tracking.set_min_interval(interval)
+        if self.pipeline is not None:
+            self.pipeline.detector.inference_interval = interval
+
+    def _set_process_interval(self, interval):
+        self.process_interval = interval
+        if self.pipeline is not None:
+            self.pipeline.dsp.process_interval = interval
+
+    def _set_display_fps(self, fps):
+        self.display_fps_config = fps
+
+    def _set_detection_side(self, max_side):
+        self.analyzer.detection_scaler.max_side = max_side
+
+    def _on_load_decision(self, decision):
+        self.perf.count(f"load_{decision.action}")
+        print(f"Load shedding: {decision.action} {decision.knob} {decision.old:g} -> {decision.new:g} "
+              f"(beban {decision.load * 100:.0f}%)")
+
     def _preprocess_frame(self):
-        if self.cap is None or not self.cap.isOpened(): return None, None, None
-        ret, frame = self.cap.read() # Baca frame
-        if not ret: return None, None, None # Jika gagal baca frame
+        if self.cap is None or not self.cap.isOpened(): return None
+        # Baca frame langsung ke buffer yang dipakai ulang
+        with self.perf.measure("capture"):
+            if self._capture_buffer is not None:
+                ret, frame = self.cap.read(self._capture_buffer)
+            else:
+                ret, frame = self.cap.read()
+        if not ret: # Jika gagal baca frame
+            self.perf.count("capture_failures")
+            return None
+        self._capture_buffer = frame
+        self.last_frame_timestamp = time.monotonic() # Timestamp capture untuk pemasangan hasil deteksi
+
+        # Konversi (dan resize) untuk MediaPipe dilakukan oleh HealthAnalyzer.detect_faces_in_frame
+        return cv2.flip(frame, 1, dst=frame) # Flip horizontal in-place agar seperti cermin
+
+    def _primary_subject_quality(self):
+        """SignalQuality subjek utama pada mode multi-subjek (None bila belum ada estimasi)."""
+        primary = self.subjects.primary_track()
+        return primary.quality if primary is not None else None
 
-        frame = cv2.flip(frame, 1) # Flip horizontal agar seperti cermin
-        rgb_frame_for_mp = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) # Konversi ke RGB untuk MediaPipe
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame_for_mp) # Buat objek mp.Image
-        return frame, rgb_frame_for_mp, mp_image
+    def _draw_roi_overlay(self, pixmap, roi_rects, scale_x, scale_y, subjects=None):
+        # ROI digambar di atas pixmap yang sudah diskalakan, frame asli tidak diubah
+        painter = QPainter(pixmap)
+        painter.setPen(QPen(QColor(255, 255, 0), 1))
+        for x, y, w, h in roi_rects:
+            painter.drawRect(int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y))
+        # Mode multi-subjek: box wajah beserta ID dan HR masing-masing
+        painter.setPen(QPen(QColor(0, 173, 181), 2))
+        for subject in subjects or []:
+            x, y, w, h = subject.bbox
+            painter.drawRect(int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y))
+            label = f"#{subject.id} {subject.hr:.0f} BPM" if subject.hr > 0 else f"#{subject.id} --"
+            painter.drawText(int(x * scale_x), max(12, int(y * scale_y) - 4), label)
+        painter.end()
+
+    def _update_qt_plots(self, filtered_rppg, hr, spectrum):
+        # Widget QPainter hanya digambar ulang saat ada data baru
+        self.ui.rppg_plot.set_data(filtered_rppg)
+        if spectrum is not None:
+            self.ui.spectrum_plot.push_spectrum(*spectrum)
+
+    def _update_gui_plots_and_labels(self, frame_processed, filtered_rppg, hr, force_plot_update=False,
+                                     roi_rects=None, spectrum=None, subjects=None, quality=None, vitals=None,
+                                     beats=None):
+        if force_plot_update and (hr > 0 or quality is not None):
+            self._record_trend(hr, quality)
+            if self.multi_camera is None: # Multi-kamera: setiap kamera dikirim dari _update_multi_camera
+                self._publish_telemetry(None, hr, quality, filtered_rppg, vitals, beats)
+        # Jendela tidak layak (indeks kualitas rendah): plot dibersihkan sekali,
+        # lalu tidak digambar ulang sampai sinyal layak kembali
+        if quality is not None and not quality.usable:
+            if self._plots_live:
+                self._clear_signal_plots()
+            force_plot_update = False
+        elif force_plot_update and filtered_rppg:
+            self._plots_live = True
+        self.ui.set_signal_quality(quality)
+        self.ui.set_vitals(vitals)
+        self.ui.set_beats(beats)
 
-    def _update_gui_plots_and_labels(self, frame_processed, filtered_rppg, hr, force_plot_update=False):
         # Update plot rPPG
-        if filtered_rppg or force_plot_update:
-            self.rppg_line.set_ydata(filtered_rppg)
-            self.rppg_line.set_xdata(range(len(filtered_rppg)))
-            self.ax_rppg.relim(); self.ax_rppg.autoscale_view(True,True,True)
-            self.canvas_rppg.draw_idle()
-        
-        if force_plot_update and hasattr(self.ui, '_apply_styles'): self.ui._apply_styles()
+        if self.rppg_line is None:
+            if force_plot_update:
+                self._update_qt_plots(filtered_rppg, hr, spectrum)
+        else:
+            if filtered_rppg or force_plot_update:
+                self.rppg_line.set_ydata(filtered_rppg)
+                self.rppg_line.set_xdata(range(len(filtered_rppg)))
+                self.ax_rppg.relim(); self.ax_rppg.autoscale_view(True,True,True)
+                self.canvas_rppg.draw_idle()
+
+            if force_plot_update and hasattr(self.ui, '_apply_styles'): self.ui._apply_styles()
 
         # Update label nilai HR
         self.hr_label.setText(f"{hr:.0f} BPM" if hr > 0 else "-- BPM")
 
-        # Update video feed
+        # Update video feed (dibatasi display_fps_config, kecuali update paksa)
+        now = time.monotonic()
+        if (not force_plot_update and frame_processed is not None
+                and now - self._last_display_time < 1.0 / self.display_fps_config):
+            return
         if frame_processed is not None and frame_processed.size > 0 :
             try:
-                # Konversi frame BGR ke RGB untuk QImage
-                display_frame_for_qt = cv2.cvtColor(frame_processed, cv2.COLOR_BGR2RGB)
-                h, w, ch = display_frame_for_qt.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(display_frame_for_qt.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_image)
-                # Skalakan pixmap agar sesuai dengan ukuran label video
-                self.video_label.setPixmap(pixmap.scaled(
-                    self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            except cv2.error as e_cv:
-                print(f"Error konversi frame untuk GUI: {e_cv}")
-                self.video_label.setText("Error Frame Conversion")
+                gui_start = time.perf_counter()
+                self._last_display_time = now
+                # QImage membungkus memori frame BGR secara langsung, tanpa konversi warna
+                h, w, ch = frame_processed.shape
+                qt_image = QImage(frame_processed.data, w, h, frame_processed.strides[0], QImage.Format_BGR888)
+                transform_mode = Qt.SmoothTransformation if self.display_smooth_scaling_config else Qt.FastTransformation
+                # Skalakan gambar agar sesuai dengan ukuran label video
+                scaled_image = qt_image.scaled(self.video_label.size(), Qt.KeepAspectRatio, transform_mode)
+                pixmap = QPixmap.fromImage(scaled_image)
+                if roi_rects or subjects:
+                    self._draw_roi_overlay(pixmap, roi_rects or [], scaled_image.width() / w,
+                                           scaled_image.height() / h, subjects)
+                self.video_label.setPixmap(pixmap)
+                self.perf.record("gui", time.perf_counter() - gui_start)
             except Exception as e_gui:
                 print(f"Error updating video label: {e_gui}")
                 self.video_label.setText("Error GUI Display")
@@ -201,6 +723,38 @@ class MainWindow(QMainWindow):
             self.video_label.setText("Processing...")
 
 
+    def _clear_signal_plots(self):
+        self._plots_live = False
+        if self.rppg_line is not None:
+            self.rppg_line.set_data([], [])
+            self.canvas_rppg.draw_idle()
+        else:
+            self.ui.rppg_plot.clear()
+            self.ui.spectrum_plot.clear()
+
+    def _on_pipeline_result(self):
+        """Slot GUI: ambil hanya hasil pipeline terbaru dan tampilkan."""
+        if self.pipeline is None:
+            return
+        result = self.pipeline.take_latest_result()
+        if result is None:
+            return
+        gui_start = time.perf_counter()
+        plot_data_updated = result.filtered_rppg is not self.last_filtered_rppg
+        self.last_filtered_rppg = result.filtered_rppg
+        self.last_processed_hr = result.hr
+        self._update_gui_plots_and_labels(result.frame_bgr, self.last_filtered_rppg,
+                                          self.last_processed_hr, force_plot_update=plot_data_updated,
+                                          roi_rects=result.roi_rects, spectrum=result.spectrum,
+                                          subjects=result.subjects, quality=result.quality,
+                                          vitals=result.vitals, beats=result.beats)
+        # Latensi capture -> tampil (timestamp frame berasal dari time.monotonic())
+        self.perf.record("frame_latency", time.monotonic() - result.timestamp)
+        # QImage yang membungkus frame sudah dibuang: buffer boleh dipakai ulang capture
+        self.pipeline.release_result(result)
+        if self.load_controller:
+            self.load_controller.observe(time.perf_counter() - gui_start, stage="display")
+
     def update_frame(self):
         """
         Metode utama yang dipanggil oleh QTimer secara periodik.
@@ -211,53 +765,108 @@ class MainWindow(QMainWindow):
                 self.video_label.setText("Health Analyzer tidak termuat. Aplikasi tidak dapat berfungsi.")
             return
 
+        # Tick QTimer yang terlambat lebih dari setengah interval berarti frame kamera terlewat
+        tick_time = time.monotonic()
+        if self._last_tick_time is not None:
+            missed = int((tick_time - self._last_tick_time) * self.fps_config - 0.5)
+            if missed > 0:
+                self.perf.count("dropped_frames", missed)
+        self._last_tick_time = tick_time
+
         # 1. Dapatkan frame dari kamera dan lakukan pra-pemrosesan
-        original_frame_bgr, _, mp_image = self._preprocess_frame() # rgb_frame_for_mp tidak dipakai langsung di sini
+        original_frame_bgr = self._preprocess_frame()
         
         if original_frame_bgr is None: # Jika gagal mendapatkan frame
             self._update_gui_plots_and_labels(None, self.last_filtered_rppg,
                                               self.last_processed_hr)
             return
 
-        # Buat salinan frame untuk digambari ROI (format BGR)
-        frame_to_display_with_roi = original_frame_bgr.copy()
+        roi_rects = []
 
         # 2. Lakukan inferensi model secara berkala (tidak setiap frame)
-        run_inference_this_frame = (self.frame_count_for_inference % self.inference_interval == 0)
+        if self.face_tracking:
+            run_inference_this_frame = self.face_tracking.should_detect()
+        else:
+            run_inference_this_frame = (self.frame_count_for_inference % self.inference_interval == 0)
         self.frame_count_for_inference += 1
 
-        if run_inference_this_frame and mp_image:
+        if run_inference_this_frame:
+            # Box terakhir dipakai untuk crop input detektor di sekitar wajah
+            if self.face_tracking:
+                prev_bbox = self.face_tracking.current_bbox()
+            else:
+                prev_bbox = bbox_from_detection(self.last_face_detection_result)
             # Simpan hasil deteksi untuk digunakan pada frame berikutnya jika tidak ada inferensi baru
-            self.last_face_detection_result = self.analyzer.detect_faces(mp_image)
+            self.last_face_detection_result = self.analyzer.detect_faces_in_frame(
+                original_frame_bgr, timestamp_ms=int(self.last_frame_timestamp * 1000), prev_bbox=prev_bbox)
         
         # 3. Ekstrak sinyal mentah rPPG menggunakan hasil deteksi terakhir
-        # HealthAnalyzer akan menggambar ROI pada frame_to_display_with_roi
-        if self.last_face_detection_result:
-            self.analyzer.process_rppg_from_face(frame_to_display_with_roi, self.last_face_detection_result)
+        # ROI tidak digambar ke frame; GUI menggambarnya sebagai overlay
+        subjects = None
+        if self.subjects:
+            # Semua wajah diambil sampelnya sekaligus (satu integral image untuk semua ROI)
+            with self.perf.measure("roi"):
+                self.subjects.process_frame(original_frame_bgr, self.last_face_detection_result,
+                                            self.last_frame_timestamp)
+            tracks = self.subjects.active_tracks
+            roi_rects = [rect for track in tracks for rect in track.roi_rects]
+            subjects = [SubjectSnapshot(t.id, t.bbox, t.hr, t.quality) for t in tracks]
+        elif self.face_tracking:
+            # Box dilacak setiap frame; deteksi baru menginisialisasi ulang pelacak
+            face_bbox = self.face_tracking.update(original_frame_bgr, self.last_face_detection_result)
+            if face_bbox is not None:
+                self.analyzer.process_rppg_from_bbox(original_frame_bgr, face_bbox,
+                                                     timestamp=self.last_frame_timestamp, draw_roi=False)
+                roi_rects = self.analyzer.last_roi_rects
+            else:
+                self.analyzer.note_missing_face(self.last_frame_timestamp)
+        else:
+            self.analyzer.process_rppg_from_face(original_frame_bgr, self.last_face_detection_result,
+                                                 timestamp=self.last_frame_timestamp, draw_roi=False)
+            roi_rects = self.analyzer.last_roi_rects
         
         # 4. Proses sinyal (filter & FFT) secara berkala
         self.frames_since_last_process += 1
         plot_data_updated_this_cycle = False # Flag untuk menandai apakah plot perlu di-update
+        spectrum = self.analyzer.last_spectrum
 
         if self.frames_since_last_process >= self.process_interval:
             self.frames_since_last_process = 0
             
             # Proses sinyal rPPG dan hitung HR
-            if len(self.analyzer.rppg_signal_buffer) >= self.analyzer.min_signal_length:
+            if self.subjects:
+                # Filter + FFT semua subjek dalam satu batch; plot mengikuti subjek utama
+                with self.perf.measure("dsp"):
+                    self.subjects.compute_hr()
+                primary = self.subjects.primary_track()
+                self.last_filtered_rppg = primary.filtered if primary is not None else []
+                self.last_processed_hr = primary.hr if primary is not None else 0.0
+                spectrum = primary.spectrum if primary is not None else None
+                plot_data_updated_this_cycle = True
+            elif len(self.analyzer.rppg_signal_buffer) >= self.analyzer.min_signal_length:
                 filtered_rppg, current_hr = self.analyzer.filter_and_calculate_hr()
                 self.last_filtered_rppg = filtered_rppg
                 self.last_processed_hr = current_hr
                 plot_data_updated_this_cycle = True
             else: # Jika sinyal belum cukup, tampilkan buffer mentah
-                self.last_filtered_rppg = list(self.analyzer.rppg_signal_buffer)
+                self.last_filtered_rppg = self.analyzer.rppg_signal_buffer.values().tolist()
         
-        # 5. Update GUI dengan frame yang sudah digambari ROI dan data sinyal terbaru
+        # 5. Update GUI dengan frame, overlay ROI, dan data sinyal terbaru
         self._update_gui_plots_and_labels(
-            frame_to_display_with_roi, # Frame BGR dengan ROI
+            original_frame_bgr, # Frame BGR tanpa modifikasi
             self.last_filtered_rppg,
             self.last_processed_hr,
-            force_plot_update=plot_data_updated_this_cycle # Paksa update plot jika data baru diproses
+            force_plot_update=plot_data_updated_this_cycle, # Paksa update plot jika data baru diproses
+            roi_rects=roi_rects,
+            spectrum=spectrum if plot_data_updated_this_cycle else None,
+            subjects=subjects,
+            quality=self._primary_subject_quality() if self.subjects else self.analyzer.last_quality,
+            vitals=None if self.subjects else self.analyzer.last_vitals,
+            beats=None if self.subjects else self.analyzer.last_beats
         )
+        self.perf.record("frame_latency", time.monotonic() - self.last_frame_timestamp)
+        if self.load_controller:
+            self.load_controller.observe(time.monotonic() - tick_time)
 
     def closeEvent(self, event):
         """
@@ -265,6 +874,9 @@ class MainWindow(QMainWindow):
         Memastikan proses dihentikan dengan benar.
         """
         self.end_processing()
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.telemetry = None
         print("Aplikasi ditutup.")
         event.accept()
 
@@ -280,12 +892,9 @@ if __name__ == "__main__":
             print(f"Gagal membuat folder 'models': {e}")
             sys.exit(1)
             
-    window = MainWindow() # Buat instance MainWindow
-    
-    # Hanya jalankan aplikasi jika HealthAnalyzer dan modelnya berhasil dimuat
-    if window.analyzer and window.analyzer.has_models():
-        window.show() # Tampilkan window
-        sys.exit(app.exec_()) # Jalankan event loop aplikasi
-    else:
-        print("Gagal memuat HealthAnalyzer atau modelnya. Aplikasi mungkin tidak berfungsi penuh.")
-        window.show()
\ No newline at end of file
+    window = MainWindow() # Buat instance MainWindow; model dimuat di thread latar
+    STARTUP.mark("window_created")
+    window.show() # Tampilkan window
+    # Dipanggil setelah event loop berjalan, yaitu saat window pertama kali digambar
+    QTimer.singleShot(0, lambda: STARTUP.mark("window_shown"))
+    sys.exit(app.exec_()) # Jalankan event loop aplikasi
\ No newline at end of file
@@ -0,0 +1,80 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+try:
+    from utils.offline import collect_videos, write_result
+    from utils.recording import RECORDING_EXTENSION, SessionRecording, replay_session
+    from utils.signal_processing import HealthAnalyzer
+except ImportError as e:
+    print(f"Penting: Gagal mengimpor modul dari folder 'utils'. Pastikan file ada dan benar: {e}")
+    sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay rekaman sesi (.rppgrec) ke stage DSP tanpa kamera, detektor, maupun decoding video.")
+    parser.add_argument("inputs", nargs="+", help="File rekaman dan/atau direktori berisi rekaman")
+    parser.add_argument("-o", "--output-dir", default="replay_results", help="Direktori output (default: replay_results)")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], default="csv",
+                        help="Format output; parquet membutuhkan pandas + pyarrow")
+    parser.add_argument("--hop", type=float, default=0.5, help="Jarak antar estimasi HR, dalam detik")
+    parser.add_argument("--filter-mode", choices=["accurate", "streaming"], default="accurate")
+    parser.add_argument("--algorithm", choices=["green", "chrom", "pos", "ica"], default="green",
+                        help="Algoritma pulsa untuk kolom hr_bpm")
+    parser.add_argument("--compare", nargs="*", default=[], choices=["green", "chrom", "pos", "ica"],
+                        help="Algoritma tambahan yang dihitung pada jendela yang sama (kolom hr_<nama>_bpm)")
+    parser.add_argument("--lowcut", type=float, default=0.67, help="Batas bawah pita HR, Hz")
+    parser.add_argument("--highcut", type=float, default=4.0, help="Batas atas pita HR, Hz")
+    parser.add_argument("--resample", choices=["linear", "cubic", "none"], default="linear",
+                        help="Resampling ke grid seragam sebelum filter")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = collect_videos(args.inputs, extensions=(RECORDING_EXTENSION,))
+    if not paths:
+        print("Tidak ada file rekaman yang ditemukan.")
+        return 1
+
+    analyzers = {} # Satu analyzer DSP (tanpa model) per FPS rekaman
+    summaries = []
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            recording = SessionRecording(path)
+            fps = recording.metadata.get("fps", 30)
+            if fps not in analyzers:
+                analyzers[fps] = HealthAnalyzer(
+                    face_model_path=None, fps=fps, filter_mode=args.filter_mode,
+                    rppg_lowcut=args.lowcut, rppg_highcut=args.highcut,
+                    rppg_algorithm=args.algorithm, compare_algorithms=args.compare,
+                    resample_method=None if args.resample == "none" else args.resample)
+            result = replay_session(recording, analyzers[fps], hop_seconds=args.hop)
+            write_result(result, args.output_dir, args.format)
+            summary = result.summary()
+            print(f"Selesai: {path} ({summary['frames']} frame, HR rata-rata {summary['mean_hr_bpm']:.1f} BPM)")
+        except (OSError, ValueError) as e:
+            summary = {"video": path, "error": str(e)}
+            print(f"Gagal memproses {path}: {e}")
+        summaries.append(summary)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, "summary.csv")
+    fields = ["video", "frames", "samples", "mean_hr_bpm", "mean_respiration_rpm", "beats", "processing_fps", "error"]
+    with open(summary_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, restval="")
+        writer.writeheader()
+        writer.writerows(summaries)
+
+    failed = sum(1 for s in summaries if "error" in s)
+    print(f"Selesai dalam {time.perf_counter() - start:.1f} s: {len(summaries) - failed} berhasil, "
+          f"{failed} gagal. Ringkasan: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+
+try:
+    # Tanpa Qt: aman dijalankan headless
+    from utils.signal_processing import HealthAnalyzer
+    from utils.telemetry import TelemetryServer, TelemetryPublisher, stream_source
+    from utils.tracking import FaceTrackingController, AdaptiveInferenceController
+    from utils.instrumentation import PerfMonitor # Latensi per stage untuk pesan "timings"
+except ImportError as e:
+    print(f"Penting: Gagal mengimpor modul dari folder 'utils'. Pastikan file ada dan benar: {e}")
+    sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Jalankan HealthAnalyzer tanpa GUI dan kirim HR, confidence, waveform, serta latensi "
+                    "ke subscriber lokal (NDJSON lewat TCP dan/atau WebSocket).")
+    parser.add_argument("source", nargs="?", default="0", help="Indeks kamera atau path file video (default: 0)")
+    parser.add_argument("--host", default="127.0.0.1", help="Alamat bind server (default: hanya lokal)")
+    parser.add_argument("--tcp-port", type=int, default=8765, help="Port NDJSON/TCP (0 = dipilih OS, -1 = nonaktif)")
+    parser.add_argument("--ws-port", type=int, default=8766, help="Port WebSocket (0 = dipilih OS, -1 = nonaktif)")
+    parser.add_argument("--client-queue", type=int, default=64,
+                        help="Pesan maksimum yang ditahan per klien; pesan terlama dibuang bila klien lambat")
+    parser.add_argument("--model", default="models/blaze_face_short_range.tflite",
+                        help="Path model deteksi wajah MediaPipe")
+    parser.add_argument("--fps", type=float, default=30.0, help="FPS nominal sumber")
+    parser.add_argument("--hop", type=float, default=0.5, help="Jarak antar estimasi HR, dalam detik")
+    parser.add_argument("--filter-mode", choices=["accurate", "streaming"], default="accurate")
+    parser.add_argument("--roi-mode", choices=["forehead", "multi"], default="forehead",
+                        help="ROI dahi saja, atau dahi + kedua pipi dengan fusi berbobot SNR")
+    parser.add_argument("--skin-mask", action="store_true", help="Gunakan masker kulit YCrCb pada ROI")
+    parser.add_argument("--algorithm", choices=["green", "chrom", "pos", "ica"], default="green",
+                        help="Algoritma pulsa (mode accurate)")
+    parser.add_argument("--no-tracker", action="store_true",
+                        help="Jalankan detektor di setiap frame, tanpa pelacak optical flow")
+    parser.add_argument("--no-mirror", action="store_true", help="Jangan flip horizontal frame kamera")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.model):
+        print(f"Model deteksi wajah tidak ditemukan: {args.model}")
+        return 1
+    source = int(args.source) if args.source.isdigit() else args.source
+
+    server = TelemetryServer(args.host, tcp_port=None if args.tcp_port < 0 else args.tcp_port,
+                             ws_port=None if args.ws_port < 0 else args.ws_port, client_queue=args.client_queue)
+    try:
+        server.start()
+    except (OSError, ValueError) as e:
+        print(f"Gagal memulai server telemetri: {e}")
+        return 1
+    endpoints = []
+    if server.tcp_port is not None:
+        endpoints.append(f"tcp://{args.host}:{server.tcp_port} (NDJSON)")
+    if server.ws_port is not None:
+        endpoints.append(f"ws://{args.host}:{server.ws_port}")
+    print("Telemetri: " + ", ".join(endpoints))
+
+    analyzer = None
+    try:
+        analyzer = HealthAnalyzer(face_model_path=args.model, fps=args.fps, filter_mode=args.filter_mode,
+                                  running_mode="video", detection_max_side=320, detection_crop_margin=0.75,
+                                  roi_mode=args.roi_mode, skin_mask=args.skin_mask,
+                                  rppg_algorithm=args.algorithm, perf_monitor=PerfMonitor())
+        tracking = None if args.no_tracker else \
+            FaceTrackingController(controller=AdaptiveInferenceController(1, max(1, int(args.fps) // 2)))
+        frames = stream_source(source, analyzer, TelemetryPublisher(server), tracking=tracking,
+                               process_interval=max(1, int(round(args.hop * args.fps))), mirror=not args.no_mirror)
+        print(f"Sumber berakhir setelah {frames} frame.")
+    except KeyboardInterrupt:
+        print("Dihentikan.")
+    except (OSError, ValueError) as e:
+        print(f"Gagal memproses sumber {source}: {e}")
+        return 1
+    finally:
+        server.stop()
+        if analyzer is not None and analyzer.face_detector is not None:
+            analyzer.face_detector.close()
+    print(f"{server.published} pesan dikirim, {server.dropped} dibuang karena klien lambat.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
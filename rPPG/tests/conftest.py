@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul aplikasi diimpor sebagai `utils.*` dari folder rPPG, sama seperti main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
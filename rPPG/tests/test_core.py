@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.ring_buffer import RingBuffer
+from utils.spectral import SlidingDFT
+from utils.beats import IbiHistory
+from utils.history import TrendHistory
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "models", "blaze_face_short_range.tflite")
+
+
+def test_ring_buffer_wraparound():
+    buf = RingBuffer(5)
+    for i in range(12):
+        buf.append(float(i), timestamp=i * 0.1)
+    assert len(buf) == 5 and buf.is_full and buf.total_appended == 12
+    np.testing.assert_array_equal(buf.values(), [7, 8, 9, 10, 11])
+    np.testing.assert_allclose(buf.timestamps(), [0.7, 0.8, 0.9, 1.0, 1.1])
+    np.testing.assert_array_equal(buf.values(3), [9, 10, 11])
+    assert buf.latest() == 11
+    # View kontigu tanpa salinan, read-only
+    assert buf.values().flags.c_contiguous and not buf.values().flags.writeable
+    buf.clear()
+    assert len(buf) == 0 and buf.latest() is None and buf.total_appended == 0
+
+
+def test_ring_buffer_channels():
+    buf = RingBuffer(3, channels=2)
+    for i in range(7):
+        buf.append([i, -i], timestamp=float(i))
+    np.testing.assert_array_equal(buf.values(), [[4, -4], [5, -5], [6, -6]])
+
+
+@pytest.mark.parametrize("window", [None, "hann"])
+def test_sliding_dft_matches_rfft(window):
+    n, fs = 128, 30.0
+    rng = np.random.default_rng(0)
+    samples = rng.normal(size=700)
+    sdft = SlidingDFT(n, fs, 0.67, 4.0, window=window, resync_interval=10 ** 6)
+    for i, x in enumerate(samples):
+        sdft.update(x, samples[i - n] if i >= n else 0.0)
+    tail = samples[-n:]
+    if window == "hann":
+        tail = tail * (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)) # Hann periodik
+    expected = np.abs(np.fft.rfft(tail))[sdft._k] * (2.0 / n)
+    # Bin tepi hanya margin untuk konvolusi Hann (tetangganya tidak dilacak)
+    inner = slice(1, -1) if window == "hann" else slice(None)
+    np.testing.assert_allclose(sdft.magnitudes()[inner], expected[inner], rtol=1e-8, atol=1e-9)
+    # Resinkronisasi menghasilkan bin yang sama
+    before = sdft.magnitudes().copy()
+    sdft.reset(samples[-n:])
+    np.testing.assert_allclose(sdft.magnitudes(), before, rtol=1e-8, atol=1e-9)
+
+
+def test_sliding_dft_peak_frequency():
+    n, fs, f0 = 256, 30.0, 1.3
+    sdft = SlidingDFT(n, fs, 0.67, 4.0)
+    sdft.reset(np.sin(2 * np.pi * f0 * np.arange(n) / fs))
+    assert abs(sdft.peak_frequency() - f0) < fs / n / 4
+
+
+def _reference_ibi_stats(ibis, linked):
+    ibis, linked = np.asarray(ibis), np.asarray(linked, dtype=bool)
+    diffs = np.diff(ibis)[linked[1:]]
+    rmssd = float(np.sqrt(np.mean(diffs ** 2))) if len(diffs) else 0.0
+    sdnn = float(np.std(ibis, ddof=1)) if len(ibis) >= 2 else 0.0
+    return float(np.mean(ibis)), rmssd, sdnn
+
+
+@pytest.mark.parametrize("resync_interval", [None, 7])
+def test_ibi_history_running_sums_match_numpy(resync_interval):
+    capacity = 16
+    history = IbiHistory(capacity, resync_interval=resync_interval)
+    rng = np.random.default_rng(1)
+    ibis, linked = [], []
+    for i in range(200):
+        ibi = 0.8 + 0.05 * rng.normal()
+        link = bool(rng.random() > 0.15) # Sebagian IBI memulai rantai baru (celah)
+        history.add(ibi, timestamp=i * 0.8, linked=link)
+        ibis.append(ibi)
+        linked.append(link and i > 0)
+        window, window_linked = ibis[-capacity:], list(linked[-capacity:])
+        window_linked[0] = False # Selisih dengan IBI yang sudah keluar jendela tidak dihitung
+        mean, rmssd, sdnn = _reference_ibi_stats(window, window_linked)
+        assert history.mean() == pytest.approx(mean, abs=1e-9)
+        assert history.rmssd() == pytest.approx(rmssd, abs=1e-7)
+        assert history.sdnn() == pytest.approx(sdnn, abs=1e-7)
+
+
+def test_ibi_history_unlinked_ibis_skip_rmssd():
+    history = IbiHistory(8)
+    history.add(0.8, 0.8)
+    history.add(1.2, 2.0, linked=False)
+    assert history.rmssd() == 0.0
+    history.add(1.0, 3.0)
+    assert history.rmssd() == pytest.approx(0.2)
+
+
+def _read_rows(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_trend_history_close_is_idempotent(tmp_path):
+    path = str(tmp_path / "trend.csv")
+    history = TrendHistory(flush_path=path, flush_interval_s=5.0)
+    for i in range(25):
+        history.append(i * 0.5, [70.0 + i % 3, 0.9])
+    history.close()
+    rows = _read_rows(path)
+    # Header + bin 1 detik yang selesai + bin yang masih berjalan saat close
+    assert rows[0].startswith("time_s,hr_min,hr_mean,hr_max")
+    assert len(rows) == 1 + 13
+    history.close()
+    assert history.flush() == 0
+    history.append(20.0, [80.0, 0.9])
+    history.close()
+    assert _read_rows(path) == rows
+    # clear() membuka kembali riwayat untuk sesi baru
+    history.clear()
+    history.append(0.0, [75.0, 0.8])
+    history.close()
+    assert len(_read_rows(path)) == len(rows) + 1
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="Model deteksi wajah tidak tersedia")
+@pytest.mark.parametrize("filter_mode", ["accurate", "streaming"])
+def test_hr_accuracy_on_synthetic_video(filter_mode):
+    pytest.importorskip("mediapipe")
+    from utils.signal_processing import HealthAnalyzer
+    from utils.synthetic import SyntheticFaceVideo
+    from utils.offline import process_video
+
+    hr_bpm, warmup_s = 72.0, 10.0
+    analyzer = HealthAnalyzer(face_model_path=MODEL_PATH, fps=30.0, filter_mode=filter_mode,
+                              running_mode="video", detection_max_side=320)
+    try:
+        video = SyntheticFaceVideo(hr_bpm=hr_bpm, fps=30.0, duration=20.0, seed=0)
+        result = process_video(video, analyzer, hop_seconds=0.5)
+    finally:
+        analyzer.face_detector.close()
+    hr_times, hr_values = np.asarray(result.hr_times), np.asarray(result.hr_values)
+    settled = hr_values[hr_times >= warmup_s]
+    assert len(settled) > 0
+    assert np.all(np.abs(settled - hr_bpm) <= 1.0), settled
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from utils.load_shedding import LoadSheddingController
+from utils.pipeline import DetectorWorker, DropOldestQueue, FramePacket
+
+BUDGET = 1.0 / 30
+
+
+def _controller(**kwargs):
+    settings = {}
+    controller = LoadSheddingController(BUDGET, window_s=1.0, restore_cooldown=2.0, **kwargs)
+    for name, stage in (("detect_interval", "detect"), ("dsp_interval", "dsp"), ("detect_side", "detect")):
+        controller.add_knob(name, [1, 2, 3], lambda value, name=name: settings.__setitem__(name, value), stage=stage)
+    return controller, settings
+
+
+def _feed(controller, stage, latency, start, seconds, fps=30):
+    """Latensi tetap pada satu stage selama `seconds`; kembalikan waktu akhir dan keputusan."""
+    decisions = []
+    n = int(seconds * fps)
+    for i in range(1, n + 1):
+        decision = controller.observe(latency, now=start + i / fps, stage=stage)
+        if decision is not None:
+            decisions.append(decision)
+    return start + n / fps, decisions
+
+
+def test_overloaded_stage_sheds_only_its_own_knobs():
+    controller, settings = _controller()
+    t = 0.0
+    for _ in range(6):
+        t, _ = _feed(controller, "dsp", 0.2 * BUDGET, t, 0.5)
+        t_next, _ = _feed(controller, "detect", 2.0 * BUDGET, t, 0.5)
+        t = t_next
+    # Knob detektor dikorbankan sesuai urutan pendaftaran, knob DSP tidak disentuh
+    assert [d.knob for d in controller.decisions] == ["detect_interval", "detect_interval", "detect_side",
+                                                      "detect_side"]
+    assert all(d.action == "shed" for d in controller.decisions)
+    assert settings == {"detect_interval": 3, "detect_side": 3}
+    assert controller.settings()["dsp_interval"] == 1
+    loads = controller.stage_loads()
+    assert loads["detect"] > 1.0 and loads["dsp"] < 0.5
+
+
+def test_idle_stage_restores_in_reverse_order_after_cooldown():
+    controller, settings = _controller()
+    t, _ = _feed(controller, "detect", 2.0 * BUDGET, 0.0, 2.1)
+    assert controller.settings()["detect_interval"] == 3
+    t, decisions = _feed(controller, "detect", 0.1 * BUDGET, t, 1.5)
+    assert decisions == [] # Cooldown pemulihan belum lewat
+    t, decisions = _feed(controller, "detect", 0.1 * BUDGET, t, 5.0)
+    assert [(d.action, d.knob, d.new) for d in decisions] == [("restore", "detect_interval", 2),
+                                                              ("restore", "detect_interval", 1)]
+    assert settings["detect_interval"] == 1
+
+
+def test_stage_without_knobs_is_ignored():
+    controller, _ = _controller()
+    _, decisions = _feed(controller, "display", 5.0 * BUDGET, 0.0, 3.0)
+    assert decisions == [] and "display" not in controller.stage_loads()
+
+
+def test_single_loop_stage_and_reset():
+    applied = []
+    controller = LoadSheddingController(BUDGET, window_s=1.0)
+    controller.add_knob("a", [10, 20], applied.append)
+    controller.add_knob("b", [1, 2], applied.append)
+    _feed(controller, None, 3.0 * BUDGET, 0.0, 3.5)
+    assert controller.settings() == {"a": 20, "b": 2}
+    assert controller.summary_text().startswith("load ")
+    controller.reset()
+    assert controller.settings() == {"a": 10, "b": 1} and applied[-2:] == [10, 1]
+    assert len(controller.decisions) == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"budget_s": 0}, {"budget_s": BUDGET, "low_load": 0.9, "high_load": 0.8}])
+def test_invalid_configuration(kwargs):
+    with pytest.raises(ValueError):
+        LoadSheddingController(**kwargs)
+
+
+class _LiveStreamAnalyzer:
+    running_mode = "live_stream"
+    last_async_latency_s = 0.05 # Inferensi di thread MediaPipe, bukan di thread detektor
+
+    def detect_faces_in_frame(self, frame_bgr, timestamp_ms=None, prev_bbox=None):
+        return None
+
+
+class _RecordingController:
+    def __init__(self):
+        self.observed = []
+
+    def observe(self, latency_s, now=None, stage=None):
+        self.observed.append((stage, latency_s))
+
+
+def test_live_stream_detector_reports_async_inference_time():
+    queue, controller = DropOldestQueue(4), _RecordingController()
+    worker = DetectorWorker(_LiveStreamAnalyzer(), queue, threading.Event(), inference_interval=2,
+                            load_controller=controller)
+    for i in range(4):
+        queue.put(FramePacket(i, i / 30, None))
+        worker.step()
+    stages = {stage for stage, _ in controller.observed}
+    latencies = [latency for _, latency in controller.observed]
+    assert stages == {"detect"}
+    # Frame dengan inferensi membawa latensi async, frame yang dilewati ~0
+    assert latencies[0] >= 0.05 and latencies[2] >= 0.05
+    assert latencies[1] < 0.01 and latencies[3] < 0.01
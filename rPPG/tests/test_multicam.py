@@ -0,0 +1,32 @@
+import numpy as np
+
+from utils.multicam import SharedFrameRing, grid_shape
+from utils.quality import SignalQuality
+from utils.beats import BeatStats
+
+
+def test_shared_frame_ring_round_trip():
+    ring = SharedFrameRing(slots=3, height=60, width=80, waveform_len=16)
+    reader = SharedFrameRing.attach(ring.spec)
+    try:
+        assert reader.read_latest() is None
+        frame = np.full((120, 160, 3), 7, np.uint8) # Diperkecil 2x agar muat di slot
+        quality = SignalQuality(0.8, True, 0.5, 0.0, 0.1, 1.0, "")
+        ring.write(frame, 1.5, hr=72.0, confidence=0.8, quality=quality, dsp_count=3, roi_rects=[(20, 40, 10, 8)],
+                   waveform=np.arange(40.0), beats=BeatStats(71.0, 35.0, 40.0, 12), fs=29.5)
+        latest = reader.read_latest()
+        assert latest.frame_bgr.shape == (60, 80, 3) and np.all(latest.frame_bgr == 7)
+        assert (latest.hr, latest.dsp_count, latest.fs) == (72.0, 3, 29.5)
+        assert latest.roi_rects == [(10, 20, 5, 4)]
+        np.testing.assert_array_equal(latest.waveform, np.arange(24.0, 40.0)) # Hanya sampel terakhir
+        assert latest.quality.usable and latest.beats.beats == 12 and latest.vitals is None
+        assert reader.read_latest(after_seq=latest.seq) is None
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_grid_shape():
+    assert grid_shape(1) == (1, 1)
+    assert grid_shape(3) == (2, 2)
+    assert grid_shape(5) == (2, 3)
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.pipeline import DropOldestQueue, FramePool, QueueClosed
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "models", "blaze_face_short_range.tflite")
+
+
+def test_drop_oldest_queue_reports_dropped_items():
+    dropped = []
+    queue = DropOldestQueue(2, on_drop=dropped.append)
+    for i in range(5):
+        queue.put(i)
+    assert dropped == [0, 1, 2] and queue.dropped == 3
+    assert [queue.get(), queue.get()] == [3, 4]
+    assert queue.get(timeout=0.01) is None
+    queue.close()
+    with pytest.raises(QueueClosed):
+        queue.get()
+
+
+def test_frame_pool_explicit_ownership():
+    pool = FramePool(3)
+    assert pool.acquire() is None # Ukuran frame belum diketahui
+    pool.adopt(np.zeros((4, 4, 3), np.uint8))
+    a, b, c = pool.acquire(), pool.acquire(), pool.acquire()
+    assert len({id(a), id(b), id(c)}) == 3
+    assert pool.acquire() is None and pool.misses == 1
+    pool.retain(a) # Dua pemegang: slot baru bebas setelah keduanya release
+    pool.release(a)
+    assert pool.acquire() is None
+    pool.release(a)
+    assert pool.acquire() is a
+    # Frame asing dan release berlebih diabaikan
+    pool.release(np.zeros((4, 4, 3), np.uint8))
+    pool.release(None)
+    pool.release(b)
+    pool.release(b)
+    assert pool.available == 1
+    # Ukuran frame berubah: pool dialokasikan ulang, slot lama tidak dikenali lagi
+    pool.adopt(np.zeros((2, 2, 3), np.uint8))
+    assert pool.available == 3
+    pool.release(c)
+    assert pool.available == 3
+
+
+class _CountingCapture:
+    """Kamera palsu: setiap frame diisi nomor urutnya (mod 256)."""
+    def __init__(self):
+        self.index = 0
+        self.allocations = 0
+
+    def read(self, image=None):
+        time.sleep(1 / 120)
+        if image is None:
+            self.allocations += 1
+            image = np.empty((48, 64, 3), np.uint8)
+        image[...] = self.index % 256
+        self.index += 1
+        return True, image
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="Model deteksi wajah tidak tersedia")
+def test_pipeline_never_reuses_a_frame_the_consumer_holds():
+    pytest.importorskip("mediapipe")
+    from utils.signal_processing import HealthAnalyzer
+    from utils.pipeline import RppgPipeline
+
+    analyzer = HealthAnalyzer(face_model_path=MODEL_PATH, fps=30, running_mode="video")
+    cap = _CountingCapture()
+    pipeline = RppgPipeline(cap, analyzer, fps=30, inference_interval=3, mirror=False)
+    pipeline.start()
+    held, overwritten, results = [], 0, 0
+    try:
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline:
+            result = pipeline.take_latest_result()
+            if result is not None:
+                results += 1
+                held.append((result, int(result.frame_bgr[0, 0, 0])))
+            time.sleep(0.02) # GUI lambat yang menahan dua frame terakhir
+            while len(held) > 2:
+                old, value = held.pop(0)
+                overwritten += int(old.frame_bgr[0, 0, 0]) != value
+                pipeline.release_result(old)
+    finally:
+        pipeline.stop()
+        analyzer.face_detector.close()
+    assert results > 10 and overwritten == 0
+    # Hanya frame pertama yang dialokasikan sebelum pool tersedia
+    assert cap.allocations == 1 and pipeline.frame_pool.misses == 0
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils.quality import SignalQualityMonitor, band_power_ratio, roi_saturation
+from utils.subjects import MultiSubjectAnalyzer
+
+FS = 30.0
+
+
+def _pulse(seconds=6.0, bpm=72.0, noise=0.05, seed=0):
+    t = np.arange(int(seconds * FS)) / FS
+    return t, np.sin(2 * np.pi * bpm / 60.0 * t) + noise * np.random.default_rng(seed).normal(size=len(t))
+
+
+def _monitor_with_frames(t, bboxes=None, present=True):
+    monitor = SignalQualityMonitor(FS, 0.67, 4.0)
+    for i, ts in enumerate(t):
+        monitor.observe_frame(ts, present, None if bboxes is None else bboxes[i])
+    return monitor
+
+
+def test_band_power_ratio_separates_pulse_from_noise():
+    _, pulse = _pulse()
+    noise = np.random.default_rng(0).normal(size=len(pulse))
+    assert band_power_ratio(pulse, FS, 0.67, 4.0) > 20
+    assert band_power_ratio(noise, FS, 0.67, 4.0) < 2.0
+    assert band_power_ratio(pulse[:4], FS, 0.67, 4.0) == 0.0 # Jendela terlalu pendek
+
+
+def test_roi_saturation_counts_clipped_pixels():
+    frame = np.full((20, 20, 3), 120, dtype=np.uint8)
+    frame[:, :10] = 255
+    assert roi_saturation(frame, [(0, 0, 20, 20)], step=1) == 0.5
+    assert roi_saturation(frame, [(10, 0, 10, 20)], step=1) == 0.0
+    assert roi_saturation(frame, []) == 0.0
+
+
+def test_clean_pulse_is_usable():
+    t, pulse = _pulse()
+    quality = _monitor_with_frames(t, [(100, 100, 80, 80)] * len(t)).assess(pulse, FS)
+    assert quality.usable and quality.index > 0.8 and quality.reason == ""
+
+
+def test_missing_face_and_motion_are_rejected_with_reason():
+    t, pulse = _pulse()
+    quality = _monitor_with_frames(t, present=False).assess(pulse, FS)
+    assert not quality.usable and quality.presence == 0.0 and quality.reason == "wajah tidak terdeteksi"
+    # Box melompat ±20 px setiap frame (25% lebar box)
+    jitter = [(100 + 20 * (i % 2), 100, 80, 80) for i in range(len(t))]
+    quality = _monitor_with_frames(t, jitter).assess(pulse, FS)
+    assert not quality.usable and quality.reason == "terlalu banyak gerakan"
+
+
+def test_band_ratio_is_cached_between_sample_counts():
+    t, pulse = _pulse()
+    monitor = _monitor_with_frames(t, [(100, 100, 80, 80)] * len(t))
+    first = monitor.assess(pulse, FS, sample_count=100)
+    # Dalam band_interval_s sampel baru rasio pita tidak dihitung ulang
+    assert monitor.assess(np.zeros_like(pulse), FS, sample_count=105).band_ratio == first.band_ratio
+    assert monitor.assess(np.zeros_like(pulse), FS, sample_count=130).band_ratio == 0.0
+
+
+def _detections(boxes):
+    return SimpleNamespace(detections=[
+        SimpleNamespace(bounding_box=SimpleNamespace(origin_x=x, origin_y=y, width=w, height=h))
+        for x, y, w, h in boxes])
+
+
+def test_multi_subject_hr_is_gated_per_track():
+    analyzer = MultiSubjectAnalyzer(fps=int(FS), max_subjects=2)
+    pulsing, static = (20, 40, 100, 120), (180, 40, 100, 120)
+    rng = np.random.default_rng(2)
+    frame = np.empty((200, 320, 3), dtype=np.uint8)
+    for i in range(int(8 * FS)):
+        t = i / FS
+        frame[:] = 120
+        # Subjek pertama berdenyut 72 BPM di kanal hijau, subjek kedua hanya noise sensor
+        x, y, w, h = pulsing
+        frame[y:y + h, x:x + w, 1] = 130 + round(4 * np.sin(2 * np.pi * 1.2 * t))
+        frame[:, 160:] = rng.integers(110, 131, size=(200, 160, 3))
+        analyzer.process_frame(frame, _detections([pulsing, static]), t)
+    rates = analyzer.compute_hr()
+    first, second = analyzer.active_tracks
+    assert first.quality.usable and abs(rates[first.id] - 72.0) < 2.0
+    assert not second.quality.usable and second.hr == 0.0 and second.filtered == []
+    assert second.id not in rates
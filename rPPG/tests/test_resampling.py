@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.resampling import estimate_effective_fs, quantize_fs, resample_uniform
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "models", "blaze_face_short_range.tflite")
+
+
+def _jittered_timestamps(n, fs, jitter=0.3, seed=0):
+    # Interval frame acak ±30% di sekitar 1/fs, seperti QTimer yang tersendat
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.uniform(1 - jitter, 1 + jitter, size=n) / fs)
+
+
+def test_effective_fs_and_quantization():
+    assert estimate_effective_fs([]) == 0.0
+    assert estimate_effective_fs([1.0, 1.0]) == 0.0
+    assert estimate_effective_fs(np.arange(31) / 30.0) == pytest.approx(30.0)
+    assert estimate_effective_fs(_jittered_timestamps(3000, 24.0)) == pytest.approx(24.0, rel=0.01)
+    assert quantize_fs(29.8) == 30.0
+    assert quantize_fs(24.2) == 24.0
+    assert quantize_fs(0.1) == 0.5
+
+
+def test_linear_resampling_is_exact_for_linear_signals():
+    t = _jittered_timestamps(200, 30.0)
+    values = np.column_stack([2.0 * t + 1.0, -t])
+    grid, resampled = resample_uniform(t, values, 30.0)
+    # Grid seragam yang berakhir tepat di sampel terbaru
+    assert grid[-1] == t[-1] and grid[0] >= t[0]
+    np.testing.assert_allclose(np.diff(grid), 1 / 30.0)
+    np.testing.assert_allclose(resampled, np.column_stack([2.0 * grid + 1.0, -grid]), atol=1e-9)
+
+
+def test_cubic_resampling_tracks_smooth_signal():
+    pytest.importorskip("scipy")
+    t = _jittered_timestamps(300, 30.0)
+    grid, resampled = resample_uniform(t, np.sin(2 * np.pi * 1.2 * t), 30.0, method="cubic")
+    np.testing.assert_allclose(resampled, np.sin(2 * np.pi * 1.2 * grid), atol=1e-3)
+
+
+def test_duplicate_timestamps_are_dropped():
+    grid, resampled = resample_uniform([0.0, 0.1, 0.1, 0.2], [0.0, 1.0, 5.0, 2.0], 10.0)
+    np.testing.assert_allclose(grid, [0.0, 0.1, 0.2])
+    np.testing.assert_allclose(resampled, [0.0, 1.0, 2.0])
+    grid, resampled = resample_uniform([1.0], [3.0], 30.0)
+    assert list(grid) == [1.0] and list(resampled) == [3.0]
+    with pytest.raises(ValueError):
+        resample_uniform([0.0, 1.0], [0.0, 1.0], 10.0, method="nearest")
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="Model deteksi wajah tidak tersedia")
+@pytest.mark.parametrize("filter_mode", ["accurate", "streaming"])
+def test_hr_follows_capture_timestamps_not_configured_fps(filter_mode):
+    pytest.importorskip("mediapipe")
+    from utils.signal_processing import HealthAnalyzer
+
+    # Kamera sebenarnya hanya ~20 fps dengan jitter, sementara fps dikonfigurasi 30
+    hr_bpm = 72.0
+    timestamps = _jittered_timestamps(20 * 12, 20.0)
+    analyzer = HealthAnalyzer(face_model_path=MODEL_PATH, fps=30.0, filter_mode=filter_mode)
+    try:
+        for t in timestamps:
+            value = 0.33 + 0.002 * np.sin(2 * np.pi * hr_bpm / 60.0 * t)
+            analyzer.feed_sample(value, (0.33, value, 0.34), timestamp=t, face_bbox=(100, 100, 80, 80))
+        _, hr = analyzer.filter_and_calculate_hr()
+    finally:
+        analyzer.face_detector.close()
+    assert abs(hr - hr_bpm) <= 1.5
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from utils.roi import ROI_LAYOUTS, MultiRoiExtractor, integral_box_means, layout_rects
+
+SKIN_BGR = (120, 150, 200) # Cr/Cb di dalam rentang kulit
+BACKGROUND_BGR = (200, 60, 30) # Biru, di luar rentang kulit
+
+
+def test_layout_rects_clip_to_frame():
+    rects = layout_rects([(10, 5, 100, 100), (250, 150, 100, 100)], [ROI_LAYOUTS["forehead"]], 300, 200)
+    # Dahi box pertama terpotong di atas frame; box kedua terpotong di kanan dan bawah
+    np.testing.assert_array_equal(rects, [[35, 0, 85, 15], [275, 140, 300, 160]])
+
+
+def test_integral_box_means_match_direct_means():
+    frame = np.random.default_rng(0).integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+    rects = np.array([[10, 20, 60, 50], [55, 45, 150, 118], [0, 0, 1, 1], [30, 30, 30, 60]])
+    means = integral_box_means(frame, rects)
+    for (x0, y0, x1, y1), mean in zip(rects[:3], means[:3]):
+        np.testing.assert_allclose(mean, frame[y0:y1, x0:x1].reshape(-1, 3).mean(axis=0))
+    assert np.all(np.isnan(means[3])) # Rect kosong
+
+
+def test_skin_mask_ignores_non_skin_pixels():
+    frame = np.empty((100, 100, 3), dtype=np.uint8)
+    frame[:] = BACKGROUND_BGR
+    frame[:, :60] = SKIN_BGR
+    rects = np.array([[30, 0, 90, 100], [80, 0, 100, 100]])
+    plain = integral_box_means(frame, rects)
+    masked = integral_box_means(frame, rects, skin_mask=True)
+    # Tanpa masker warna latar ikut terata-rata; dengan masker hanya piksel kulit
+    np.testing.assert_allclose(plain[0], (np.array(SKIN_BGR) + np.array(BACKGROUND_BGR)) / 2)
+    np.testing.assert_allclose(masked[0], SKIN_BGR)
+    assert np.all(np.isnan(masked[1])) # ROI tanpa kulit tidak dipakai
+
+
+def test_extractor_weights_favor_pulsing_roi():
+    fs, bbox = 30, (40, 40, 100, 100)
+    extractor = MultiRoiExtractor(fs=fs, history=8 * fs)
+    rng = np.random.default_rng(1)
+    frame = np.empty((200, 200, 3), dtype=np.uint8)
+    rects = layout_rects([bbox], extractor._layouts, 200, 200)
+    for i in range(8 * fs):
+        frame[:] = 128
+        # Hanya pipi kiri yang membawa pulsa 72 BPM; dahi dan pipi kanan hanya noise
+        x0, y0, x1, y1 = rects[extractor.names.index("left_cheek")]
+        frame[y0:y1, x0:x1, 1] = 140 + round(6 * np.sin(2 * np.pi * 1.2 * i / fs))
+        for name in ("forehead", "right_cheek"):
+            x0, y0, x1, y1 = rects[extractor.names.index(name)]
+            frame[y0:y1, x0:x1, 1] = 140 + rng.integers(-6, 7)
+        assert extractor.sample(frame, bbox) is not None
+    assert np.argmax(extractor.weights) == extractor.names.index("left_cheek")
+    assert extractor.weights[extractor.names.index("left_cheek")] > 0.8
+    assert len(extractor.last_rects) == 3
+
+
+def test_extractor_running_dc_matches_buffer_mean():
+    extractor = MultiRoiExtractor(history=20, weight_update_interval=1000)
+    rng = np.random.default_rng(2)
+    for _ in range(57): # Lebih dari dua kali kapasitas ring
+        frame = rng.integers(60, 200, size=(100, 100, 3), dtype=np.uint8)
+        extractor.sample(frame, (20, 30, 60, 60))
+    np.testing.assert_allclose(extractor._dc_means(), np.nanmean(extractor.roi_buffer.values(), axis=0))
+
+
+def test_extractor_returns_none_without_valid_roi():
+    extractor = MultiRoiExtractor()
+    assert extractor.sample(np.zeros((50, 50, 3), dtype=np.uint8), (200, 200, 40, 40)) is None
+    assert extractor.last_rects == []
+    with pytest.raises(ValueError):
+        MultiRoiExtractor(regions=("chin",))
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from utils.signal_processing import RunningStats, StreamingBandpass
+
+
+def test_running_stats_has_no_warmup_transient():
+    stats = RunningStats(300)
+    samples = 5.0 + 3.0 * np.random.default_rng(0).normal(size=1500)
+    z = np.array([stats.standardize(x) for x in samples])
+    assert z[0] == 0.0
+    # Sampel awal sudah terstandardisasi (sebelumnya std ~7 pada 30 sampel pertama)
+    for lo, hi in ((1, 30), (30, 90), (90, 300), (300, 1500)):
+        assert 0.7 < np.std(z[lo:hi]) < 1.4, (lo, hi)
+
+
+def test_running_stats_matches_welford_during_warmup():
+    stats = RunningStats(100)
+    samples = np.random.default_rng(1).normal(size=60)
+    for x in samples:
+        stats.standardize(x)
+    assert stats.mean == pytest.approx(np.mean(samples))
+    assert stats.var == pytest.approx(np.var(samples))
+    stats.reset()
+    assert stats.standardize(4.0) == 0.0 and stats.mean == 4.0
+
+
+def test_streaming_bandpass_chunks_match_single_pass():
+    samples = np.random.default_rng(2).normal(size=400)
+    whole = StreamingBandpass(0.67, 4.0, 30.0).process(samples)
+    chunked_filter = StreamingBandpass(0.67, 4.0, 30.0)
+    chunks = [chunked_filter.process(chunk) for chunk in np.split(samples, [1, 15, 16, 200])]
+    np.testing.assert_allclose(np.concatenate(chunks), whole, rtol=1e-10, atol=1e-12)
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils.subjects import MultiSubjectAnalyzer, associate, boxes_from_detection, iou_matrix
+
+FS = 30
+
+
+def _detections(boxes):
+    return SimpleNamespace(detections=[
+        SimpleNamespace(bounding_box=SimpleNamespace(origin_x=x, origin_y=y, width=w, height=h))
+        for x, y, w, h in boxes])
+
+
+def _frame(t, faces):
+    """Frame latar abu-abu dengan wajah (box, bpm) yang kanal hijaunya berdenyut pada bpm masing-masing."""
+    frame = np.full((240, 400, 3), 120, dtype=np.uint8)
+    for (x, y, w, h), bpm in faces:
+        frame[y:y + h, x:x + w, 1] = 130 + round(4 * np.sin(2 * np.pi * bpm / 60.0 * t))
+    return frame
+
+
+def test_iou_and_detection_boxes():
+    iou = iou_matrix([(0, 0, 10, 10)], [(0, 0, 10, 10), (5, 0, 10, 10), (20, 20, 5, 5), (0, 0, 0, 0)])
+    np.testing.assert_allclose(iou, [[1.0, 50 / 150, 0.0, 0.0]])
+    assert boxes_from_detection(None).shape == (0, 4)
+    assert boxes_from_detection(_detections([])).shape == (0, 4)
+    np.testing.assert_array_equal(boxes_from_detection(_detections([(1, 2, 3, 4)])), [[1, 2, 3, 4]])
+
+
+def test_associate_is_greedy_by_highest_iou():
+    tracks = [(0, 0, 10, 10), (100, 0, 10, 10)]
+    detections = [(101, 0, 10, 10), (50, 50, 10, 10), (1, 0, 10, 10)]
+    pairs, unmatched = associate(tracks, detections)
+    assert sorted(pairs) == [(0, 2), (1, 0)] and unmatched == [1]
+    assert associate([], detections) == ([], [0, 1, 2])
+    # Dua deteksi berebut satu track: hanya yang IoU-nya tertinggi dipasangkan
+    pairs, unmatched = associate([(0, 0, 10, 10)], [(3, 0, 10, 10), (1, 0, 10, 10)])
+    assert pairs == [(0, 1)] and unmatched == [0]
+
+
+def test_tracks_keep_ids_expire_and_respect_capacity():
+    analyzer = MultiSubjectAnalyzer(fps=FS, max_subjects=2, expiry_seconds=1.0)
+    a, b, c = (20, 40, 80, 100), (150, 40, 80, 100), (280, 40, 80, 100)
+    analyzer.process_frame(_frame(0.0, []), _detections([a, b, c]), 0.0)
+    assert [t.id for t in analyzer.active_tracks] == [1, 2] # Subjek ketiga melebihi kapasitas
+    # Box bergeser sedikit: tetap track yang sama
+    moved = (a[0] + 4, a[1] + 2, a[2], a[3])
+    analyzer.process_frame(_frame(0.5, []), _detections([moved]), 0.5)
+    assert analyzer.tracks[0].bbox == moved and analyzer.tracks[0].hits == 2
+    # Track kedua tidak terdeteksi lagi dan kedaluwarsa; slotnya dipakai subjek baru dengan ID baru
+    analyzer.process_frame(_frame(1.2, []), _detections([moved]), 1.2)
+    assert [t.id for t in analyzer.active_tracks] == [1]
+    analyzer.process_frame(_frame(1.3, []), _detections([moved, c]), 1.3)
+    assert [(t.id, t.slot) for t in analyzer.active_tracks] == [(1, 0), (3, 1)]
+    assert analyzer.primary_track().id in (1, 3)
+    with pytest.raises(ValueError):
+        MultiSubjectAnalyzer(max_subjects=0)
+
+
+def test_batch_hr_per_subject_with_late_arrival():
+    analyzer = MultiSubjectAnalyzer(fps=FS, max_subjects=3)
+    first, second = ((20, 40, 120, 150), 66.0), ((220, 60, 100, 120), 96.0)
+    for i in range(10 * FS):
+        t = i / FS
+        # Subjek kedua baru muncul setelah 3 detik: riwayatnya lebih pendek di buffer bersama
+        faces = [first, second] if t >= 3.0 else [first]
+        analyzer.process_frame(_frame(t, faces), _detections([box for box, _ in faces]), t)
+    rates = analyzer.compute_hr()
+    tracks = analyzer.active_tracks
+    assert abs(rates[tracks[0].id] - 66.0) < 1.5
+    assert abs(rates[tracks[1].id] - 96.0) < 1.5
+    assert analyzer.primary_track() is tracks[0] # Wajah terbesar
+    assert len(tracks[1].filtered) < len(tracks[0].filtered)
+    freqs, mags = tracks[1].spectrum
+    assert len(freqs) == len(mags) and freqs[np.argmax(mags)] * 60 == pytest.approx(96.0, abs=3.0)
@@ -0,0 +1,164 @@
+import base64
+import json
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.telemetry import TelemetryPublisher, TelemetryServer, _encode, _ws_frame
+
+
+@pytest.fixture
+def server():
+    server = TelemetryServer("127.0.0.1", tcp_port=0, ws_port=0, client_queue=4)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Kondisi tidak tercapai"
+        time.sleep(0.01)
+
+
+def _read_line(sock):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(1)
+        assert chunk, "Koneksi ditutup server"
+        data += chunk
+    return json.loads(data)
+
+
+def _read_ws_message(sock):
+    header = sock.recv(2, socket.MSG_WAITALL)
+    n = header[1] & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", sock.recv(2, socket.MSG_WAITALL))[0]
+    return header[0] & 0x0F, sock.recv(n, socket.MSG_WAITALL)
+
+
+def _ws_connect(port):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=2.0)
+    key = base64.b64encode(b"0123456789abcdef").decode()
+    sock.sendall(f"GET / HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+    response = b""
+    while not response.endswith(b"\r\n\r\n"):
+        response += sock.recv(1)
+    assert response.startswith(b"HTTP/1.1 101")
+    return sock
+
+
+def test_encode_replaces_numpy_and_non_finite_values():
+    message = json.loads(_encode({"a": np.float32(1.5), "b": float("nan"), "c": np.arange(2)}))
+    assert message == {"a": 1.5, "b": None, "c": [0, 1]}
+
+
+def test_ws_frame_lengths():
+    assert _ws_frame(b"x")[:2] == b"\x81\x01"
+    assert _ws_frame(b"x" * 300)[:4] == b"\x81\x7e\x01\x2c"
+    assert _ws_frame(b"x" * 70000)[1] == 127
+
+
+def test_tcp_and_websocket_subscribers_receive_messages(server):
+    tcp = socket.create_connection(("127.0.0.1", server.tcp_port), timeout=2.0)
+    ws = _ws_connect(server.ws_port)
+    try:
+        assert _read_line(tcp)["type"] == "hello"
+        opcode, payload = _read_ws_message(ws)
+        assert opcode == 0x1 and json.loads(payload)["version"] == 1
+        _wait_for(lambda: server.clients == 2)
+        assert server.publish({"type": "hr", "hr": 70.0})
+        assert _read_line(tcp) == {"type": "hr", "hr": 70.0}
+        assert json.loads(_read_ws_message(ws)[1]) == {"type": "hr", "hr": 70.0}
+        # Ping dari klien (bermasker) dijawab pong dengan payload yang sama
+        mask = b"\x01\x02\x03\x04"
+        ws.sendall(b"\x89\x82" + mask + bytes(b ^ mask[i] for i, b in enumerate(b"hi")))
+        assert _read_ws_message(ws) == (0xA, b"hi")
+    finally:
+        tcp.close()
+        ws.close()
+    _wait_for(lambda: server.clients == 0)
+
+
+def test_bad_websocket_handshake_is_rejected(server):
+    sock = socket.create_connection(("127.0.0.1", server.ws_port), timeout=2.0)
+    try:
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+        assert sock.recv(64).startswith(b"HTTP/1.1 400")
+    finally:
+        sock.close()
+
+
+def test_slow_client_drops_oldest_and_dropped_is_safe_across_threads(server):
+    slow = socket.create_connection(("127.0.0.1", server.tcp_port), timeout=2.0)
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    errors, done = [], threading.Event()
+
+    def churn():
+        # Klien datang dan pergi selama `dropped` dibaca dari thread lain
+        while not done.is_set():
+            try:
+                socket.create_connection(("127.0.0.1", server.tcp_port), timeout=2.0).close()
+            except OSError as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        _wait_for(lambda: server.clients >= 1)
+        payload = {"type": "waveform", "samples": "x" * 200000}
+        for _ in range(40):
+            server.publish(payload)
+            server.dropped # Tidak boleh RuntimeError saat himpunan klien berubah
+        _wait_for(lambda: server.dropped > 0)
+    finally:
+        done.set()
+        thread.join()
+        slow.close()
+    assert not errors
+
+
+def test_stop_returns_promptly_with_connected_clients():
+    server = TelemetryServer("127.0.0.1", tcp_port=0, ws_port=0)
+    server.start()
+    tcp = socket.create_connection(("127.0.0.1", server.tcp_port), timeout=2.0)
+    ws = _ws_connect(server.ws_port)
+    pending = socket.create_connection(("127.0.0.1", server.ws_port), timeout=2.0) # Handshake belum dikirim
+    try:
+        _wait_for(lambda: server.clients == 2)
+        start = time.monotonic()
+        server.stop()
+        assert time.monotonic() - start < 1.0 and not server.running
+        assert pending.recv(16) == b"" # Koneksi ditutup server
+    finally:
+        for sock in (tcp, ws, pending):
+            sock.close()
+
+
+class _FakeServer:
+    clients = 1
+
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message):
+        self.messages.append(message)
+
+
+def test_publisher_sends_only_new_waveform_samples():
+    server = _FakeServer()
+    publisher = TelemetryPublisher(server)
+    window = np.arange(100.0)
+    publisher.publish_result(10.0, 72.0, 0.9, window, fs=30.0)
+    publisher.publish_result(10.5, 0.0, 0.0, window, fs=30.0)
+    hr, first, no_hr, second = server.messages
+    assert hr["hr"] == 72.0 and no_hr["hr"] is None
+    assert len(first["samples"]) == 100 and first["fs"] == 30.0
+    assert len(second["samples"]) == 15 # 0,5 detik pada 30 Hz
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from utils.tracking import AdaptiveInferenceController, FaceTrackingController, bbox_iou
+
+
+def test_interval_grows_while_tracking_is_stable_and_resets_on_loss():
+    controller = AdaptiveInferenceController(min_interval=1, max_interval=4)
+    assert controller.should_detect() # Deteksi pertama selalu dipaksa
+    for _ in range(10):
+        controller.on_track(confidence=0.9, motion=0.0)
+    assert controller.interval == 4
+    controller.on_track(confidence=0.1, motion=0.0)
+    assert controller.interval == 1 and controller.should_detect()
+
+
+def test_confirmed_detection_grows_interval_and_drift_tightens_it():
+    controller = AdaptiveInferenceController(min_interval=2, max_interval=6)
+    controller.on_detection(True, agreement=0.9)
+    controller.on_detection(True, agreement=0.9)
+    assert controller.interval == 4
+    controller.on_detection(True, agreement=0.1)
+    assert controller.interval == 2
+
+
+def test_bbox_iou():
+    assert bbox_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert bbox_iou((0, 0, 10, 10), (20, 20, 5, 5)) == 0.0
+
+
+class _ExclusiveTracker:
+    """Pelacak palsu yang mencatat bila dua thread memakainya bersamaan."""
+    def __init__(self):
+        self._bbox = (10, 10, 50, 50)
+        self.busy = False
+        self.overlaps = 0
+        self.confidence = 1.0
+        self.motion = 0.0
+
+    def _enter(self):
+        if self.busy:
+            self.overlaps += 1
+        self.busy = True
+        time.sleep(0.0005)
+        self.busy = False
+
+    @property
+    def bbox(self):
+        self._enter()
+        return self._bbox
+
+    def reset(self):
+        self._enter()
+
+    def init(self, frame, bbox):
+        self._enter()
+
+    def update(self, frame):
+        self._enter()
+        return self._bbox
+
+
+def test_tracking_controller_serialises_access_across_threads():
+    tracker = _ExclusiveTracker()
+    tracking = FaceTrackingController(tracker=tracker)
+    stop = time.monotonic() + 0.3
+
+    def detector_thread():
+        while time.monotonic() < stop:
+            tracking.should_detect()
+            tracking.current_bbox()
+            tracking.set_min_interval(2)
+
+    thread = threading.Thread(target=detector_thread)
+    thread.start()
+    while time.monotonic() < stop:
+        assert tracking.update(None, None) == (10, 10, 50, 50)
+    thread.join()
+    assert tracker.overlaps == 0
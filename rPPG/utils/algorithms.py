@@ -0,0 +1,161 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .startup import lazy_import
+
+signal = lazy_import("scipy.signal")
+
+# Proyeksi POS (Wang et al., 2017) pada RGB yang dinormalisasi temporal
+_POS_PROJECTION = np.array([[0.0, 1.0, -1.0],
+                            [-2.0, 1.0, 1.0]])
+# Kombinasi krominans CHROM (de Haan & Jeanne, 2013): X = 3R - 2G, Y = 1.5R + G - 1.5B
+_CHROM_PROJECTION = np.array([[3.0, -2.0, 0.0],
+                              [1.5, 1.0, -1.5]])
+
+
+@lru_cache(maxsize=16)
+def _chrom_filter(fs, lowcut, highcut):
+    # Koefisien bandpass CHROM per fs (fs berubah saat laju kamera efektif berubah)
+    nyq = 0.5 * fs
+    return signal.butter(3, [lowcut / nyq, min(highcut, 0.9 * nyq) / nyq], btype='band')
+
+
+def _window_indices(n, length, hop):
+    """Indeks (k, length) jendela geser yang menutupi seluruh n sampel (jendela terakhir rata kanan)."""
+    starts = np.arange(0, n - length + 1, hop)
+    if starts[-1] != n - length:
+        starts = np.append(starts, n - length)
+    return starts[:, None] + np.arange(length)
+
+
+def _overlap_add(pieces, indices, n):
+    # Overlap-add berbobot Hann, dinormalisasi oleh jumlah bobot di setiap sampel
+    weights = np.broadcast_to(np.hanning(indices.shape[1] + 2)[1:-1], pieces.shape)
+    out = np.bincount(indices.ravel(), weights=(pieces * weights).ravel(), minlength=n)
+    norm = np.bincount(indices.ravel(), weights=weights.ravel(), minlength=n)
+    return out / np.maximum(norm, 1e-12)
+
+
+def fast_ica(x, max_iter=200, tol=1e-4, seed=0):
+    """
+    FastICA simetris (nonlinearitas logcosh) untuk data (n, c). Kembalikan
+    komponen independen (n, c). Cukup untuk c = 3 kanal warna.
+    """
+    x = x - x.mean(axis=0)
+    cov = x.T @ x / len(x)
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    eigvals = np.maximum(eigvals, 1e-12)
+    whitening = eigvecs / np.sqrt(eigvals)
+    z = x @ whitening # Data putih (n, c)
+
+    c = z.shape[1]
+    w = np.random.default_rng(seed).standard_normal((c, c))
+    for _ in range(max_iter):
+        # Dekorelasi simetris: W <- (W W^T)^(-1/2) W
+        s, u = np.linalg.eigh(w @ w.T)
+        w = (u / np.sqrt(np.maximum(s, 1e-12))) @ u.T @ w
+        wz = z @ w.T
+        g = np.tanh(wz)
+        g_prime = 1.0 - g ** 2
+        w_new = (g.T @ z) / len(z) - g_prime.mean(axis=0)[:, None] * w
+        s, u = np.linalg.eigh(w_new @ w_new.T)
+        w_new = (u / np.sqrt(np.maximum(s, 1e-12))) @ u.T @ w_new
+        converged = np.max(np.abs(np.abs(np.einsum("ij,ij->i", w_new, w)) - 1.0)) < tol
+        w = w_new
+        if converged:
+            break
+    return z @ w.T
+
+
+class RppgAlgorithmEngine:
+    """
+    Mengubah trace RGB (n, 3) menjadi sinyal pulsa dengan satu atau beberapa
+    algoritma sekaligus: "green" (kromatisitas hijau), "chrom", "pos", dan "ica".
+    Semua algoritma berupa operasi NumPy atas jendela; normalisasi temporal per
+    jendela dihitung sekali dan dipakai bersama oleh CHROM dan POS.
+    """
+    ALGORITHMS = ("green", "chrom", "pos", "ica")
+
+    def __init__(self, algorithms=("green",), fs=30, lowcut=0.67, highcut=4.0, window_seconds=1.6):
+        # `fs` adalah laju default; run() bisa menerima laju lain (mis. hasil resampling)
+        for name in algorithms:
+            if name not in self.ALGORITHMS:
+                raise ValueError(f"Algoritma rPPG tidak dikenal: {name}")
+        self.algorithms = tuple(algorithms)
+        self.fs = fs
+        self.lowcut = lowcut
+        self.highcut = highcut
+        # Panjang jendela CHROM/POS: ~1.6 s, mencakup minimal satu siklus detak pada HR terendah (0.67 Hz)
+        self.window_seconds = window_seconds
+
+    def _normalized_windows(self, rgb, cache):
+        # Jendela geser (k, L, 3) dibagi rata-rata per jendela; dihitung sekali per run()
+        if "windows" not in cache:
+            n = len(rgb)
+            length = min(max(8, int(round(self.window_seconds * cache["fs"]))), n)
+            indices = _window_indices(n, length, max(1, length // 2))
+            windows = rgb[indices]
+            means = windows.mean(axis=1, keepdims=True)
+            cache["windows"] = (windows / np.where(means > 0, means, 1.0), indices)
+        return cache["windows"]
+
+    def _green(self, rgb, cache):
+        total = rgb.sum(axis=1)
+        return np.where(total > 0, rgb[:, 1] / np.where(total > 0, total, 1.0), 0.0)
+
+    def _pos(self, rgb, cache):
+        normalized, indices = self._normalized_windows(rgb, cache)
+        s = normalized @ _POS_PROJECTION.T # (k, L, 2)
+        std = s.std(axis=1)
+        alpha = std[:, 0] / np.where(std[:, 1] > 1e-12, std[:, 1], 1.0)
+        h = s[..., 0] + alpha[:, None] * s[..., 1]
+        h -= h.mean(axis=1, keepdims=True)
+        return _overlap_add(h, indices, len(rgb))
+
+    def _chrom(self, rgb, cache):
+        normalized, indices = self._normalized_windows(rgb, cache)
+        xy = normalized @ _CHROM_PROJECTION.T # (k, L, 2)
+        length = xy.shape[1]
+        b, a = _chrom_filter(float(cache["fs"]), self.lowcut, self.highcut)
+        padlen = min(3 * max(len(a), len(b)), length - 1)
+        if padlen > 0:
+            # Filter semua jendela dan kedua sinyal krominans sekaligus
+            xy = signal.filtfilt(b, a, xy, axis=1, padlen=padlen)
+        std = xy.std(axis=1)
+        alpha = std[:, 0] / np.where(std[:, 1] > 1e-12, std[:, 1], 1.0)
+        s = xy[..., 0] - alpha[:, None] * xy[..., 1]
+        s -= s.mean(axis=1, keepdims=True)
+        return _overlap_add(s, indices, len(rgb))
+
+    def _ica(self, rgb, cache):
+        # Poh et al. (2010): ICA pada kanal RGB terstandardisasi, pilih komponen dengan
+        # rasio daya pita HR tertinggi
+        std = rgb.std(axis=0)
+        x = (rgb - rgb.mean(axis=0)) / np.where(std > 1e-12, std, 1.0)
+        components = fast_ica(x)
+        spectrum = np.abs(np.fft.rfft(components - components.mean(axis=0), axis=0)) ** 2
+        freqs = np.fft.rfftfreq(len(x), 1.0 / cache["fs"])
+        band = (freqs >= self.lowcut) & (freqs <= self.highcut)
+        if not band.any():
+            return components[:, 0]
+        ratio = spectrum[band].max(axis=0) / np.maximum(spectrum[1:].sum(axis=0), 1e-12)
+        return components[:, int(np.argmax(ratio))]
+
+    def run(self, rgb, algorithms=None, fs=None):
+        """
+        Jalankan algoritma (default: semua yang dikonfigurasi) pada trace RGB (n, 3)
+        bersampel seragam pada laju `fs` (default: self.fs). Kembalikan dict nama -> sinyal pulsa (n,).
+        """
+        rgb = np.asarray(rgb, dtype=np.float64)
+        for name in algorithms or ():
+            if name not in self.ALGORITHMS:
+                raise ValueError(f"Algoritma rPPG tidak dikenal: {name}")
+        cache = {"fs": self.fs if fs is None else fs}
+        results = {}
+        for name in algorithms or self.algorithms:
+            if len(rgb) < 3:
+                results[name] = np.zeros(len(rgb))
+                continue
+            results[name] = getattr(self, "_" + name)(rgb, cache)
+        return results
@@ -0,0 +1,281 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+from .spectral import parabolic_peak_offset
+from .startup import lazy_import
+
+signal = lazy_import("scipy.signal")
+
+# Statistik detak dari riwayat IBI: HR sesaat (IBI terakhir), RMSSD dan SDNN dalam ms,
+# serta jumlah IBI di riwayat; hr_bpm 0 bila detak terakhir sudah terlalu lama
+BeatStats = namedtuple("BeatStats", ["hr_bpm", "rmssd_ms", "sdnn_ms", "beats"])
+
+
+def filter_settle_time(b, a, fs, tolerance=0.05, max_s=20.0):
+    """
+    Waktu (detik) sampai sisa energi respons impuls filter (b, a) di bawah
+    tolerance^2 dari totalnya, yaitu amplitudo transien sekitar `tolerance`:
+    perkiraan panjang tepi jendela filtfilt yang masih berubah.
+    """
+    impulse = np.zeros(max(2, int(max_s * fs)))
+    impulse[0] = 1.0
+    h = signal.lfilter(b, a, impulse)
+    tail = np.cumsum((h * h)[::-1])[::-1]
+    return int(np.argmax(tail < tolerance * tolerance * tail[0])) / fs
+
+
+def _filtfilt(sos, zi, x, padlen):
+    # Setara signal.sosfiltfilt (ekstensi ganjil), dengan kondisi awal zi yang sudah di-cache
+    ext = np.concatenate((2 * x[0] - x[padlen:0:-1], x, 2 * x[-1] - x[-2:-padlen - 2:-1]))
+    y, _ = signal.sosfilt(sos, ext, zi=zi * ext[0])
+    y, _ = signal.sosfilt(sos, y[::-1], zi=zi * y[-1])
+    return y[::-1][padlen:-padlen]
+
+
+class IbiHistory:
+    """
+    Riwayat N inter-beat interval (IBI, detik) terakhir beserta jumlah berjalan
+    untuk SDNN dan RMSSD: setiap detak hanya menambah suku yang masuk dan
+    mengurangi suku yang keluar jendela, O(1) per detak. Selisih berurutan
+    (RMSSD) hanya dihitung antara IBI yang benar-benar bersambung; IBI pertama
+    setelah celah (wajah hilang, detak terlewat) memulai rantai baru.
+    """
+    def __init__(self, capacity=64, resync_interval=None):
+        if capacity < 2:
+            raise ValueError(f"Kapasitas riwayat IBI minimal 2, didapat {capacity}")
+        self.ibis = RingBuffer(capacity) # Timestamp = waktu detak penutup IBI
+        self._linked = RingBuffer(capacity) # 1.0 bila IBI bersambung dengan IBI sebelumnya
+        # Resinkronisasi periodik membatasi akumulasi error pembulatan jumlah berjalan
+        self.resync_interval = resync_interval or 10 * capacity
+        self.reset()
+
+    def reset(self):
+        self.ibis.clear()
+        self._linked.clear()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._diff_sq = 0.0 # Jumlah kuadrat selisih IBI berurutan yang bersambung
+        self._diff_count = 0
+        self._since_resync = 0
+
+    def __len__(self):
+        return len(self.ibis)
+
+    def add(self, ibi, timestamp, linked=True):
+        """Tambahkan IBI; linked=False bila IBI sebelumnya tidak bersebelahan (ada celah di antaranya)."""
+        ibis = self.ibis
+        if ibis.is_full:
+            oldest, second = ibis.values()[:2]
+            self._sum -= oldest
+            self._sum_sq -= oldest * oldest
+            if self._linked.values()[1]: # Selisih yang ikut keluar jendela
+                self._diff_sq -= (second - oldest) ** 2
+                self._diff_count -= 1
+        linked = bool(linked and len(ibis))
+        if linked:
+            self._diff_sq += (ibi - ibis.latest()) ** 2
+            self._diff_count += 1
+        ibis.append(ibi, timestamp)
+        self._linked.append(float(linked), timestamp)
+        self._sum += ibi
+        self._sum_sq += ibi * ibi
+        self._since_resync += 1
+        if self._since_resync >= self.resync_interval:
+            self._resync()
+
+    def _resync(self):
+        values = self.ibis.values()
+        self._sum = float(np.sum(values))
+        self._sum_sq = float(np.dot(values, values))
+        linked = self._linked.values()[1:] > 0
+        self._diff_sq = float(np.sum(np.diff(values)[linked] ** 2))
+        self._diff_count = int(np.count_nonzero(linked))
+        self._since_resync = 0
+
+    def mean(self):
+        n = len(self.ibis)
+        return self._sum / n if n else 0.0
+
+    def rmssd(self):
+        if self._diff_count < 1:
+            return 0.0
+        return float(np.sqrt(max(0.0, self._diff_sq) / self._diff_count))
+
+    def sdnn(self):
+        n = len(self.ibis)
+        if n < 2:
+            return 0.0
+        return float(np.sqrt(max(0.0, self._sum_sq - self._sum * self._sum / n) / (n - 1)))
+
+
+class BeatDetector:
+    """
+    Detektor puncak pulsa inkremental untuk sinyal terfilter bertimestamp.
+    update() menerima jendela terbaru (mis. keluaran filter_and_calculate_hr)
+    tetapi hanya memeriksa sampel yang lebih baru dari pemanggilan sebelumnya.
+    Puncak dicari pada band-pass sempit (filtfilt) di sekitar HR FFT, bukan
+    pada pita HR lebar, sehingga noise dan harmonik tidak menggeser timing
+    detak; `settle_s` terakhir jendela masukan (tepi filtfilt yang masih
+    berubah) dan transien band-pass sempit ditahan sebelum diperiksa. Kandidat
+    yang jauh dari detak_terakhir + IBI acuan dibuang; puncak diperhalus
+    dengan interpolasi parabola sub-sampel lalu IBI-nya masuk ke IbiHistory.
+    """
+    def __init__(self, lowcut=0.67, highcut=4.0, settle_s=0.0, history=64, threshold=0.5,
+                 max_ibi_change=0.35, band_fraction=0.35, min_band_hz=0.4, band_order=2, settle_tolerance=0.05,
+                 update_interval_s=0.25, power_smoothing=0.05):
+        self.lowcut = lowcut
+        self.highcut = highcut
+        self.min_ibi = 1.0 / highcut
+        self.max_ibi = 1.0 / lowcut
+        self.settle_s = settle_s
+        self.threshold = threshold # Puncak minimal, relatif amplitudo sinus dari daya berjalan sinyal
+        self.max_ibi_change = max_ibi_change # Simpangan maksimum dari detak yang diharapkan, relatif IBI acuan
+        self.band_fraction = band_fraction # Lebar setengah band-pass sempit, relatif frekuensi HR
+        self.min_band_hz = min_band_hz
+        self.band_order = band_order
+        self.settle_tolerance = settle_tolerance
+        self.update_interval_s = update_interval_s # Sampel baru minimal sebelum band sempit difilter ulang
+        self.power_smoothing = power_smoothing
+        self.history = IbiHistory(history)
+        self._narrow_key = None
+        self._narrow = None # (sos, zi, transien detik) band-pass sempit terakhir
+        self.reset()
+
+    def reset(self):
+        self.history.reset()
+        self._power = None # Rata-rata berjalan y^2 dari sampel yang sudah diperiksa
+        self._examined_t = None # Sampel terakhir yang pernah diperiksa, juga melintasi interrupt()
+        self.beat_count = 0
+        self.interrupt()
+
+    def interrupt(self):
+        """Putus kontinuitas (jendela tidak layak, wajah hilang): IBI tidak diukur melintasi celah."""
+        self._consumed_t = None # Timestamp sampel terakhir yang sudah diperiksa
+        self._pending = None # Kandidat terdekat ke detak yang diharapkan, menunggu jendelanya lewat
+        self._last_beat_t = None
+        self._linked = False # IBI berikutnya bersambung dengan IBI terakhir di riwayat
+        self._horizon_t = None
+
+    def _narrow_filter(self, rate_hz, fs):
+        # Desain di-cache per (fs, HR dibulatkan 1 BPM): desain ulang hanya saat HR bergeser
+        key = (round(fs, 1), round(rate_hz * 60.0))
+        if key != self._narrow_key:
+            # Lebar minimum membatasi transien pada HR rendah; masukan sudah dibatasi pita HR lebar
+            half_width = max(self.band_fraction * rate_hz, self.min_band_hz)
+            low = max(0.1, rate_hz - half_width)
+            high = min(rate_hz + half_width, 0.95 * 0.5 * fs)
+            sos = signal.butter(self.band_order, [low, high], btype="band", fs=fs, output="sos")
+            b, a = signal.sos2tf(sos)
+            self._narrow = (sos, signal.sosfilt_zi(sos), filter_settle_time(b, a, fs, self.settle_tolerance))
+            self._narrow_key = key
+        return self._narrow
+
+    def update(self, values, times, expected_ibi=None):
+        """
+        Periksa sampel baru pada jendela (values, times). `expected_ibi` (detik, mis.
+        dari HR FFT) menentukan band-pass sempit dan jendela validasi detak. Kembalikan
+        daftar (waktu_detak, ibi) untuk IBI yang diterima pada pemanggilan ini.
+        """
+        reference = expected_ibi or self.history.mean() or None
+        n = len(values)
+        if n < 3 or not reference or times[-1] <= times[0]:
+            return []
+        fs = (n - 1) / (times[-1] - times[0])
+        sos, zi, narrow_settle = self._narrow_filter(1.0 / reference, fs)
+        settled_start = times[0] + self.settle_s # Tepi kiri/kanan masukan masih membawa transien filtfilt
+        settled_end = times[-1] - self.settle_s
+        if self._consumed_t is not None and settled_end - narrow_settle - self._consumed_t < self.update_interval_s:
+            return [] # Mode streaming memanggil per frame: band sempit difilter per update_interval_s
+        if self._consumed_t is not None and self._consumed_t < settled_start:
+            self.interrupt() # Sampel di antaranya sudah tergeser keluar jendela tanpa diperiksa
+        if self._consumed_t is None:
+            # Transien tepi kiri filter masukan dan band sempit meluruh bersamaan
+            first_t, segment_t = times[0] + max(self.settle_s, narrow_settle), times[0]
+            side = "left"
+            if self._examined_t is not None and self._examined_t >= first_t:
+                first_t, side = self._examined_t, "right" # Setelah celah: detak lama tidak dihitung dua kali
+        else:
+            # Lanjutan: sampel yang sudah diperiksa menjadi padding kiri band-pass sempit
+            first_t, segment_t = self._consumed_t, max(settled_start, self._consumed_t - narrow_settle)
+            side = "right"
+        lo = int(np.searchsorted(times, segment_t, side="left"))
+        hi = int(np.searchsorted(times, settled_end, side="right"))
+        padlen = 3 * (2 * len(sos) + 1)
+        if hi - lo <= padlen: # Terlalu pendek untuk filtfilt
+            return []
+        seg_times = times[lo:hi]
+        narrow = _filtfilt(sos, zi, np.asarray(values[lo:hi], dtype=np.float64), padlen)
+        start = int(np.searchsorted(seg_times, first_t, side=side))
+        # Sampel ke-i diperiksa bila tetangga kanannya juga sudah bebas transien band sempit
+        stop = int(np.searchsorted(seg_times, settled_end - narrow_settle, side="right")) - 1
+        start = max(1, start)
+        if stop <= start:
+            return []
+        segment = narrow[start:stop]
+        power = float(np.mean(segment * segment))
+        self._power = power if self._power is None else \
+            self._power + (1.0 - (1.0 - self.power_smoothing) ** len(segment)) * (power - self._power)
+        self._consumed_t = self._examined_t = self._horizon_t = seg_times[stop - 1]
+
+        left, right = narrow[start - 1:stop - 1], narrow[start + 1:stop + 1]
+        candidates = start + np.flatnonzero((segment > left) & (segment >= right) & (segment > 0))
+        min_amplitude = self.threshold * np.sqrt(2.0 * self._power)
+        tolerance = self.max_ibi_change * reference
+
+        accepted = []
+        for i in candidates:
+            if narrow[i] < min_amplitude:
+                continue
+            offset = parabolic_peak_offset(narrow[i - 1], narrow[i], narrow[i + 1])
+            dt = (seg_times[i + 1] - seg_times[i - 1]) / 2.0
+            self._offer(seg_times[i] + offset * dt, reference, tolerance, accepted)
+        # Tidak ada kandidat lagi yang bisa masuk jendela detak yang diharapkan
+        if self._pending is not None and self._horizon_t > self._last_beat_t + reference + tolerance:
+            self._confirm(self._pending, accepted)
+            self._pending = None
+        return accepted
+
+    def _offer(self, t, reference, tolerance, accepted):
+        if self._last_beat_t is None:
+            self._start_chain(t)
+            return
+        expected = self._last_beat_t + reference
+        if t < expected - tolerance: # Terlalu dekat detak sebelumnya: noise/takik dikrotik
+            return
+        if t <= expected + tolerance:
+            # Di dalam jendela detak yang diharapkan: simpan kandidat yang paling dekat
+            if self._pending is None or abs(t - expected) < abs(self._pending - expected):
+                self._pending = t
+            return
+        if self._pending is not None:
+            self._confirm(self._pending, accepted)
+            self._pending = None
+            self._offer(t, reference, tolerance, accepted)
+        else:
+            self._start_chain(t) # Detak yang diharapkan terlewat: t memulai rantai IBI baru
+
+    def _start_chain(self, t):
+        self.beat_count += 1
+        self._last_beat_t = t
+        self._linked = False
+
+    def _confirm(self, t, accepted):
+        self.beat_count += 1
+        ibi = t - self._last_beat_t
+        if self.min_ibi <= ibi <= self.max_ibi:
+            self.history.add(ibi, t, linked=self._linked)
+            accepted.append((t, ibi))
+            self._linked = True
+        else:
+            self._linked = False
+        self._last_beat_t = t
+
+    def stats(self):
+        """BeatStats saat ini; HR sesaat 0 bila belum ada IBI atau detak terakhir lebih dari 2x IBI maksimum."""
+        history = self.history
+        hr = 0.0
+        if len(history) and self._last_beat_t is not None and self._horizon_t - self._last_beat_t <= 2 * self.max_ibi:
+            hr = 60.0 / history.ibis.latest()
+        return BeatStats(hr, history.rmssd() * 1000, history.sdnn() * 1000, len(history))
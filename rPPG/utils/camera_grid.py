@@ -0,0 +1,131 @@
+from PyQt5.QtWidgets import QWidget, QGridLayout, QSizePolicy
+from PyQt5.QtGui import QPainter, QPen, QColor, QImage, QFont
+from PyQt5.QtCore import Qt, QRectF, pyqtSignal
+
+from .multicam import grid_shape
+
+
+class CameraTile(QWidget):
+    """
+    Satu tile kamera: frame terbaru dari shared memory, overlay ROI, nama
+    sumber, serta HR dan confidence. Frame digambar langsung dengan QPainter
+    saat paintEvent, sehingga frame yang datang lebih cepat dari repaint tidak
+    diskalakan sia-sia.
+    """
+    clicked = pyqtSignal(int)
+
+    def __init__(self, index, name, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.name = name
+        self.status = "" # Pesan error / sumber berakhir, menggantikan HR
+        self.selected = False
+        self.background = QColor("#000000")
+        self.text_color = QColor("#EEEEEE")
+        self._frame = None
+        self._image = None
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(160, 90)
+        self.setCursor(Qt.PointingHandCursor)
+
+    def set_frame(self, camera_frame):
+        # CameraFrame sudah berupa salinan, QImage cukup membungkus memorinya
+        self._frame = camera_frame
+        frame = camera_frame.frame_bgr
+        h, w = frame.shape[:2]
+        self._image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_BGR888)
+        self.update()
+
+    def set_status(self, text):
+        self.status = text
+        self.update()
+
+    def set_selected(self, selected):
+        self.selected = selected
+        self.update()
+
+    def clear(self):
+        self._frame = None
+        self._image = None
+        self.status = ""
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.clicked.emit(self.index)
+        super().mousePressEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.background)
+        w, h = self.width(), self.height()
+        if self._image is not None:
+            iw, ih = self._image.width(), self._image.height()
+            scale = min(w / iw, h / ih)
+            target = QRectF((w - iw * scale) / 2, (h - ih * scale) / 2, iw * scale, ih * scale)
+            painter.drawImage(target, self._image)
+            # ROI dalam koordinat frame slot, diskalakan ke tile
+            painter.setPen(QPen(QColor(255, 255, 0), 1))
+            for x, y, rw, rh in self._frame.roi_rects:
+                painter.drawRect(QRectF(target.x() + x * scale, target.y() + y * scale, rw * scale, rh * scale))
+
+        # Pita teks: nama sumber di kiri, HR + confidence (atau status) di kanan
+        painter.fillRect(QRectF(0, 0, w, 22), QColor(0, 0, 0, 160))
+        painter.setPen(self.text_color)
+        painter.setFont(QFont("Segoe UI", 9))
+        painter.drawText(QRectF(6, 0, w - 12, 22), Qt.AlignLeft | Qt.AlignVCenter, self.name)
+        painter.drawText(QRectF(6, 0, w - 12, 22), Qt.AlignRight | Qt.AlignVCenter, self._status_text())
+
+        if self.selected:
+            painter.setPen(QPen(QColor("#00ADB5"), 3))
+            painter.drawRect(1, 1, w - 3, h - 3)
+        painter.end()
+
+    def _status_text(self):
+        if self.status:
+            return self.status
+        frame = self._frame
+        if frame is None:
+            return "Menunggu..."
+        if frame.quality is not None and not frame.quality.usable:
+            return frame.quality.reason
+        if frame.hr <= 0:
+            return "-- BPM"
+        return f"{frame.hr:.0f} BPM  ({frame.confidence * 100:.0f}%)"
+
+
+class CameraGridWidget(QWidget):
+    """Tile kamera dalam grid sedekat mungkin dengan persegi; klik tile untuk memilih kamera utama."""
+    camera_selected = pyqtSignal(int)
+
+    def __init__(self, names, parent=None):
+        super().__init__(parent)
+        self.setObjectName("CameraGrid")
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        layout = QGridLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(6)
+        _, cols = grid_shape(len(names))
+        self.tiles = []
+        for index, name in enumerate(names):
+            tile = CameraTile(index, name)
+            tile.clicked.connect(self.select)
+            layout.addWidget(tile, index // cols, index % cols)
+            self.tiles.append(tile)
+        self.selected = 0
+        if self.tiles:
+            self.tiles[0].set_selected(True)
+
+    def select(self, index):
+        if index == self.selected:
+            return
+        self.tiles[self.selected].set_selected(False)
+        self.selected = index
+        self.tiles[index].set_selected(True)
+        self.camera_selected.emit(index)
+
+    def update_camera(self, index, camera_frame):
+        self.tiles[index].set_frame(camera_frame)
+
+    def set_status(self, index, text):
+        self.tiles[index].set_status(text)
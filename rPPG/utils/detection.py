@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from .startup import lazy_import
+
+mp = lazy_import("mediapipe")
+
+# Transformasi dari koordinat input detektor ke koordinat frame penuh:
+# full = offset + small / scale
+DetectionTransform = namedtuple("DetectionTransform", ["offset_x", "offset_y", "scale_x", "scale_y",
+                                                       "frame_w", "frame_h", "input_w", "input_h"])
+
+
+class DetectionInputScaler:
+    """
+    Menyiapkan input detektor beresolusi rendah: crop opsional di sekitar box
+    sebelumnya, resize sekali ke buffer yang dipakai ulang, lalu konversi ke RGB.
+    Box hasil deteksi dipetakan kembali ke koordinat resolusi penuh.
+    """
+    def __init__(self, max_side=320, crop_margin=None):
+        self.max_side = max_side
+        # crop_margin: perluasan box sebelumnya (relatif terhadap ukurannya), None = selalu frame penuh
+        self.crop_margin = crop_margin
+        self._small_bgr = None
+        self._small_rgb = None
+        self._force_full_frame = True
+
+    def _crop_region(self, frame_w, frame_h, prev_bbox):
+        if self.crop_margin is None or prev_bbox is None or self._force_full_frame:
+            return 0, 0, frame_w, frame_h
+        x, y, w, h = prev_bbox
+        side = max(w, h) * (1.0 + 2.0 * self.crop_margin)
+        # Pertahankan rasio aspek frame agar buffer input berukuran tetap
+        crop_w = min(frame_w, side * frame_w / min(frame_w, frame_h))
+        crop_h = min(frame_h, crop_w * frame_h / frame_w)
+        cx, cy = x + w / 2.0, y + h / 2.0
+        cx0 = int(max(0, min(frame_w - crop_w, cx - crop_w / 2.0)))
+        cy0 = int(max(0, min(frame_h - crop_h, cy - crop_h / 2.0)))
+        return cx0, cy0, int(crop_w), int(crop_h)
+
+    def prepare(self, frame_bgr, prev_bbox=None):
+        """Kembalikan (mp.Image RGB kecil, DetectionTransform)."""
+        frame_h, frame_w = frame_bgr.shape[:2]
+        ox, oy, cw, ch = self._crop_region(frame_w, frame_h, prev_bbox)
+        region = frame_bgr[oy:oy + ch, ox:ox + cw]
+
+        scale = min(1.0, float(self.max_side) / max(frame_w, frame_h))
+        input_w, input_h = max(1, int(round(frame_w * scale))), max(1, int(round(frame_h * scale)))
+        if self._small_bgr is None or self._small_bgr.shape[:2] != (input_h, input_w):
+            self._small_bgr = np.empty((input_h, input_w, 3), dtype=np.uint8)
+            self._small_rgb = np.empty((input_h, input_w, 3), dtype=np.uint8)
+        # Crop di-resize ke ukuran input yang sama sehingga buffer tidak pernah dialokasikan ulang
+        cv2.resize(region, (input_w, input_h), dst=self._small_bgr, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small_bgr, cv2.COLOR_BGR2RGB, dst=self._small_rgb)
+        # mp.Image menyalin data ke ImageFrame, sehingga buffer aman dipakai ulang pada frame berikutnya
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=self._small_rgb)
+        return mp_image, DetectionTransform(ox, oy, input_w / float(cw), input_h / float(ch),
+                                            frame_w, frame_h, input_w, input_h)
+
+    def back_project(self, face_detection_result, transform):
+        """Petakan box (dan keypoint ternormalisasi) ke koordinat frame penuh, in-place."""
+        if face_detection_result is None:
+            return None
+        if not face_detection_result.detections:
+            # Wajah tidak ditemukan di dalam crop: deteksi berikutnya memakai frame penuh
+            self._force_full_frame = True
+            return face_detection_result
+        self._force_full_frame = False
+        inv_x, inv_y = 1.0 / transform.scale_x, 1.0 / transform.scale_y
+        for detection in face_detection_result.detections:
+            bbox = detection.bounding_box
+            bbox.origin_x = int(round(transform.offset_x + bbox.origin_x * inv_x))
+            bbox.origin_y = int(round(transform.offset_y + bbox.origin_y * inv_y))
+            bbox.width = int(round(bbox.width * inv_x))
+            bbox.height = int(round(bbox.height * inv_y))
+            for kp in detection.keypoints or []:
+                kp.x = (transform.offset_x + kp.x * transform.input_w * inv_x) / transform.frame_w
+                kp.y = (transform.offset_y + kp.y * transform.input_h * inv_y) / transform.frame_h
+        return face_detection_result
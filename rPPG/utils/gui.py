@@ -3,12 +3,17 @@ from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLay
                              QGridLayout, QGroupBox, QApplication, QSizePolicy, QFrame)
 from PyQt5.QtGui import QFont, QPixmap, QColor, QPalette
 from PyQt5.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
+
+from .waveform import WaveformWidget, SpectrogramWidget
+from .camera_grid import CameraGridWidget
 
 class HealthTrackerUI(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, plot_backend="qt"):
         super().__init__(parent)
+        # "qt": widget QPainter ringan (default); "matplotlib": canvas Agg seperti sebelumnya
+        if plot_backend not in ("qt", "matplotlib"):
+            raise ValueError(f"plot_backend tidak dikenal: {plot_backend}")
+        self.plot_backend = plot_backend
         self.setAttribute(Qt.WA_StyledBackground, True)
         self.setObjectName("HealthTrackerUI")
         self._init_ui()
@@ -38,6 +43,7 @@ class HealthTrackerUI(QWidget):
         left_layout = QVBoxLayout(self.left_card)
         left_layout.setContentsMargins(15, 15, 15, 15)
         left_layout.setSpacing(15)
+        self.left_layout = left_layout
 
         # Video Feed
         self.video_label = QLabel("Waiting for Camera...")
@@ -46,6 +52,16 @@ class HealthTrackerUI(QWidget):
         self.video_label.setObjectName("VideoPlaceholder")
         left_layout.addWidget(self.video_label, stretch=1)
 
+        # Panel performa (latensi per stage), melayang di atas feed video; tersembunyi secara default
+        self.perf_panel = QLabel(self.video_label)
+        self.perf_panel.setObjectName("PerfPanel")
+        self.perf_panel.setAttribute(Qt.WA_TransparentForMouseEvents, True)
+        self.perf_panel.move(8, 8)
+        self.perf_panel.hide()
+
+        # Grid tile kamera (mode multi-kamera), menggantikan video_label selama sesi
+        self.camera_grid = None
+
         # Controls
         button_layout = QHBoxLayout()
         button_layout.setSpacing(15)
@@ -96,14 +112,119 @@ class HealthTrackerUI(QWidget):
         
         right_layout.addWidget(hr_container)
 
+        # Vital tambahan dari trace yang sama: laju napas dan proksi HRV
+        vitals_layout = QHBoxLayout()
+        vitals_layout.setSpacing(15)
+        self.respiration_value_label = self._add_vital_box(vitals_layout, "Napas", "/menit")
+        self.hrv_value_label = self._add_vital_box(vitals_layout, "HRV (proksi)", "BPM")
+        right_layout.addLayout(vitals_layout)
+
+        # Confidence HR / alasan sinyal tidak layak dari indeks kualitas sinyal
+        self.quality_label = QLabel("Kualitas sinyal: --")
+        self.quality_label.setObjectName("QualityLabel")
+        self.quality_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        right_layout.addWidget(self.quality_label)
+
+        # HR sesaat dari IBI terakhir + RMSSD/SDNN riwayat IBI (detektor detak)
+        self.beat_label = QLabel("Detak: --")
+        self.beat_label.setObjectName("QualityLabel")
+        self.beat_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        right_layout.addWidget(self.beat_label)
+
         # Graph
-        self.hr_fig, self.ax_rppg = plt.subplots()
-        self.hr_canvas = FigureCanvas(self.hr_fig)
-        self.hr_canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        right_layout.addWidget(self.hr_canvas, stretch=1)
+        if self.plot_backend == "qt":
+            self.rppg_plot = WaveformWidget("rPPG", color="#FF6B6B")
+            self.spectrum_plot = SpectrogramWidget("Spektrum")
+            self.hr_trend_plot = WaveformWidget("HR (BPM)", color="#00ADB5", y_range=(40, 180),
+                                                value_format="{:.0f}")
+            right_layout.addWidget(self.rppg_plot, stretch=2)
+            right_layout.addWidget(self.spectrum_plot, stretch=1)
+            right_layout.addWidget(self.hr_trend_plot, stretch=1)
+        else:
+            # matplotlib hanya diimpor untuk backend ini (import-nya ±0,5 detik)
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+            import matplotlib.pyplot as plt
+            self.hr_fig, self.ax_rppg = plt.subplots()
+            self.hr_canvas = FigureCanvas(self.hr_fig)
+            self.hr_canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            right_layout.addWidget(self.hr_canvas, stretch=1)
 
         self.content_layout.addWidget(self.right_card, stretch=2)
 
+    def _add_vital_box(self, layout, title, unit):
+        box = QFrame()
+        box.setObjectName("StatBox")
+        box_layout = QHBoxLayout(box)
+        title_label = QLabel(title)
+        title_label.setObjectName("UnitLabel")
+        value_label = QLabel("--")
+        value_label.setObjectName("VitalValueLabel")
+        value_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        unit_label = QLabel(unit)
+        unit_label.setObjectName("UnitLabel")
+        box_layout.addWidget(title_label)
+        box_layout.addStretch()
+        box_layout.addWidget(value_label)
+        box_layout.addWidget(unit_label)
+        layout.addWidget(box)
+        return value_label
+
+    def show_camera_grid(self, names):
+        """Ganti feed video tunggal dengan grid satu tile per kamera; kembalikan CameraGridWidget."""
+        self.hide_camera_grid()
+        self.camera_grid = CameraGridWidget(names)
+        self.video_label.hide()
+        self.left_layout.insertWidget(0, self.camera_grid, stretch=1)
+        return self.camera_grid
+
+    def hide_camera_grid(self):
+        if self.camera_grid is None:
+            return
+        self.left_layout.removeWidget(self.camera_grid)
+        self.camera_grid.deleteLater()
+        self.camera_grid = None
+        self.video_label.show()
+
+    def set_signal_quality(self, quality):
+        """Tampilkan SignalQuality (utils.quality), atau None bila belum ada estimasi."""
+        if quality is None:
+            text = "Kualitas sinyal: --"
+        elif quality.usable:
+            text = f"Kualitas sinyal: {quality.index * 100:.0f}%"
+        else:
+            text = f"Sinyal tidak layak: {quality.reason}"
+        if text != self.quality_label.text():
+            self.quality_label.setText(text)
+
+    def set_vitals(self, vitals):
+        """Tampilkan Vitals (utils.vitals), atau None bila belum ada estimasi."""
+        respiration = f"{vitals.respiration_rpm:.0f}" if vitals is not None and vitals.respiration_rpm > 0 else "--"
+        hrv = f"{vitals.hrv_bpm:.1f}" if vitals is not None and vitals.hr_bpm > 0 else "--"
+        if respiration != self.respiration_value_label.text():
+            self.respiration_value_label.setText(respiration)
+        if hrv != self.hrv_value_label.text():
+            self.hrv_value_label.setText(hrv)
+
+    def set_beats(self, beats):
+        """Tampilkan BeatStats (utils.beats), atau None bila belum ada detak."""
+        if beats is None or beats.hr_bpm <= 0:
+            text = "Detak: --"
+        elif beats.beats < 2:
+            text = f"Detak sesaat: {beats.hr_bpm:.0f} BPM"
+        else:
+            text = f"Detak sesaat: {beats.hr_bpm:.0f} BPM · RMSSD {beats.rmssd_ms:.0f} ms · SDNN {beats.sdnn_ms:.0f} ms"
+        if text != self.beat_label.text():
+            self.beat_label.setText(text)
+
+    def set_perf_overlay_visible(self, visible):
+        self.perf_panel.setVisible(visible)
+        if visible:
+            self.perf_panel.raise_()
+
+    def set_perf_text(self, text):
+        self.perf_panel.setText(text)
+        self.perf_panel.adjustSize()
+
     def _apply_styles(self):
         # Color Palette
         bg_color = "#121212"
@@ -197,6 +318,26 @@ class HealthTrackerUI(QWidget):
                 color: {text_color};
             }}
 
+            QLabel#VitalValueLabel {{
+                font-size: 20px;
+                font-weight: bold;
+                color: {text_color};
+            }}
+
+            QLabel#PerfPanel {{
+                background-color: rgba(0, 0, 0, 170);
+                color: #9EFFA0;
+                font-family: monospace;
+                font-size: 11px;
+                border-radius: 4px;
+                padding: 6px;
+            }}
+
+            QLabel#QualityLabel {{
+                font-size: 12px;
+                color: {secondary_text};
+            }}
+
             QLabel#UnitLabel {{
                 font-size: 14px;
                 color: {secondary_text};
@@ -210,6 +351,9 @@ class HealthTrackerUI(QWidget):
         self.end_button.setObjectName("EndButton")
         self.hr_value_label.setObjectName("ValueLabel")
 
+        if self.plot_backend != "matplotlib":
+            return
+
         # Matplotlib Styling
         self.hr_fig.patch.set_facecolor(card_bg)
         self.ax_rppg.set_facecolor(card_bg)
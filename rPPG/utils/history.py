@@ -0,0 +1,220 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+
+# Hasil query satu kanal: waktu (detik), min/mean/max per titik, dan resolusi tier
+# yang dipakai (0 = sampel penuh, min = mean = max)
+TrendSeries = namedtuple("TrendSeries", ["times", "min", "mean", "max", "resolution_s"])
+
+# Tier agregat default: 1 detik selama 1 jam, 10 detik selama 24 jam, 1 menit selama 7 hari
+DEFAULT_TIERS = ((1.0, 3600), (10.0, 8640), (60.0, 10080))
+
+
+class _AggregateTier:
+    """
+    Satu tingkat resolusi: bin berdurasi bin_s yang sudah selesai disimpan di
+    RingBuffer dengan kolom [min, mean, max, count] per kanal. Bin yang sedang
+    berjalan hanya berupa akumulator (jumlah, count, min, max).
+    """
+    def __init__(self, bin_s, capacity, channels):
+        self.bin_s = float(bin_s)
+        self.channels = channels
+        self.ring = RingBuffer(capacity, channels=4 * channels)
+        self.reset()
+
+    def reset(self):
+        self.ring.clear()
+        self._bin = None
+        self._sum = np.zeros(self.channels)
+        self._count = np.zeros(self.channels)
+        self._min = np.full(self.channels, np.inf)
+        self._max = np.full(self.channels, -np.inf)
+
+    def add(self, timestamp, mins, sums, maxs, counts):
+        """Tambahkan agregat (atau satu sampel); kembalikan agregat bin yang baru selesai, atau None."""
+        b = int(np.floor(timestamp / self.bin_s))
+        done = None
+        if self._bin is not None and b > self._bin:
+            done = self._close_bin()
+        if self._bin is None or b > self._bin:
+            self._bin = b
+        # Timestamp mundur tetap dihitung pada bin yang sedang berjalan; fmin/fmax mengabaikan NaN
+        self._sum += sums
+        self._count += counts
+        np.fmin(self._min, mins, out=self._min)
+        np.fmax(self._max, maxs, out=self._max)
+        return done
+
+    def _row(self):
+        valid = self._count > 0
+        mean = np.divide(self._sum, self._count, out=np.full(self.channels, np.nan), where=valid)
+        return (np.where(valid, self._min, np.nan), mean, np.where(valid, self._max, np.nan), self._count.copy())
+
+    def pending(self):
+        """(waktu_tengah, min, mean, max, count) bin yang sedang berjalan, atau None."""
+        if self._bin is None:
+            return None
+        return ((self._bin + 0.5) * self.bin_s,) + self._row()
+
+    def _close_bin(self):
+        t, mins, mean, maxs, counts = self.pending()
+        self.ring.append(np.concatenate((mins, mean, maxs, counts)), t)
+        sums = np.where(counts > 0, mean * counts, 0.0)
+        self._sum[:] = 0.0
+        self._count[:] = 0.0
+        self._min[:] = np.inf
+        self._max[:] = -np.inf
+        return t, mins, sums, maxs, counts
+
+
+class TrendHistory:
+    """
+    Riwayat time-series (mis. HR + indeks kualitas) bermemori tetap untuk sesi
+    berjam-jam: sampel penuh terbaru di satu ring, ditambah tier agregat
+    min/mean/max (default 1 detik, 10 detik, 1 menit) yang masing-masing juga
+    ring. Sampel mengalir bertingkat: bin tier halus yang selesai menjadi satu
+    masukan tier berikutnya, sehingga append O(1) dan memori tidak tumbuh.
+    Nilai NaN (mis. HR tidak dipublikasikan) tidak ikut diagregasi.
+    """
+    def __init__(self, channels=("hr", "quality"), raw_capacity=3600, tiers=DEFAULT_TIERS,
+                 flush_path=None, flush_interval_s=60.0):
+        if not channels:
+            raise ValueError("TrendHistory membutuhkan minimal satu kanal")
+        bins = [bin_s for bin_s, _ in tiers]
+        if bins != sorted(bins) or len(set(bins)) != len(bins):
+            raise ValueError(f"Durasi bin tier harus naik, didapat {bins}")
+        self.channels = tuple(channels)
+        self.raw = RingBuffer(raw_capacity, channels=len(self.channels))
+        self.tiers = [_AggregateTier(bin_s, capacity, len(self.channels)) for bin_s, capacity in tiers]
+        # Flush periodik opsional: bin tier pertama yang sudah selesai ditambahkan ke CSV
+        self.flush_path = flush_path
+        self.flush_interval_s = flush_interval_s
+        self._file = None
+        self.clear()
+
+    def clear(self):
+        self.raw.clear()
+        for tier in self.tiers:
+            tier.reset()
+        self.first_timestamp = None
+        self._flushed = 0 # total_appended tier pertama yang sudah ditulis ke disk
+        self._last_flush_t = None
+        self._closed = False # Setelah close(): tidak ada lagi yang ditulis sampai clear()
+
+    def __len__(self):
+        return self.raw.total_appended
+
+    def append(self, timestamp, values):
+        """Tambahkan satu sampel (satu nilai per kanal, NaN = tidak ada nilai)."""
+        v = np.asarray(values, dtype=np.float64)
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+            self._last_flush_t = timestamp
+        self.raw.append(v, timestamp)
+        counts = np.isfinite(v).astype(np.float64)
+        item = (timestamp, v, np.where(counts > 0, v, 0.0), v, counts)
+        for tier in self.tiers:
+            item = tier.add(*item)
+            if item is None:
+                break
+        if self.flush_path and timestamp - self._last_flush_t >= self.flush_interval_s:
+            self._last_flush_t = timestamp
+            self.flush()
+
+    def _levels(self):
+        # (ring, resolusi) dari yang paling halus
+        return [(self.raw, 0.0)] + [(tier.ring, tier.bin_s) for tier in self.tiers]
+
+    def query(self, channel, t0=None, t1=None, max_points=None):
+        """
+        TrendSeries satu kanal pada rentang [t0, t1] (default: seluruh sesi) dari tier
+        paling halus yang masih mencakup t0 dan menghasilkan paling banyak max_points
+        titik; bila tidak ada, tier paling kasar. Bin tier yang sedang berjalan ikut
+        sebagai titik terakhir, sehingga tren tetap menyambung ke sampel terbaru.
+        """
+        c = self.channels.index(channel)
+        n_channels = len(self.channels)
+        if self.first_timestamp is None:
+            empty = np.zeros(0)
+            return TrendSeries(empty, empty, empty, empty, 0.0)
+        t0 = self.first_timestamp if t0 is None else max(t0, self.first_timestamp)
+        t1 = np.inf if t1 is None else t1
+
+        levels = self._levels()
+        chosen = len(levels) - 1
+        for level, (ring, resolution) in enumerate(levels):
+            times = ring.timestamps()
+            # Ring yang belum pernah penuh masih menyimpan seluruh sesi
+            covers = ring.total_appended == len(ring) or (len(times) and times[0] <= t0)
+            if not covers:
+                continue
+            count = np.searchsorted(times, t1, side="right") - np.searchsorted(times, t0, side="left")
+            if level > 0:
+                count += 1 # Bin yang sedang berjalan
+            if max_points is None or count <= max_points:
+                chosen = level
+                break
+
+        ring, resolution = levels[chosen]
+        times = ring.timestamps()
+        lo, hi = np.searchsorted(times, t0, side="left"), np.searchsorted(times, t1, side="right")
+        values = ring.values()[lo:hi]
+        times = times[lo:hi]
+        if chosen == 0:
+            column = np.array(values[:, c])
+            return TrendSeries(np.array(times), column, column, column.copy(), resolution)
+        mins, means, maxs = (np.array(values[:, k * n_channels + c]) for k in range(3))
+        times = np.array(times)
+        pending = self.tiers[chosen - 1].pending()
+        if pending is not None and t0 <= pending[0] <= t1 and pending[4][c] > 0:
+            times = np.append(times, pending[0])
+            mins, means, maxs = (np.append(a, p[c]) for a, p in zip((mins, means, maxs), pending[1:4]))
+        return TrendSeries(times, mins, means, maxs, resolution)
+
+    def flush(self):
+        """Tambahkan bin tier pertama yang selesai sejak flush terakhir ke flush_path (CSV)."""
+        if self._closed or not self.flush_path or not self.tiers:
+            return 0
+        ring = self.tiers[0].ring
+        # Bin yang sudah tertimpa sebelum sempat ditulis (interval flush > kapasitas tier) hilang
+        new = min(ring.total_appended - self._flushed, len(ring))
+        self._flushed = ring.total_appended
+        if new <= 0:
+            return 0
+        self._write_rows(ring.timestamps(new), ring.values(new))
+        return new
+
+    def _write_rows(self, times, values):
+        if self._file is None:
+            exists = os.path.exists(self.flush_path) and os.path.getsize(self.flush_path) > 0
+            self._file = open(self.flush_path, "a")
+            if not exists:
+                names = [f"{name}_{stat}" for name in self.channels for stat in ("min", "mean", "max")]
+                self._file.write(",".join(["time_s"] + names) + "\n")
+        n_channels = len(self.channels)
+        # Dikelompokkan per kanal (min, mean, max); kolom count tidak ditulis
+        order = [k * n_channels + c for c in range(n_channels) for k in range(3)]
+        np.savetxt(self._file, np.column_stack((times, values[:, order])), fmt="%.3f", delimiter=",")
+        self._file.flush()
+
+    def close(self):
+        """
+        Flush terakhir (termasuk bin tier pertama yang belum selesai) lalu tutup file.
+        Idempoten: pemanggilan berikutnya tidak menulis apa pun sampai clear().
+        """
+        if self._closed:
+            return
+        try:
+            if self.flush_path and self.tiers:
+                self.flush()
+                pending = self.tiers[0].pending()
+                if pending is not None and pending[4].any():
+                    self._write_rows(np.array([pending[0]]), np.concatenate(pending[1:4])[None, :])
+        finally:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,168 @@
+import csv
+import json
+import threading
+import time
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+
+# Urutan stage pada laporan dan overlay (stage lain ditambahkan di belakang)
+STAGES = ("capture", "detect", "detect_async", "roi", "dsp", "gui", "frame_latency")
+# Counter yang selalu muncul di laporan, meskipun nilainya 0
+COUNTERS = ("dropped_frames", "display_skipped", "detector_runs", "detector_misses", "capture_failures",
+            "frame_pool_misses")
+
+
+class StageHistogram:
+    """
+    Histogram latensi bergulir satu stage: durasi terakhir disimpan di ring buffer,
+    persentil baru dihitung saat diminta, sehingga record() hanya berupa satu append.
+    """
+    def __init__(self, window=512):
+        self._samples = RingBuffer(window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total_s += seconds
+            if seconds > self.max_s:
+                self.max_s = seconds
+
+    def snapshot(self):
+        with self._lock:
+            recent = np.array(self._samples.values())
+            count, total_s, max_s = self.count, self.total_s, self.max_s
+        if len(recent) == 0:
+            return {"count": count}
+        p50, p95, p99 = np.percentile(recent, (50, 95, 99)) * 1000
+        return {"count": count, "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "mean_ms": total_s / count * 1000, "max_ms": max_s * 1000}
+
+
+class _StageTimer:
+    __slots__ = ("_monitor", "_stage", "_start")
+
+    def __init__(self, monitor, stage):
+        self._monitor = monitor
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._monitor.record(self._stage, time.perf_counter() - self._start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class PerfMonitor:
+    """
+    Instrumentasi per stage untuk seluruh pipeline: histogram latensi bergulir
+    (p50/p95/p99) dan counter (frame drop, deteksi tanpa wajah, dll.).
+    Aman dipanggil dari banyak thread. Dengan enabled=False semua pemanggilan
+    menjadi no-op, sehingga instrumentasi bisa dibiarkan di jalur panas.
+    """
+    def __init__(self, enabled=True, window=512):
+        self.enabled = enabled
+        self.window = window
+        self._histograms = {}
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, StageHistogram(self.window))
+        return histogram
+
+    def measure(self, stage):
+        """Context manager yang mencatat durasi blok ke histogram `stage`."""
+        return _StageTimer(self, stage) if self.enabled else _NULL_TIMER
+
+    def record(self, stage, seconds):
+        if self.enabled:
+            self._histogram(stage).record(seconds)
+
+    def count(self, counter, n=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def set_counter(self, counter, value):
+        # Untuk counter yang sudah dihitung di tempat lain (mis. DropOldestQueue.dropped)
+        if self.enabled:
+            with self._lock:
+                self._counters[counter] = value
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def snapshot(self):
+        """{"stages": {stage: statistik}, "counters": {...}, "duration_s": ...}"""
+        order = {name: i for i, name in enumerate(STAGES)}
+        with self._lock: # Stage baru bisa ditambahkan thread lain selama iterasi
+            histograms = dict(self._histograms)
+        stages = sorted(histograms, key=lambda s: (order.get(s, len(order)), s))
+        return {
+            "stages": {stage: histograms[stage].snapshot() for stage in stages},
+            "counters": self.counters(),
+            "duration_s": time.time() - self.started_at,
+        }
+
+    def summary_text(self):
+        """Ringkasan ringkas untuk overlay GUI, satu baris per stage."""
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<13}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for stage, stats in snapshot["stages"].items():
+            if "p50_ms" in stats:
+                lines.append(f"{stage:<13}{stats['p50_ms']:7.1f}{stats['p95_ms']:7.1f}{stats['p99_ms']:7.1f}")
+        lines += [f"{name}: {value}" for name, value in sorted(snapshot["counters"].items())]
+        return "\n".join(lines)
+
+    def dump(self, path, extra=None):
+        """
+        Tulis snapshot ke JSON atau CSV (ditentukan dari ekstensi path).
+        `extra` (dict) ikut ditulis ke JSON, mis. log keputusan load shedding.
+        """
+        snapshot = self.snapshot()
+        if path.lower().endswith(".csv"):
+            fields = ["name", "kind", "count", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields, restval="")
+                writer.writeheader()
+                for stage, stats in snapshot["stages"].items():
+                    writer.writerow({"name": stage, "kind": "stage", **stats})
+                for name, value in snapshot["counters"].items():
+                    writer.writerow({"name": name, "kind": "counter", "count": value})
+        else:
+            with open(path, "w") as f:
+                json.dump({**snapshot, **(extra or {})}, f, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters = dict.fromkeys(COUNTERS, 0)
+            self.started_at = time.time()
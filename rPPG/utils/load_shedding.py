@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# Satu keputusan pengendali: knob yang diubah, nilai lama/baru, dan beban yang memicunya
+LoadDecision = namedtuple("LoadDecision", ["timestamp", "action", "knob", "old", "new", "load"])
+
+
+class _Knob:
+    def __init__(self, name, levels, apply, stage):
+        self.name = name
+        self.levels = list(levels) # levels[0] = kualitas penuh, makin ke belakang makin murah
+        self.apply = apply
+        self.stage = stage # Stage yang bebannya diringankan knob ini
+        self.level = 0
+
+    @property
+    def value(self):
+        return self.levels[self.level]
+
+
+class _StageLoad:
+    """Jendela latensi bergulir satu stage."""
+    def __init__(self):
+        self.samples = deque() # (waktu, latensi) dalam jendela berjalan
+        self.sum = 0.0
+        self.load = 0.0
+        self.last_change = None
+
+    def clear(self, now):
+        self.samples.clear()
+        self.sum = 0.0
+        self.last_change = now
+
+
+class LoadSheddingController:
+    """
+    Pengendali umpan balik beban: membandingkan rata-rata latensi loop frame
+    dalam jendela waktu `window_s` dengan anggaran 1/fps. Rata-rata berjendela
+    (bukan EMA) agar lonjakan berkala, mis. filter+FFT setiap N frame, terhitung
+    sesuai porsinya. Setiap perubahan knob memulai jendela baru. Saat beban melewati
+    `high_load`, knob diturunkan satu tingkat sesuai urutan prioritas
+    pendaftarannya (knob pertama dikorbankan lebih dulu); saat beban di bawah
+    `low_load` cukup lama, knob dipulihkan dalam urutan terbalik.
+    Pengambilan sampel sinyal sendiri tidak pernah menjadi knob.
+
+    Pada pipeline bertingkat setiap thread punya anggarannya sendiri: latensi
+    dilaporkan per `stage` dan setiap knob hanya bereaksi pada beban stage yang
+    diringankannya (mis. interval deteksi pada stage detektor). Stage None
+    dipakai bila semua pekerjaan berjalan di satu loop.
+    """
+    def __init__(self, budget_s, high_load=0.85, low_load=0.5, window_s=2.0, restore_cooldown=4.0,
+                 max_restore_cooldown=30.0, history=200, on_decision=None):
+        if budget_s <= 0:
+            raise ValueError(f"budget_s harus positif, didapat {budget_s}")
+        if not 0 < low_load < high_load:
+            raise ValueError(f"Diperlukan 0 < low_load < high_load, didapat {low_load}, {high_load}")
+        self.budget_s = budget_s
+        self.high_load = high_load
+        self.low_load = low_load
+        self.window_s = window_s
+        self.base_restore_cooldown = restore_cooldown
+        self.max_restore_cooldown = max_restore_cooldown
+        self.on_decision = on_decision # Callback(LoadDecision), mis. untuk logging
+        self.decisions = deque(maxlen=history)
+        self._knobs = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def add_knob(self, name, levels, apply, stage=None):
+        """Daftarkan knob; `apply(nilai)` dipanggil setiap kali tingkatnya berubah."""
+        if not levels:
+            raise ValueError(f"Knob {name} membutuhkan minimal satu tingkat")
+        self._knobs.append(_Knob(name, levels, apply, stage))
+        self._stages.setdefault(stage, _StageLoad())
+
+    def reset(self):
+        """Kembalikan semua knob ke kualitas penuh (mis. di awal sesi)."""
+        with self._lock:
+            self.load = 0.0
+            self._stages = {knob.stage: _StageLoad() for knob in self._knobs}
+            self._last_restore = None
+            self.restore_cooldown = self.base_restore_cooldown
+            for knob in self._knobs:
+                if knob.level != 0:
+                    knob.level = 0
+                    knob.apply(knob.value)
+            self.decisions.clear()
+
+    def settings(self):
+        """Nilai knob saat ini, {nama: nilai}."""
+        return {knob.name: knob.value for knob in self._knobs}
+
+    def stage_loads(self):
+        """Beban terakhir per stage, {stage: beban}."""
+        with self._lock:
+            return {stage: state.load for stage, state in self._stages.items()}
+
+    def observe(self, latency_s, now=None, stage=None):
+        """
+        Catat latensi satu iterasi loop frame pada `stage`. Kembalikan
+        LoadDecision jika ada knob yang diubah, selain itu None.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._stages.get(stage)
+            if state is None:
+                return None # Tidak ada knob yang meringankan stage ini
+            state.samples.append((now, latency_s))
+            state.sum += latency_s
+            while now - state.samples[0][0] > self.window_s:
+                state.sum -= state.samples.popleft()[1]
+            state.load = state.sum / len(state.samples) / self.budget_s
+            self.load = max(s.load for s in self._stages.values())
+            if state.last_change is None:
+                state.last_change = now
+            since_change = now - state.last_change
+            decision = None
+            if since_change < self.window_s:
+                pass # Jendela sejak perubahan terakhir belum penuh
+            elif state.load > self.high_load:
+                decision = self._shed(stage, state, now)
+            elif state.load < self.low_load and since_change >= self.restore_cooldown:
+                decision = self._restore(stage, state, now)
+        if decision is not None and self.on_decision is not None:
+            self.on_decision(decision)
+        return decision
+
+    def _shed(self, stage, state, now):
+        knob = next((k for k in self._knobs if k.stage == stage and k.level < len(k.levels) - 1), None)
+        if knob is None:
+            return None # Semua knob stage ini sudah di tingkat termurah
+        # Overload tak lama setelah pemulihan: tunda pemulihan berikutnya lebih lama (cegah osilasi)
+        if self._last_restore is not None and now - self._last_restore < 2 * self.restore_cooldown:
+            self.restore_cooldown = min(self.max_restore_cooldown, self.restore_cooldown * 2)
+        return self._step(knob, state, +1, "shed", now)
+
+    def _restore(self, stage, state, now):
+        knob = next((k for k in reversed(self._knobs) if k.stage == stage and k.level > 0), None)
+        if knob is None:
+            return None
+        self._last_restore = now
+        return self._step(knob, state, -1, "restore", now)
+
+    def _step(self, knob, state, direction, action, now):
+        old = knob.value
+        knob.level += direction
+        knob.apply(knob.value)
+        load = state.load
+        # Ukur ulang dari awal: sampel lama mencerminkan pengaturan sebelumnya
+        state.clear(now)
+        decision = LoadDecision(time.time(), action, knob.name, old, knob.value, round(load, 3))
+        self.decisions.append(decision)
+        return decision
+
+    def summary_text(self):
+        """Satu baris untuk overlay: beban saat ini dan nilai knob."""
+        knobs = " ".join(f"{k.name}={k.value:g}" for k in self._knobs)
+        loads = self.stage_loads()
+        if list(loads) == [None]:
+            return f"load {loads[None] * 100:.0f}%  {knobs}"
+        text = " ".join(f"{stage} {load * 100:.0f}%" for stage, load in loads.items())
+        return f"load {text}  {knobs}"
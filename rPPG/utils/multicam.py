@@ -0,0 +1,338 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .quality import SignalQuality, _REASONS
+from .vitals import Vitals
+from .beats import BeatStats
+
+# Modul ini sendiri tidak mengimpor Qt. Namun dengan "spawn" setiap proses worker juga mengimpor ulang
+# skrip utama sebagai __mp_main__ (mis. main.py beserta PyQt5 dan seluruh utils), sehingga biaya startup
+# worker mengikuti import tingkat atas skrip yang menjalankan MultiCameraHost.
+
+MAX_ROIS = 16 # Dahi + kedua pipi + grid 3x3 muat dalam batas ini
+# Alasan jendela tidak layak (utils.quality), dikodekan sebagai indeks; 0 = layak
+QUALITY_REASONS = ("",) + tuple(_REASONS.values())
+
+# Satu frame terbaru beserta hasil analisis kamera, hasil salinan dari slot shared memory
+# dsp_count bertambah setiap kali HR/waveform dihitung ulang; quality/vitals/beats None bila belum ada;
+# fs = laju sampel waveform (Hz) sesuai resampling analyzer di worker, 0 bila belum ada
+CameraFrame = namedtuple("CameraFrame", ["seq", "timestamp", "frame_bgr", "hr", "confidence", "quality",
+                                         "dsp_count", "roi_rects", "waveform", "vitals", "beats", "fs"])
+
+
+def _meta_dtype(waveform_len):
+    return np.dtype([
+        ("seq", "<i8"), # -1 selama slot sedang ditulis
+        ("t", "<f8"),
+        ("height", "<i4"), ("width", "<i4"), # Ukuran frame di dalam slot (<= ukuran slot)
+        ("hr", "<f4"),
+        ("confidence", "<f4"),
+        ("dsp_count", "<i8"),
+        ("has_quality", "u1"),
+        ("usable", "u1"),
+        ("reason", "u1"),
+        ("quality", "<f4", (5,)), # index, band_ratio, saturation, motion, presence
+        ("has_vitals", "u1"),
+        ("vitals", "<f4", (4,)), # respiration_rpm, hrv_bpm, hr_bpm, window_s
+        ("has_beats", "u1"),
+        ("beats", "<f4", (4,)), # hr_bpm, rmssd_ms, sdnn_ms, beats
+        ("n_rois", "<i4"),
+        ("rois", "<i4", (MAX_ROIS, 4)),
+        ("n_wave", "<i4"),
+        ("fs", "<f4"), # Laju sampel waveform
+        ("wave", "<f4", (waveform_len,)),
+    ])
+
+
+def _reason_code(quality):
+    if quality is None or quality.usable:
+        return 0
+    return QUALITY_REASONS.index(quality.reason) if quality.reason in QUALITY_REASONS else 0
+
+
+class SharedFrameRing:
+    """
+    Ring slot frame + hasil di satu blok multiprocessing.shared_memory, untuk satu
+    penulis (proses kamera) dan satu pembaca (GUI) tanpa pickling. Setiap slot
+    diberi nomor urut: penulis menandainya -1 selama menulis, pembaca memilih
+    nomor urut terbesar dan membuang salinannya bila nomor itu berubah selama
+    penyalinan (ditimpa penulis).
+    """
+    def __init__(self, slots=4, height=360, width=640, waveform_len=300, name=None):
+        self.slots = slots
+        self.height = height
+        self.width = width
+        self.waveform_len = waveform_len
+        meta_dtype = _meta_dtype(waveform_len)
+        meta_bytes = slots * meta_dtype.itemsize
+        self._frames_offset = (meta_bytes + 63) // 64 * 64 # Frame disejajarkan 64 byte
+        size = self._frames_offset + slots * height * width * 3
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.meta = np.ndarray(slots, dtype=meta_dtype, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=self._frames_offset)
+        if self.owner:
+            self.meta["seq"] = -1
+        self._next_slot = 0
+        self._seq = 0
+
+    @property
+    def spec(self):
+        """Parameter untuk membuka ring yang sama dari proses lain (picklable)."""
+        return {"slots": self.slots, "height": self.height, "width": self.width,
+                "waveform_len": self.waveform_len, "name": self.shm.name}
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(**spec)
+
+    def write(self, frame_bgr, timestamp, hr=0.0, confidence=0.0, quality=None, dsp_count=0, roi_rects=(),
+              waveform=None, vitals=None, beats=None, fs=0.0):
+        """Tulis frame (diperkecil agar muat di slot, rasio aspek dipertahankan) beserta hasil analisis."""
+        h, w = frame_bgr.shape[:2]
+        scale = min(1.0, self.height / h, self.width / w)
+        if scale < 1.0:
+            w, h = max(1, int(w * scale)), max(1, int(h * scale))
+            frame_bgr = cv2.resize(frame_bgr, (w, h), interpolation=cv2.INTER_AREA)
+
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.slots
+        meta = self.meta[slot]
+        meta["seq"] = -1
+        self.frames[slot, :h, :w] = frame_bgr
+        meta["t"] = timestamp
+        meta["height"], meta["width"] = h, w
+        meta["hr"] = hr
+        meta["confidence"] = confidence
+        meta["dsp_count"] = dsp_count
+        meta["has_quality"] = quality is not None
+        if quality is not None:
+            meta["usable"] = quality.usable
+            meta["reason"] = _reason_code(quality)
+            meta["quality"] = (quality.index, quality.band_ratio, quality.saturation, quality.motion,
+                               quality.presence)
+        meta["has_vitals"] = vitals is not None
+        if vitals is not None:
+            meta["vitals"] = vitals
+        meta["has_beats"] = beats is not None
+        if beats is not None:
+            meta["beats"] = beats
+        n_rois = min(len(roi_rects), MAX_ROIS)
+        if n_rois:
+            # ROI ikut diskalakan ke koordinat frame di slot
+            meta["rois"][:n_rois] = np.round(np.asarray(roi_rects[:n_rois], dtype=np.float64) * scale)
+        meta["n_rois"] = n_rois
+        n_wave = 0
+        if waveform is not None and len(waveform):
+            waveform = np.asarray(waveform[-self.waveform_len:], dtype=np.float32)
+            n_wave = len(waveform)
+            meta["wave"][:n_wave] = waveform
+        meta["n_wave"] = n_wave
+        meta["fs"] = fs
+        meta["seq"] = self._seq # Slot baru terlihat oleh pembaca setelah semua isinya ditulis
+        self._seq += 1
+
+    def read_latest(self, after_seq=-1):
+        """CameraFrame terbaru bila nomor urutnya > after_seq, selain itu None."""
+        seqs = self.meta["seq"]
+        slot = int(np.argmax(seqs))
+        seq = int(seqs[slot])
+        if seq < 0 or seq <= after_seq:
+            return None
+        meta = self.meta[slot].copy()
+        h, w = int(meta["height"]), int(meta["width"])
+        frame = self.frames[slot, :h, :w].copy()
+        if int(self.meta["seq"][slot]) != seq:
+            return None # Slot ditimpa selama disalin
+        rois = [tuple(int(v) for v in r) for r in meta["rois"][:meta["n_rois"]]]
+        quality = None
+        if meta["has_quality"]:
+            index, band_ratio, saturation, motion, presence = (float(v) for v in meta["quality"])
+            quality = SignalQuality(index, bool(meta["usable"]), band_ratio, saturation, motion, presence,
+                                    QUALITY_REASONS[meta["reason"]])
+        vitals = Vitals(*(float(v) for v in meta["vitals"])) if meta["has_vitals"] else None
+        beats = None
+        if meta["has_beats"]:
+            hr_bpm, rmssd_ms, sdnn_ms, count = (float(v) for v in meta["beats"])
+            beats = BeatStats(hr_bpm, rmssd_ms, sdnn_ms, int(count))
+        return CameraFrame(seq, float(meta["t"]), frame, float(meta["hr"]), float(meta["confidence"]), quality,
+                           int(meta["dsp_count"]), rois, meta["wave"][:meta["n_wave"]].copy(), vitals, beats,
+                           float(meta["fs"]))
+
+    def close(self):
+        # View NumPy dilepas lebih dulu agar buffer shared memory bisa ditutup
+        self.meta = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _camera_worker(index, source, spec, config, stop_event, errors):
+    """Proses per kamera: capture, deteksi + pelacakan, dan DSP HealthAnalyzer, hasilnya ke ring."""
+    # Import di dalam proses worker; modul induk tidak perlu memuat MediaPipe
+    from .signal_processing import HealthAnalyzer
+    from .tracking import FaceTrackingController, AdaptiveInferenceController
+
+    ring = SharedFrameRing.attach(spec)
+    cap = analyzer = None
+    try:
+        fps = config.get("fps", 30)
+        analyzer = HealthAnalyzer(face_model_path=config["face_model_path"], fps=fps, running_mode="video",
+                                  **config.get("analyzer", {}))
+        tracking = FaceTrackingController(controller=AdaptiveInferenceController(1, max(1, int(fps) // 2)))
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise IOError(f"Tidak dapat membuka sumber: {source}")
+        is_file = isinstance(source, str)
+        # File diputar sesuai FPS-nya agar tampil seperti kamera langsung
+        frame_period = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or fps) if is_file else 0.0
+        process_interval = max(1, config.get("process_interval", int(fps) // 2))
+        frames_since_process = 0
+        filtered, hr, wave_fs = [], 0.0, 0.0
+        dsp_count = 0
+        frame = None
+        next_frame_time = time.monotonic()
+        while not stop_event.is_set():
+            ret, frame = cap.read(frame) if frame is not None else cap.read()
+            if not ret:
+                break
+            t = time.monotonic()
+            if not is_file and config.get("mirror", True):
+                frame = cv2.flip(frame, 1)
+
+            detection = None
+            if tracking.should_detect():
+                detection = analyzer.detect_faces_in_frame(frame, timestamp_ms=int(t * 1000),
+                                                           prev_bbox=tracking.current_bbox())
+            face_bbox = tracking.update(frame, detection)
+            if face_bbox is not None:
+                analyzer.process_rppg_from_bbox(frame, face_bbox, timestamp=t, draw_roi=False)
+            else:
+                analyzer.note_missing_face(t)
+
+            frames_since_process += 1
+            if frames_since_process >= process_interval and len(analyzer.rppg_signal_buffer) >= analyzer.min_signal_length:
+                frames_since_process = 0
+                filtered, hr = analyzer.filter_and_calculate_hr()
+                wave_fs = analyzer.waveform_fs # Laju hasil resampling, bukan FPS nominal
+                dsp_count += 1
+            roi_rects = analyzer.last_roi_rects if face_bbox is not None else ()
+            ring.write(frame, t, hr, analyzer.hr_confidence, analyzer.last_quality, dsp_count, roi_rects, filtered,
+                       analyzer.last_vitals, analyzer.last_beats, wave_fs)
+
+            if frame_period:
+                next_frame_time += frame_period
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.monotonic()
+    except Exception as e:
+        errors.put((index, f"{type(e).__name__}: {e}"))
+    finally:
+        if cap is not None:
+            cap.release()
+        if analyzer is not None and analyzer.face_detector is not None:
+            analyzer.face_detector.close() # Ditutup sebelum interpreter worker dimatikan
+        ring.close()
+
+
+class MultiCameraHost:
+    """
+    Satu proses worker per kamera/file (capture, MediaPipe, dan DSP tidak berbagi GIL).
+    Frame dan hasil dikirim lewat SharedFrameRing; hanya pesan error yang melalui antrian.
+    """
+    def __init__(self, sources, face_model_path, fps=30, slot_size=(360, 640), slots=4, process_interval=None,
+                 waveform_len=300, mirror=True, analyzer_config=None):
+        if not sources:
+            raise ValueError("Minimal satu sumber kamera/file diperlukan")
+        self.sources = list(sources)
+        self.config = {
+            "face_model_path": os.path.abspath(face_model_path),
+            "fps": fps,
+            "process_interval": process_interval or max(1, int(fps) // 2),
+            "mirror": mirror,
+            "analyzer": dict(analyzer_config or {}),
+        }
+        self.slot_size = slot_size
+        self.slots = slots
+        self.waveform_len = waveform_len
+        self.rings = []
+        self.processes = []
+        self.errors = {} # indeks kamera -> pesan error
+        self._last_seq = []
+        # "spawn": MediaPipe dan OpenCV memakai thread internal yang tidak aman untuk fork
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = None
+        self._error_queue = None
+
+    def start(self):
+        self._stop_event = self._ctx.Event()
+        self._error_queue = self._ctx.Queue()
+        height, width = self.slot_size
+        for index, source in enumerate(self.sources):
+            ring = SharedFrameRing(self.slots, height, width, self.waveform_len)
+            process = self._ctx.Process(target=_camera_worker, name=f"rppg-camera-{index}", daemon=True,
+                                        args=(index, source, ring.spec, self.config, self._stop_event,
+                                              self._error_queue))
+            process.start()
+            self.rings.append(ring)
+            self.processes.append(process)
+            self._last_seq.append(-1)
+
+    def latest(self, index):
+        """CameraFrame baru dari kamera `index` sejak pemanggilan sebelumnya, atau None."""
+        frame = self.rings[index].read_latest(self._last_seq[index])
+        if frame is not None:
+            self._last_seq[index] = frame.seq
+        return frame
+
+    def poll_errors(self):
+        """Pesan error baru dari worker, {indeks: pesan}."""
+        new = {}
+        while True:
+            try:
+                index, message = self._error_queue.get_nowait()
+            except queue.Empty:
+                break
+            new[index] = message
+        self.errors.update(new)
+        return new
+
+    def is_running(self, index):
+        return self.processes[index].is_alive()
+
+    def stop(self, timeout=3.0):
+        if self._stop_event is None:
+            return
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
+        for ring in self.rings:
+            ring.close()
+        self._error_queue.close()
+        self.rings, self.processes, self._last_seq = [], [], []
+        self._stop_event = None
+
+
+def grid_shape(count):
+    """(baris, kolom) untuk menata `count` tile sedekat mungkin dengan persegi."""
+    cols = max(1, math.ceil(math.sqrt(count)))
+    return math.ceil(count / cols), cols
@@ -0,0 +1,270 @@
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+import scipy.signal as signal
+
+from .signal_processing import HealthAnalyzer
+from .tracking import FaceTrackingController, AdaptiveInferenceController
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+
+
+class OfflineResult:
+    """Hasil pemrosesan satu file video: HR per jendela, trace mentah, dan trace terfilter."""
+    def __init__(self, video_path, fps):
+        self.video_path = video_path
+        self.fps = fps
+        self.frame_count = 0
+        self.elapsed_s = 0.0
+        self.read_s = 0.0 # Bagian elapsed_s yang dipakai untuk membaca/decode frame
+        self.hr_times = []
+        self.hr_values = []
+        self.hr_confidence = [] # Indeks kualitas sinyal (0..1) per estimasi; 0 bila HR tidak dipublikasikan
+        self.respiration_rpm = [] # Laju napas per estimasi (utils.vitals); 0 bila belum ada
+        self.hrv_bpm = [] # Proksi HRV per estimasi; 0 bila belum ada
+        self.instant_hr_bpm = [] # HR dari IBI terakhir per estimasi (utils.beats); 0 bila belum ada
+        self.rmssd_ms = []
+        self.sdnn_ms = []
+        self.beat_times = [] # Setiap IBI yang diterima detektor detak, ditandai waktu detak penutupnya
+        self.ibi_s = []
+        self.algorithm_hr = {} # Algoritma pembanding -> daftar HR, sejajar dengan hr_times
+        self.raw_times = np.zeros(0)
+        self.raw_values = np.zeros(0)
+        self.filtered_values = np.zeros(0)
+
+    def append_vitals(self, vitals):
+        self.respiration_rpm.append(vitals.respiration_rpm if vitals is not None else 0.0)
+        self.hrv_bpm.append(vitals.hrv_bpm if vitals is not None else 0.0)
+
+    def append_beats(self, beats, new_beats=()):
+        self.instant_hr_bpm.append(beats.hr_bpm if beats is not None else 0.0)
+        self.rmssd_ms.append(beats.rmssd_ms if beats is not None else 0.0)
+        self.sdnn_ms.append(beats.sdnn_ms if beats is not None else 0.0)
+        for t, ibi in new_beats:
+            self.beat_times.append(t)
+            self.ibi_s.append(ibi)
+
+    def summary(self):
+        valid = [hr for hr in self.hr_values if hr > 0]
+        breaths = [rate for rate in self.respiration_rpm if rate > 0]
+        return {
+            "video": self.video_path,
+            "frames": self.frame_count,
+            "samples": len(self.raw_values),
+            "mean_hr_bpm": float(np.mean(valid)) if valid else 0.0,
+            "mean_respiration_rpm": float(np.mean(breaths)) if breaths else 0.0,
+            "beats": len(self.ibi_s),
+            "processing_fps": self.frame_count / self.elapsed_s if self.elapsed_s > 0 else 0.0,
+        }
+
+
+def collect_videos(inputs, extensions=VIDEO_EXTENSIONS):
+    """Perluas daftar file/direktori menjadi daftar file video (rekursif untuk direktori)."""
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(os.path.join(root, f) for f in sorted(files)
+                              if f.lower().endswith(extensions))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"Input tidak ditemukan, dilewati: {path}")
+    return videos
+
+
+def _full_session_filter(analyzer, raw_values):
+    # Trace terfilter untuk seluruh sesi: standardisasi + filtfilt zero-phase sekali jalan
+    if len(raw_values) <= 3 * max(len(analyzer.rppg_a), len(analyzer.rppg_b)):
+        return np.zeros(len(raw_values))
+    std = np.std(raw_values)
+    standardized = (raw_values - np.mean(raw_values)) / std if std > 1e-6 else raw_values - np.mean(raw_values)
+    return signal.filtfilt(analyzer.rppg_b, analyzer.rppg_a, standardized)
+
+
+def process_video(video_path, analyzer, hop_seconds=0.5, tracking=None):
+    """
+    Jalankan pipeline HealthAnalyzer pada satu file video tanpa GUI. `video_path` juga
+    boleh berupa objek mirip cv2.VideoCapture (mis. SyntheticFaceVideo).
+    `analyzer` sebaiknya dibuat dengan running_mode="video"; buffernya dikosongkan di awal.
+    """
+    cap = video_path if hasattr(video_path, "read") else cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Tidak dapat membuka video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or analyzer.fps
+    result = OfflineResult(getattr(cap, "name", video_path), fps)
+    analyzer.clear_buffers()
+    if tracking is not None:
+        tracking.reset()
+
+    # Seluruh trace mentah disimpan (bukan hanya jendela ring buffer)
+    raw_times, raw_values = [], []
+    hop_frames = max(1, int(round(hop_seconds * fps)))
+    # Timestamp VIDEO harus terus naik meskipun detektor dipakai ulang antar file
+    base_ts_ms = analyzer._last_submitted_ts_ms + 1
+    frame = None
+    start = time.perf_counter()
+    while True:
+        read_start = time.perf_counter()
+        ret, frame = cap.read(frame) if frame is not None else cap.read()
+        result.read_s += time.perf_counter() - read_start
+        if not ret:
+            break
+        t = result.frame_count / fps
+        ts_ms = base_ts_ms + int(t * 1000)
+        result.frame_count += 1
+
+        if tracking is not None:
+            detection = None
+            if tracking.should_detect():
+                detection = analyzer.detect_faces_in_frame(frame, timestamp_ms=ts_ms, prev_bbox=tracking.current_bbox())
+            face_bbox = tracking.update(frame, detection)
+            value = None
+            if face_bbox is not None:
+                value = analyzer.process_rppg_from_bbox(frame, face_bbox, timestamp=t, draw_roi=False)
+            else:
+                analyzer.note_missing_face(t)
+        else:
+            detection = analyzer.detect_faces_in_frame(frame, timestamp_ms=ts_ms)
+            value = analyzer.process_rppg_from_face(frame, detection, timestamp=t, draw_roi=False)
+        if value is not None:
+            raw_times.append(t)
+            raw_values.append(value)
+
+        if result.frame_count % hop_frames == 0 and len(analyzer.rppg_signal_buffer) >= analyzer.min_signal_length:
+            _, hr = analyzer.filter_and_calculate_hr()
+            result.hr_times.append(t)
+            result.hr_values.append(hr)
+            result.hr_confidence.append(analyzer.hr_confidence)
+            result.append_vitals(analyzer.last_vitals)
+            result.append_beats(analyzer.last_beats, analyzer.last_new_beats)
+            for name in analyzer.compare_algorithms:
+                result.algorithm_hr.setdefault(name, []).append(analyzer.algorithm_rates.get(name, 0.0))
+    cap.release()
+    result.elapsed_s = time.perf_counter() - start
+
+    result.raw_times = np.asarray(raw_times)
+    result.raw_values = np.asarray(raw_values)
+    result.filtered_values = _full_session_filter(analyzer, result.raw_values)
+    return result
+
+
+def _write_table(path, columns, fmt):
+    if fmt == "parquet":
+        try:
+            import pandas as pd # Dependensi opsional, hanya untuk output Parquet
+        except ImportError as e:
+            raise RuntimeError("Output Parquet membutuhkan pandas dan pyarrow (pip install pandas pyarrow)") from e
+        pd.DataFrame(columns).to_parquet(path, index=False)
+        return
+    names = list(columns)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(*(columns[n] for n in names)))
+
+
+def write_result(result, output_dir, fmt="csv"):
+    """Tulis <nama>_hr, <nama>_raw, <nama>_filtered, dan <nama>_ibi ke output_dir. Kembalikan daftar path."""
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Format output tidak dikenal: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(result.video_path))[0]
+    tables = {
+        "hr": dict({"time_s": result.hr_times, "hr_bpm": result.hr_values, "confidence": result.hr_confidence,
+                    "respiration_rpm": result.respiration_rpm, "hrv_bpm": result.hrv_bpm,
+                    "instant_hr_bpm": result.instant_hr_bpm, "rmssd_ms": result.rmssd_ms,
+                    "sdnn_ms": result.sdnn_ms},
+                   **{f"hr_{name}_bpm": values for name, values in result.algorithm_hr.items()}),
+        "raw": {"time_s": result.raw_times.tolist(), "rppg_raw": result.raw_values.tolist()},
+        "filtered": {"time_s": result.raw_times.tolist(), "rppg_filtered": result.filtered_values.tolist()},
+        "ibi": {"beat_time_s": result.beat_times, "ibi_s": result.ibi_s},
+    }
+    paths = []
+    for name, columns in tables.items():
+        path = os.path.join(output_dir, f"{stem}_{name}.{fmt}")
+        _write_table(path, columns, fmt)
+        paths.append(path)
+    return paths
+
+
+# --- Pool proses: satu detektor MediaPipe per worker ---
+_worker_config = None
+_worker_analyzers = {}
+_worker_tracking = None
+
+
+def _init_worker(config):
+    global _worker_config, _worker_tracking
+    _worker_config = config
+    _worker_tracking = FaceTrackingController(controller=AdaptiveInferenceController(1, 15)) \
+        if config.get("use_tracker", True) else None
+
+
+def _worker_analyzer(fps):
+    # Analyzer (dan detektornya) dibuat sekali per worker untuk setiap FPS sumber yang berbeda
+    key = round(fps, 3)
+    if key not in _worker_analyzers:
+        _worker_analyzers[key] = HealthAnalyzer(
+            face_model_path=_worker_config["face_model_path"],
+            fps=fps,
+            filter_mode=_worker_config.get("filter_mode", "accurate"),
+            running_mode="video",
+            detection_max_side=_worker_config.get("detection_max_side"),
+            detection_crop_margin=_worker_config.get("detection_crop_margin"),
+            roi_mode=_worker_config.get("roi_mode", "forehead"),
+            skin_mask=_worker_config.get("skin_mask", False),
+            rppg_algorithm=_worker_config.get("rppg_algorithm", "green"),
+            compare_algorithms=_worker_config.get("compare_algorithms", ()),
+        )
+    return _worker_analyzers[key]
+
+
+def _process_in_worker(video_path):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or _worker_config.get("default_fps", 30)
+    cap.release()
+    analyzer = _worker_analyzer(fps)
+    result = process_video(video_path, analyzer, _worker_config.get("hop_seconds", 0.5), _worker_tracking)
+    write_result(result, _worker_config["output_dir"], _worker_config.get("format", "csv"))
+    return result.summary()
+
+
+def process_many(video_paths, output_dir, face_model_path="models/blaze_face_short_range.tflite",
+                 workers=None, fmt="csv", hop_seconds=0.5, filter_mode="accurate",
+                 detection_max_side=320, detection_crop_margin=0.75, use_tracker=True,
+                 roi_mode="forehead", skin_mask=False, rppg_algorithm="green", compare_algorithms=()):
+    """
+    Proses banyak video secara paralel dengan ProcessPoolExecutor. Setiap worker
+    memuat detektornya sendiri sekali. Kembalikan daftar ringkasan per video.
+    """
+    config = {
+        "output_dir": output_dir, "face_model_path": face_model_path, "format": fmt,
+        "hop_seconds": hop_seconds, "filter_mode": filter_mode,
+        "detection_max_side": detection_max_side, "detection_crop_margin": detection_crop_margin,
+        "use_tracker": use_tracker, "roi_mode": roi_mode, "skin_mask": skin_mask,
+        "rppg_algorithm": rppg_algorithm, "compare_algorithms": tuple(compare_algorithms),
+    }
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    summaries = []
+    # "spawn": MediaPipe dan OpenCV memakai thread internal yang tidak aman untuk fork
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(config,)) as pool:
+        futures = {pool.submit(_process_in_worker, path): path for path in video_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                summary = {"video": path, "error": str(e)}
+                print(f"Gagal memproses {path}: {e}")
+            else:
+                print(f"Selesai: {path} ({summary['frames']} frame, HR rata-rata {summary['mean_hr_bpm']:.1f} BPM)")
+            summaries.append(summary)
+    return summaries
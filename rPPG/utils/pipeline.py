@@ -0,0 +1,450 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from .tracking import bbox_from_detection
+from .instrumentation import PerfMonitor
+
+# Paket data yang mengalir antar stage
+FramePacket = namedtuple("FramePacket", ["index", "timestamp", "frame_bgr"])
+DetectionPacket = namedtuple("DetectionPacket", ["index", "timestamp", "result"])
+# quality: SignalQuality estimasi terakhir (confidence HR = quality.index), vitals: laju napas + proksi HRV
+# (utils.vitals.Vitals), beats: HR sesaat + RMSSD/SDNN (utils.beats.BeatStats). Pada mode multi-subjek
+# quality milik subjek utama, vitals dan beats None
+PipelineResult = namedtuple("PipelineResult", ["index", "timestamp", "frame_bgr", "filtered_rppg", "hr",
+                                               "roi_rects", "spectrum", "subjects", "quality", "vitals",
+                                               "beats"],
+                            defaults=(None, None, None, None))
+# Ringkasan satu subjek untuk GUI (mode multi-subjek); quality: SignalQuality estimasi terakhir subjek itu
+SubjectSnapshot = namedtuple("SubjectSnapshot", ["id", "bbox", "hr", "quality"], defaults=(None,))
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class DropOldestQueue:
+    """
+    Antrian berkapasitas tetap: put() tidak pernah memblokir producer,
+    item terlama dibuang jika antrian penuh. `on_drop(item)` dipanggil untuk
+    item yang dibuang (mis. mengembalikan frame ke FramePool).
+    """
+    def __init__(self, maxsize, on_drop=None):
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        dropped = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1 # deque(maxlen) otomatis membuang item terlama
+                dropped = self._items[0]
+            self._items.append(item)
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """Ambil item terlama; None jika timeout. QueueClosed jika antrian ditutup dan kosong."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            if self._closed:
+                raise QueueClosed()
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FramePool:
+    """
+    Kumpulan buffer frame yang dialokasikan sekali dan dipakai bergiliran,
+    sehingga capture tidak mengalokasikan array baru di setiap frame.
+
+    Kepemilikan eksplisit: acquire() memberi slot bebas dengan satu hold,
+    retain() menambah hold (mis. satu per antrian tujuan), dan setiap pemegang
+    memanggil release() setelah selesai (antrian saat membuang item, detektor,
+    pipeline saat hasil ditimpa, GUI setelah frame ditampilkan). Slot baru
+    kembali bebas saat hold-nya nol. Jika tidak ada slot bebas, acquire()
+    mengembalikan None (capture mengalokasikan frame baru) dan `misses` bertambah.
+    Frame yang bukan berasal dari pool diabaikan oleh retain()/release().
+    """
+    def __init__(self, count):
+        self.count = max(2, count)
+        self._slots = None
+        self._holds = []
+        self._free = deque()
+        self._index = {} # id(array) -> indeks slot
+        self._lock = threading.Lock()
+        self.misses = 0 # Frame yang terpaksa dialokasikan baru karena pool penuh
+
+    @property
+    def available(self):
+        return len(self._free)
+
+    def acquire(self):
+        with self._lock:
+            if self._slots is None:
+                return None # Belum tahu ukuran frame: biarkan cap.read() mengalokasikan
+            if not self._free:
+                self.misses += 1
+                return None
+            i = self._free.popleft()
+            self._holds[i] = 1
+            return self._slots[i]
+
+    def _slot_index(self, frame):
+        i = self._index.get(id(frame))
+        return i if i is not None and self._slots[i] is frame else None
+
+    def retain(self, frame, n=1):
+        with self._lock:
+            i = self._slot_index(frame)
+            if i is not None:
+                self._holds[i] += n
+
+    def release(self, frame):
+        if frame is None:
+            return
+        with self._lock:
+            i = self._slot_index(frame)
+            if i is None or self._holds[i] <= 0:
+                return
+            self._holds[i] -= 1
+            if self._holds[i] == 0:
+                self._free.append(i)
+
+    def adopt(self, frame):
+        """Alokasikan (ulang) pool jika frame tidak berasal dari pool (ukuran frame pertama/berubah)."""
+        with self._lock:
+            if self._slots is None or self._slots[0].shape != frame.shape:
+                # Slot lama yang masih beredar tidak lagi dikenali, sehingga tidak pernah dipakai ulang
+                self._slots = [np.empty_like(frame) for _ in range(self.count)]
+                self._holds = [0] * self.count
+                self._free = deque(range(self.count))
+                self._index = {id(slot): i for i, slot in enumerate(self._slots)}
+
+
+class _StageThread(threading.Thread):
+    def __init__(self, name, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.stop_event = stop_event
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if not self.step():
+                    break
+        except QueueClosed:
+            pass
+        except Exception as e:
+            self.error = e
+            print(f"Error di thread {self.name}: {e}")
+
+    def step(self):
+        raise NotImplementedError
+
+
+class CaptureWorker(_StageThread):
+    """Membaca frame dari kamera, flip horizontal, dan memberi timestamp monotonic."""
+    def __init__(self, cap, output_queues, stop_event, mirror=True, pool_size=34, perf=None):
+        super().__init__("rppg-capture", stop_event)
+        self.cap = cap
+        self.perf = perf or PerfMonitor(enabled=False)
+        self.output_queues = output_queues
+        self.mirror = mirror
+        self.pool = FramePool(pool_size)
+        self.frame_index = 0
+        self.read_failures = 0
+
+    def step(self):
+        slot = self.pool.acquire()
+        if slot is None and self.pool.misses:
+            self.perf.set_counter("frame_pool_misses", self.pool.misses)
+        # cap.read menulis langsung ke buffer pool jika ukurannya cocok
+        with self.perf.measure("capture"):
+            ret, frame = self.cap.read(slot) if slot is not None else self.cap.read()
+        timestamp = time.monotonic()
+        if not ret:
+            self.pool.release(slot)
+            self.read_failures += 1
+            self.perf.count("capture_failures")
+            time.sleep(0.01)
+            return True
+        if frame is not slot:
+            self.pool.release(slot) # cap.read tidak memakai buffer pool (mis. ukuran frame berubah)
+            self.pool.adopt(frame)
+        if self.mirror:
+            cv2.flip(frame, 1, dst=frame) # Flip horizontal in-place agar seperti cermin
+        packet = FramePacket(self.frame_index, timestamp, frame)
+        self.frame_index += 1
+        # Satu hold per antrian tujuan; hold milik capture diteruskan ke antrian pertama
+        self.pool.retain(frame, len(self.output_queues) - 1)
+        for q in self.output_queues:
+            q.put(packet)
+        return True
+
+
+class DetectorWorker(_StageThread):
+    """
+    Menjalankan deteksi wajah pada frame terbaru yang tersedia. Hasil terakhir
+    disimpan di slot bersama sehingga stage DSP tidak pernah menunggu detektor.
+    """
+    def __init__(self, analyzer, input_queue, stop_event, inference_interval=1, tracking=None, load_controller=None,
+                 frame_pool=None):
+        super().__init__("rppg-detector", stop_event)
+        # Frame dikembalikan ke pool setelah diproses (deteksi tidak menyimpan frame)
+        self.frame_pool = frame_pool
+        self.analyzer = analyzer
+        self.input_queue = input_queue
+        self.inference_interval = max(1, inference_interval)
+        # Jika ada FaceTrackingController, interval inferensi diatur secara adaptif olehnya
+        self.tracking = tracking
+        # LoadSheddingController: diberi waktu stage detektor untuk setiap frame yang diambil
+        self.load_controller = load_controller
+        self._lock = threading.Lock()
+        self._latest = None
+        self._frames_seen = 0
+
+    def latest_detection(self):
+        with self._lock:
+            return self._latest
+
+    def detection_for(self, packet):
+        """Hasil deteksi yang dipasangkan dengan frame: per timestamp pada mode live_stream, selain itu hasil terakhir."""
+        if self.analyzer.running_mode == "live_stream":
+            ts_ms, result = self.analyzer.get_timed_detection_for(int(packet.timestamp * 1000))
+            return DetectionPacket(None, ts_ms / 1000.0, result) if result is not None else None
+        return self.latest_detection()
+
+    def step(self):
+        packet = self.input_queue.get(timeout=0.1)
+        if packet is None:
+            return True
+        start = time.perf_counter()
+        detected = self._process(packet)
+        if self.frame_pool is not None:
+            self.frame_pool.release(packet.frame_bgr)
+        if self.load_controller is not None:
+            # Frame yang dilewati ikut tercatat (~0), sehingga menjarangkan deteksi menurunkan beban rata-rata
+            elapsed = time.perf_counter() - start
+            if detected and self.analyzer.running_mode == "live_stream":
+                # detect_async hanya mengirim frame; inferensi berjalan di thread MediaPipe
+                elapsed += self.analyzer.last_async_latency_s
+            self.load_controller.observe(elapsed, stage="detect")
+        return True
+
+    def _process(self, packet):
+        if self.tracking is not None:
+            run_inference = self.tracking.should_detect()
+        else:
+            run_inference = (self._frames_seen % self.inference_interval == 0)
+        self._frames_seen += 1
+        if not run_inference:
+            return False
+        # Box terakhir yang diketahui memungkinkan detektor bekerja pada crop di sekitarnya
+        if self.tracking is not None:
+            prev_bbox = self.tracking.current_bbox()
+        else:
+            prev_bbox = bbox_from_detection(self._latest.result) if self._latest is not None else None
+        # Pada mode live_stream pemanggilan ini tidak menunggu inferensi selesai
+        result = self.analyzer.detect_faces_in_frame(packet.frame_bgr, timestamp_ms=int(packet.timestamp * 1000),
+                                                     prev_bbox=prev_bbox)
+        with self._lock:
+            self._latest = DetectionPacket(packet.index, packet.timestamp, result)
+        return True
+
+
+class DspWorker(_StageThread):
+    """
+    Mengambil sampel rPPG dari setiap frame memakai deteksi terakhir, lalu
+    menjalankan filter & estimasi HR setiap `process_interval` frame.
+    Satu-satunya thread yang menyentuh buffer HealthAnalyzer.
+    """
+    def __init__(self, analyzer, input_queue, detector, stop_event, process_interval, on_result, tracking=None,
+                 subjects=None, load_controller=None):
+        super().__init__("rppg-dsp", stop_event)
+        self.analyzer = analyzer
+        self.perf = analyzer.perf
+        self.tracking = tracking
+        # MultiSubjectAnalyzer: semua wajah diukur, plot/HR utama mengikuti subjek terdekat
+        self.subjects = subjects
+        self.input_queue = input_queue
+        self.detector = detector
+        self.process_interval = max(1, process_interval)
+        self.on_result = on_result
+        # LoadSheddingController: diberi waktu proses setiap frame di stage ini
+        self.load_controller = load_controller
+        self._frames_since_last_process = 0
+        self.last_filtered_rppg = []
+        self.last_hr = 0.0
+        self.last_spectrum = None
+        self.last_quality = None
+        self.last_vitals = None
+        self.last_beats = None
+
+    def step(self):
+        packet = self.input_queue.get(timeout=0.1)
+        if packet is None:
+            return True
+        start = time.perf_counter()
+        self._process(packet)
+        if self.load_controller is not None:
+            # Waktu proses satu frame (tanpa waktu tunggu antrian) sebagai latensi stage DSP
+            self.load_controller.observe(time.perf_counter() - start, stage="dsp")
+        return True
+
+    def _process(self, packet):
+        # Frame tidak diubah (tanpa salinan): ROI dikirim terpisah dan digambar sebagai overlay oleh GUI
+        frame = packet.frame_bgr
+        detection = self.detector.detection_for(packet)
+        detection_result = detection.result if detection is not None else None
+        roi_rects = []
+        if self.subjects is not None:
+            self._step_subjects(packet, detection_result)
+            return
+        if self.tracking is not None:
+            # Box dilacak setiap frame
+            face_bbox = self.tracking.update(frame, detection_result)
+            if face_bbox is not None:
+                self.analyzer.process_rppg_from_bbox(frame, face_bbox, timestamp=packet.timestamp, draw_roi=False)
+                roi_rects = list(self.analyzer.last_roi_rects)
+            else:
+                self.analyzer.note_missing_face(packet.timestamp)
+        else:
+            # Tanpa deteksi pun frame tetap dicatat (rasio kehadiran wajah pada indeks kualitas)
+            self.analyzer.process_rppg_from_face(frame, detection_result, timestamp=packet.timestamp, draw_roi=False)
+            roi_rects = list(self.analyzer.last_roi_rects)
+
+        self._frames_since_last_process += 1
+        if self._frames_since_last_process >= self.process_interval:
+            self._frames_since_last_process = 0
+            if len(self.analyzer.rppg_signal_buffer) >= self.analyzer.min_signal_length:
+                self.last_filtered_rppg, self.last_hr = self.analyzer.filter_and_calculate_hr()
+                self.last_spectrum = self.analyzer.last_spectrum
+                self.last_quality = self.analyzer.last_quality
+                self.last_vitals = self.analyzer.last_vitals
+                self.last_beats = self.analyzer.last_beats
+            else: # Jika sinyal belum cukup, tampilkan buffer mentah
+                self.last_filtered_rppg = self.analyzer.rppg_signal_buffer.values().tolist()
+
+        self.on_result(PipelineResult(packet.index, packet.timestamp, frame, self.last_filtered_rppg, self.last_hr,
+                                      roi_rects, self.last_spectrum, quality=self.last_quality,
+                                      vitals=self.last_vitals, beats=self.last_beats))
+
+    def _step_subjects(self, packet, detection_result):
+        with self.perf.measure("roi"):
+            self.subjects.process_frame(packet.frame_bgr, detection_result, packet.timestamp)
+        self._frames_since_last_process += 1
+        if self._frames_since_last_process >= self.process_interval:
+            self._frames_since_last_process = 0
+            with self.perf.measure("dsp"):
+                self.subjects.compute_hr()
+            primary = self.subjects.primary_track()
+            self.last_filtered_rppg = primary.filtered if primary is not None else []
+            self.last_hr = primary.hr if primary is not None else 0.0
+            self.last_spectrum = primary.spectrum if primary is not None else None
+            self.last_quality = primary.quality if primary is not None else None
+        tracks = self.subjects.active_tracks
+        roi_rects = [rect for track in tracks for rect in track.roi_rects]
+        snapshots = [SubjectSnapshot(t.id, t.bbox, t.hr, t.quality) for t in tracks]
+        self.on_result(PipelineResult(packet.index, packet.timestamp, packet.frame_bgr, self.last_filtered_rppg,
+                                      self.last_hr, roi_rects, self.last_spectrum, snapshots,
+                                      quality=self.last_quality))
+
+
+class RppgPipeline:
+    """
+    Pipeline bertingkat capture -> detect -> DSP, masing-masing di thread sendiri
+    dan dihubungkan oleh antrian drop-oldest. Konsumen (GUI) hanya mengambil
+    hasil terbaru lewat take_latest_result(); hasil lama ditimpa, tidak diantrikan.
+    """
+    def __init__(self, cap, analyzer, fps=30, inference_interval=3, process_interval=15,
+                 on_result_ready=None, mirror=True, tracking=None, subjects=None, load_controller=None):
+        self.stop_event = threading.Event()
+        # Detektor hanya butuh frame terbaru; DSP menampung ~1 detik frame agar sampel tidak hilang.
+        # Frame yang dibuang antrian langsung kembali ke pool.
+        self.detect_queue = DropOldestQueue(maxsize=1, on_drop=self._release_packet)
+        self.sample_queue = DropOldestQueue(maxsize=max(1, fps), on_drop=self._release_packet)
+        self.on_result_ready = on_result_ready
+        self.perf = analyzer.perf
+
+        self._result_lock = threading.Lock()
+        self._latest_result = None
+        self._result_pending = False
+
+        # Pool frame: semua tempat yang bisa memegang frame sekaligus, yaitu kedua antrian, frame yang sedang
+        # dibaca capture, diproses detektor dan DSP, hasil terbaru yang menunggu GUI, serta frame yang sedang
+        # ditampilkan GUI (dikembalikan lewat release_result)
+        pool_size = self.sample_queue.maxsize + self.detect_queue.maxsize + 5
+        self.capture = CaptureWorker(cap, [self.detect_queue, self.sample_queue], self.stop_event, mirror, pool_size,
+                                     self.perf)
+        self.frame_pool = self.capture.pool
+        self.detector = DetectorWorker(analyzer, self.detect_queue, self.stop_event, inference_interval, tracking,
+                                       load_controller, self.frame_pool)
+        self.dsp = DspWorker(analyzer, self.sample_queue, self.detector, self.stop_event,
+                             process_interval, self._publish_result, tracking, subjects, load_controller)
+
+    def _release_packet(self, packet):
+        self.frame_pool.release(packet.frame_bgr)
+
+    def _publish_result(self, result):
+        # Frame yang dibuang antrian DSP (DSP tertinggal dari kamera)
+        self.perf.set_counter("dropped_frames", self.sample_queue.dropped)
+        # Hold frame milik DSP berpindah ke hasil ini
+        with self._result_lock:
+            skipped = self._latest_result
+            self._latest_result = result
+            notify = not self._result_pending
+            self._result_pending = True
+        if skipped is not None:
+            self.perf.count("display_skipped") # Hasil belum sempat ditampilkan GUI, ditimpa
+            self.frame_pool.release(skipped.frame_bgr)
+        # Notifikasi hanya jika hasil sebelumnya sudah diambil, sehingga event GUI tidak menumpuk
+        if notify and self.on_result_ready is not None:
+            self.on_result_ready()
+
+    def take_latest_result(self):
+        """Hasil terbaru (atau None); pemanggil wajib memanggil release_result() setelah selesai memakai frame-nya."""
+        with self._result_lock:
+            result = self._latest_result
+            self._latest_result = None
+            self._result_pending = False
+        return result
+
+    def release_result(self, result):
+        """Kembalikan frame hasil ke pool, mis. setelah QImage yang membungkusnya dibuang."""
+        if result is not None:
+            self.frame_pool.release(result.frame_bgr)
+
+    @property
+    def dropped_frames(self):
+        return self.sample_queue.dropped
+
+    def start(self):
+        for worker in (self.dsp, self.detector, self.capture):
+            worker.start()
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        self.detect_queue.close()
+        self.sample_queue.close()
+        for worker in (self.capture, self.detector, self.dsp):
+            if worker.is_alive():
+                worker.join(timeout)
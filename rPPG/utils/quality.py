@@ -0,0 +1,141 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+
+# Indeks kualitas satu jendela beserta komponennya; reason diisi bila jendela tidak layak dipakai
+SignalQuality = namedtuple("SignalQuality", ["index", "usable", "band_ratio", "saturation", "motion",
+                                             "presence", "reason"])
+
+# Alasan yang ditampilkan untuk komponen dengan skor terendah
+_REASONS = {
+    "presence": "wajah tidak terdeteksi",
+    "saturation": "ROI jenuh (terlalu terang/gelap)",
+    "motion": "terlalu banyak gerakan",
+    "band": "sinyal pulsa lemah",
+}
+
+
+def roi_saturation(frame, rects, high=250, low=5, step=2):
+    """Fraksi piksel ROI yang terpotong (kanal maksimum >= high atau <= low), disampling tiap `step` piksel."""
+    clipped = total = 0
+    for x, y, w, h in rects:
+        patch = frame[y:y + h:step, x:x + w:step]
+        if patch.size == 0:
+            continue
+        peak = patch.max(axis=2)
+        clipped += np.count_nonzero((peak >= high) | (peak <= low))
+        total += peak.size
+    return clipped / total if total else 0.0
+
+
+def band_power_ratio(values, fs, lowcut, highcut):
+    """
+    Rasio kerapatan daya rata-rata di dalam pita HR terhadap di luar pita (tanpa DC),
+    setelah detrend linear dan jendela Hann. Bernilai ±1 untuk noise putih.
+    """
+    n = len(values)
+    if n < 8 or fs <= 0:
+        return 0.0
+    x = np.asarray(values, dtype=np.float64)
+    t = np.arange(n) - (n - 1) / 2.0
+    x = x - x.mean()
+    x = x - t * (np.dot(t, x) / np.dot(t, t)) # Detrend linear (bentuk tertutup)
+    power = np.abs(np.fft.rfft(x * np.hanning(n))) ** 2
+    freqs = np.fft.rfftfreq(n, 1.0 / fs)
+    in_band = (freqs >= lowcut) & (freqs <= highcut)
+    out_band = ~in_band
+    out_band[0] = False
+    if not in_band.any() or not out_band.any():
+        return 0.0
+    out_power = power[out_band].mean()
+    return float(power[in_band].mean() / out_power) if out_power > 0 else 0.0
+
+
+class SignalQualityMonitor:
+    """
+    Indeks kualitas sinyal yang murah per jendela: rasio daya dalam/luar pita HR,
+    saturasi ROI, energi gerak box wajah, dan rasio kehadiran wajah. Statistik
+    per frame dicatat lewat observe_frame(); assess() menggabungkan skor tiap
+    komponen (0..1) menjadi indeks = hasil kalinya, dipakai sebagai confidence HR.
+    Rasio pita (satu rFFT jendela penuh) hanya dihitung ulang setiap
+    band_interval_s sampel baru, sehingga pemanggilan per frame (mode
+    streaming) tetap murah; komponen per frame selalu terbaru.
+    """
+    def __init__(self, fs, lowcut, highcut, window_s=3.0, min_quality=0.2, good_band_ratio=4.0,
+                 max_saturation=0.25, max_motion=0.08, band_interval_s=0.5):
+        self.lowcut = lowcut
+        self.highcut = highcut
+        self.window_s = window_s # Jendela statistik per frame (kehadiran, saturasi, gerak)
+        self.min_quality = min_quality # None: confidence tetap dihitung, tanpa gating
+        self.good_band_ratio = good_band_ratio # Rasio dalam/luar pita yang dianggap skor penuh
+        self.max_saturation = max_saturation # Fraksi piksel terpotong yang membuat skor saturasi 0
+        self.max_motion = max_motion # RMS pergeseran box per frame (relatif lebar box) untuk skor gerak 0
+        # Per frame: (wajah ada, saturasi ROI, pergeseran box), dengan timestamp capture
+        self._frames = RingBuffer(int(np.ceil(window_s * fs * 2)) + 1, channels=3)
+        self._last_bbox = None
+        self._band_every = max(1, int(round(band_interval_s * fs))) # Sampel baru antar rFFT rasio pita
+        self._band_ratio = None
+        self._band_count = 0 # sample_count saat rasio pita terakhir dihitung
+
+    def reset(self):
+        self._frames.clear()
+        self._last_bbox = None
+        self._band_ratio = None
+
+    def observe_frame(self, timestamp, present, face_bbox=None, saturation=0.0):
+        """Catat satu frame; present=False berarti tidak ada wajah/sampel pada frame ini."""
+        if not present:
+            self._frames.append((0.0, 0.0, 0.0), timestamp)
+            self._last_bbox = None
+            return
+        motion = 0.0
+        if face_bbox is not None and self._last_bbox is not None and face_bbox[2] > 0:
+            x, y, w, h = face_bbox
+            px, py, pw, ph = self._last_bbox
+            dx = (x + w / 2.0) - (px + pw / 2.0)
+            dy = (y + h / 2.0) - (py + ph / 2.0)
+            motion = float(np.sqrt(dx * dx + dy * dy + (w - pw) ** 2)) / w
+        self._last_bbox = face_bbox
+        self._frames.append((1.0, saturation, motion), timestamp)
+
+    def frame_stats(self):
+        """(kehadiran, saturasi, gerak RMS) dalam window_s terakhir."""
+        if len(self._frames) == 0:
+            return 0.0, 0.0, 0.0
+        timestamps = self._frames.timestamps()
+        recent = self._frames.values()[int(np.searchsorted(timestamps, timestamps[-1] - self.window_s)):]
+        present = recent[:, 0] > 0
+        presence = float(present.mean())
+        if not present.any():
+            return presence, 0.0, 0.0
+        saturation = float(recent[present, 1].mean())
+        motion = float(np.sqrt(np.mean(recent[present, 2] ** 2)))
+        return presence, saturation, motion
+
+    def assess(self, values, fs, sample_count=None):
+        """
+        SignalQuality untuk jendela sinyal `values` berlaju `fs`. `sample_count` (jumlah
+        sampel yang pernah masuk jendela) mengaktifkan cache rasio pita; None: selalu dihitung.
+        """
+        presence, saturation, motion = self.frame_stats()
+        scores = {
+            "presence": presence,
+            "saturation": min(1.0, max(0.0, 1.0 - saturation / self.max_saturation)),
+            "motion": min(1.0, max(0.0, 1.0 - motion / self.max_motion)),
+        }
+        band_ratio = 0.0
+        if presence > 0: # Tanpa wajah, FFT pun tidak perlu dihitung
+            if sample_count is None or self._band_ratio is None or \
+                    not 0 <= sample_count - self._band_count < self._band_every:
+                self._band_ratio = band_power_ratio(values, fs, self.lowcut, self.highcut)
+                self._band_count = sample_count or 0
+            band_ratio = self._band_ratio
+        else:
+            self._band_ratio = None
+        scores["band"] = min(1.0, max(0.0, (band_ratio - 1.0) / (self.good_band_ratio - 1.0)))
+        index = float(np.prod(list(scores.values())))
+        usable = self.min_quality is None or index >= self.min_quality
+        reason = "" if usable else _REASONS[min(scores, key=scores.get)]
+        return SignalQuality(index, usable, band_ratio, saturation, motion, presence, reason)
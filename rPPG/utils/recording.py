@@ -0,0 +1,175 @@
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+# Format rekaman sesi (little-endian, append-only):
+#   header : MAGIC (8 B), versi (u16), ukuran record (u16), panjang metadata (u32), metadata JSON
+#   chunk  : CHUNK_MAGIC (4 B), jumlah record (u32), lalu record-record RECORD_DTYPE
+# Chunk ditulis utuh sekaligus; chunk terakhir yang terpotong (mis. aplikasi crash) diabaikan pembaca.
+MAGIC = b"RPPGREC\x00"
+VERSION = 1
+CHUNK_MAGIC = b"CHNK"
+_HEADER = struct.Struct("<8sHHI")
+_CHUNK_HEADER = struct.Struct("<4sI")
+RECORDING_EXTENSION = ".rppgrec"
+
+# Satu record per frame: timestamp capture, nilai rPPG, rata-rata RGB ROI, box wajah dan gabungan ROI
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("value", "<f4"),
+    ("rgb", "<f4", (3,)),
+    ("face", "<i2", (4,)), # x, y, w, h
+    ("roi", "<i2", (4,)), # Bounding box gabungan semua ROI, x, y, w, h
+    ("flags", "u1"),
+])
+FLAG_FACE = 1 # Wajah ditemukan dan sampel valid
+
+
+class SessionRecorder:
+    """
+    Perekam sesi ringkas (~41 byte per frame, ±75 KB per menit pada 30 FPS):
+    record ditampung di array terstruktur lalu ditulis per chunk ke file.
+    """
+    def __init__(self, path, metadata=None, chunk_size=256):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._chunk = np.zeros(chunk_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        self.records_written = 0
+        meta = json.dumps({"created": time.time(), **(metadata or {})}).encode("utf-8")
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, len(meta)))
+        self._file.write(meta)
+
+    def record(self, timestamp, value, rgb=None, face_bbox=None, roi_rects=()):
+        """Tambahkan satu frame; value None berarti tidak ada wajah/sampel pada frame ini."""
+        rec = self._chunk[self._count]
+        rec["t"] = timestamp
+        valid = value is not None and rgb is not None
+        rec["value"] = value if valid else np.nan
+        rec["rgb"] = rgb if valid else np.nan
+        rec["face"] = face_bbox if face_bbox is not None else 0
+        if len(roi_rects):
+            rects = np.asarray(roi_rects)
+            x0, y0 = rects[:, 0].min(), rects[:, 1].min()
+            rec["roi"] = (x0, y0, (rects[:, 0] + rects[:, 2]).max() - x0, (rects[:, 1] + rects[:, 3]).max() - y0)
+        else:
+            rec["roi"] = 0
+        rec["flags"] = FLAG_FACE if valid else 0
+        self._count += 1
+        if self._count == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._count == 0 or self._file is None:
+            return
+        self._file.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, self._count))
+        self._file.write(self._chunk[:self._count].tobytes())
+        self._file.flush()
+        self.records_written += self._count
+        self._count = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class SessionRecording:
+    """
+    Pembaca rekaman sesi berbasis memory map: setiap chunk berupa view
+    array terstruktur langsung ke file, tanpa salinan maupun decoding.
+    """
+    def __init__(self, path):
+        self.path = path
+        size = os.path.getsize(path)
+        if size < _HEADER.size:
+            raise ValueError(f"Bukan file rekaman rPPG: {path}")
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, record_size, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Bukan file rekaman rPPG: {path}")
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Versi rekaman tidak didukung: {version} (record {record_size} B)")
+        offset = _HEADER.size
+        self.metadata = json.loads(bytes(self._mm[offset:offset + meta_len]).decode("utf-8"))
+        offset += meta_len
+
+        self.chunks = []
+        while offset + _CHUNK_HEADER.size <= size:
+            chunk_magic, count = _CHUNK_HEADER.unpack_from(self._mm, offset)
+            data_start = offset + _CHUNK_HEADER.size
+            if chunk_magic != CHUNK_MAGIC or data_start + count * record_size > size:
+                break # Chunk terakhir terpotong
+            self.chunks.append(np.ndarray(count, dtype=RECORD_DTYPE, buffer=self._mm, offset=data_start))
+            offset = data_start + count * record_size
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def records(self):
+        """Seluruh record sebagai satu array (salinan; gunakan `chunks` untuk akses tanpa salinan)."""
+        if not self.chunks:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.concatenate(self.chunks)
+
+
+def replay_session(recording, analyzer, hop_seconds=0.5):
+    """
+    Umpankan rekaman langsung ke stage DSP HealthAnalyzer (tanpa detektor
+    maupun decoding video) dan estimasi HR setiap `hop_seconds`, dihitung dalam
+    frame rekaman seperti process_video. `analyzer` boleh dibuat tanpa model
+    (face_model_path=None). Kembalikan OfflineResult seperti process_video.
+    Saturasi ROI tidak direkam, sehingga indeks kualitas replay hanya memakai
+    kehadiran wajah, gerak box, dan rasio daya pita.
+    """
+    from .offline import OfflineResult, _full_session_filter
+
+    if not isinstance(recording, SessionRecording):
+        recording = SessionRecording(recording)
+    fps = recording.metadata.get("fps", analyzer.fps)
+    result = OfflineResult(recording.path, fps)
+    analyzer.clear_buffers()
+    hop_frames = max(1, int(round(hop_seconds * fps)))
+    start = time.perf_counter()
+    for chunk in recording.chunks:
+        # Konversi per chunk sekali, bukan per record
+        times = chunk["t"].astype(np.float64)
+        values = chunk["value"].astype(np.float64)
+        rgbs = chunk["rgb"].astype(np.float64)
+        faces = chunk["face"].tolist()
+        valid = (chunk["flags"] & FLAG_FACE) != 0
+        for i in range(len(chunk)):
+            result.frame_count += 1
+            if valid[i]:
+                analyzer.feed_sample(values[i], rgbs[i], times[i], faces[i])
+            else:
+                analyzer.note_missing_face(times[i])
+            if result.frame_count % hop_frames == 0 and len(analyzer.rppg_signal_buffer) >= analyzer.min_signal_length:
+                _, hr = analyzer.filter_and_calculate_hr()
+                result.hr_times.append(times[i])
+                result.hr_values.append(hr)
+                result.hr_confidence.append(analyzer.hr_confidence)
+                result.append_vitals(analyzer.last_vitals)
+                result.append_beats(analyzer.last_beats, analyzer.last_new_beats)
+                for name in analyzer.compare_algorithms:
+                    result.algorithm_hr.setdefault(name, []).append(analyzer.algorithm_rates.get(name, 0.0))
+    result.elapsed_s = time.perf_counter() - start
+
+    records = recording.records()
+    valid = records[(records["flags"] & FLAG_FACE) != 0]
+    result.raw_times = valid["t"].astype(np.float64)
+    result.raw_values = valid["value"].astype(np.float64)
+    result.filtered_values = _full_session_filter(analyzer, result.raw_values)
+    return result
@@ -0,0 +1,49 @@
+import numpy as np
+
+from .startup import lazy_import
+
+interpolate = lazy_import("scipy.interpolate") # Hanya untuk method="cubic"
+
+
+def estimate_effective_fs(timestamps):
+    """
+    Laju sampel efektif (Hz) dari timestamp monotonic: jumlah interval dibagi
+    rentang waktu, sehingga jitter QTimer maupun stall detektor ikut terhitung.
+    """
+    t = np.asarray(timestamps, dtype=np.float64)
+    if len(t) < 2:
+        return 0.0
+    span = t[-1] - t[0]
+    return (len(t) - 1) / span if span > 0 else 0.0
+
+
+def quantize_fs(fs, step=0.5):
+    # Pembulatan ke kelipatan `step` agar filter tidak didesain ulang karena fluktuasi kecil
+    return max(step, round(fs / step) * step)
+
+
+def resample_uniform(timestamps, values, fs, method="linear"):
+    """
+    Resample sampel bertimestamp (n,) atau (n, c) ke grid seragam berlaju `fs`.
+    Grid disejajarkan dengan sampel terbaru. Kembalikan (grid_waktu, nilai).
+    """
+    if method not in ("linear", "cubic"):
+        raise ValueError(f"Metode resampling tidak dikenal: {method}")
+    t = np.asarray(timestamps, dtype=np.float64)
+    v = np.asarray(values, dtype=np.float64)
+    # Buang timestamp duplikat/mundur (mis. dua sampel pada frame yang sama)
+    keep = np.concatenate(([True], np.diff(t) > 0))
+    if not keep.all():
+        t, v = t[keep], v[keep]
+    if len(t) < 2:
+        return t, v
+    n = int(np.floor((t[-1] - t[0]) * fs + 1e-9)) + 1
+    grid = t[-1] - np.arange(n - 1, -1, -1) / fs
+    if method == "cubic":
+        return grid, interpolate.CubicSpline(t, v, axis=0)(grid)
+    # Interpolasi linear yang tervektorisasi untuk semua kolom sekaligus
+    idx = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 2)
+    frac = np.clip((grid - t[idx]) / (t[idx + 1] - t[idx]), 0.0, 1.0)
+    if v.ndim == 2:
+        frac = frac[:, None]
+    return grid, v[idx] + (v[idx + 1] - v[idx]) * frac
@@ -0,0 +1,77 @@
+import time
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Buffer melingkar berkapasitas tetap berbasis array NumPy.
+
+    Setiap sampel ditulis dua kali (pada indeks i dan i + capacity) sehingga
+    jendela data terbaru selalu bisa dikembalikan sebagai view kontigu tanpa
+    salinan. Append bernilai O(1), tidak ada pergeseran data seperti list.pop(0).
+    """
+    def __init__(self, capacity, channels=None, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError(f"Kapasitas buffer harus positif, didapat {capacity}")
+        self.capacity = int(capacity)
+        self.channels = channels
+        shape = (2 * self.capacity,) if channels is None else (2 * self.capacity, channels)
+        self._data = np.zeros(shape, dtype=dtype)
+        self._timestamps = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._head = 0 # Posisi tulis berikutnya, selalu di rentang [0, capacity)
+        self._size = 0
+        self.total_appended = 0 # Jumlah sampel yang pernah masuk sejak clear terakhir
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def is_full(self):
+        return self._size == self.capacity
+
+    def append(self, value, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        h = self._head
+        mirror = h + self.capacity
+        self._data[h] = value
+        self._data[mirror] = value
+        self._timestamps[h] = timestamp
+        self._timestamps[mirror] = timestamp
+        self._head = h + 1 if h + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+        self.total_appended += 1
+
+    def _window(self, n):
+        n = self._size if n is None else max(0, min(int(n), self._size))
+        end = self._head + self.capacity
+        return end - n, end
+
+    def values(self, n=None):
+        """
+        View read-only kontigu berisi n sampel terbaru (default: seluruh isi buffer),
+        urut dari yang terlama. View hanya valid sampai append berikutnya;
+        salin dengan np.array(...) bila perlu disimpan lebih lama.
+        """
+        start, end = self._window(n)
+        view = self._data[start:end]
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self, n=None):
+        """View read-only timestamp yang sejajar dengan values(n)."""
+        start, end = self._window(n)
+        view = self._timestamps[start:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self):
+        if self._size == 0:
+            return None
+        return self._data[self._head + self.capacity - 1]
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self.total_appended = 0
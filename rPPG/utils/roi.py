@@ -0,0 +1,206 @@
+import cv2
+import numpy as np
+
+from .ring_buffer import RingBuffer
+from .spectral import _band_grid
+
+# Geometri ROI relatif terhadap box wajah (x, y, w, h): (dx, dy, dw, dh) dalam pecahan w/h
+ROI_LAYOUTS = {
+    "forehead": (0.25, -0.10, 0.50, 0.20), # Sama dengan ROI dahi lama
+    "left_cheek": (0.12, 0.50, 0.25, 0.22),
+    "right_cheek": (0.63, 0.50, 0.25, 0.22),
+}
+
+# Rentang warna kulit pada ruang YCrCb (Chai & Ngan)
+SKIN_CR_RANGE = (133, 173)
+SKIN_CB_RANGE = (77, 127)
+
+
+def layout_rects(face_bboxes, layouts, frame_w, frame_h):
+    """
+    Rect ROI (F * R, 4) berformat x0, y0, x1, y1 (terpotong ke frame) untuk
+    F box wajah (x, y, w, h) dan R layout relatif, dihitung sekaligus.
+    """
+    boxes = np.asarray(face_bboxes, dtype=np.float64).reshape(-1, 1, 4)
+    x, y, w, h = boxes[..., 0], boxes[..., 1], boxes[..., 2], boxes[..., 3]
+    lay = np.asarray(layouts, dtype=np.float64)
+    x0 = np.clip((x + lay[:, 0] * w).astype(int), 0, frame_w)
+    y0 = np.clip((y + lay[:, 1] * h).astype(int), 0, frame_h)
+    x1 = np.clip((x + (lay[:, 0] + lay[:, 2]) * w).astype(int), 0, frame_w)
+    y1 = np.clip((y + (lay[:, 1] + lay[:, 3]) * h).astype(int), 0, frame_h)
+    return np.stack([x0, y0, x1, y1], axis=-1).reshape(-1, 4)
+
+
+def _box_sums(integral, rects):
+    # Jumlah piksel di setiap rect dari integral image: 4 lookup per ROI
+    x0, y0, x1, y1 = rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3]
+    return integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+
+
+def integral_box_means(frame_bgr, rects, skin_mask=False, min_skin_fraction=0.2):
+    """
+    Rata-rata BGR (R, 3) untuk rect x0, y0, x1, y1 dari satu integral image yang
+    hanya mencakup area gabungan semua rect. Dengan skin_mask, hanya piksel kulit
+    YCrCb yang dirata-rata; rect kosong atau minim kulit bernilai NaN.
+    """
+    means = np.full((len(rects), 3), np.nan)
+    valid = (rects[:, 2] > rects[:, 0]) & (rects[:, 3] > rects[:, 1])
+    if not valid.any():
+        return means
+    ux0, uy0 = rects[valid, 0].min(), rects[valid, 1].min()
+    ux1, uy1 = rects[valid, 2].max(), rects[valid, 3].max()
+    crop = frame_bgr[uy0:uy1, ux0:ux1]
+    local = rects[valid] - np.array([ux0, uy0, ux0, uy0])
+    areas = ((local[:, 2] - local[:, 0]) * (local[:, 3] - local[:, 1])).astype(np.float64)
+
+    if skin_mask:
+        # Masker dihitung sekali untuk seluruh area, dipakai bersama oleh semua rect
+        ycrcb = cv2.cvtColor(crop, cv2.COLOR_BGR2YCrCb)
+        mask = cv2.inRange(ycrcb, (0, SKIN_CR_RANGE[0], SKIN_CB_RANGE[0]), (255, SKIN_CR_RANGE[1], SKIN_CB_RANGE[1]))
+        sums = _box_sums(cv2.integral(cv2.bitwise_and(crop, crop, mask=mask)), local)
+        counts = _box_sums(cv2.integral(mask), local) / 255.0
+        enough = counts >= min_skin_fraction * areas
+        roi_means = np.full((len(local), 3), np.nan)
+        roi_means[enough] = sums[enough] / counts[enough, None]
+    else:
+        roi_means = _box_sums(cv2.integral(crop), local) / areas[:, None]
+    means[valid] = roi_means
+    return means
+
+
+class MultiRoiExtractor:
+    """
+    Ekstraksi sinyal dari banyak ROI wajah sekaligus. Satu integral image
+    dihitung per frame (hanya pada area yang mencakup semua ROI), sehingga
+    rata-rata tiap ROI didapat dalam O(1) dan ROI tambahan hampir tanpa biaya.
+    Masker kulit YCrCb opsional dihitung sekali per frame untuk semua ROI.
+    ROI digabung dengan bobot sesuai SNR masing-masing. Rata-rata DC per ROI
+    disimpan sebagai jumlah berjalan (sampel masuk ditambah, sampel yang keluar
+    ring dikurangi), sehingga sample() tetap O(ROI) berapa pun panjang riwayatnya.
+    """
+    def __init__(self, regions=("forehead", "left_cheek", "right_cheek"), grid=None, skin_mask=False,
+                 fs=30, lowcut=0.67, highcut=4.0, history=300, weight_update_interval=15,
+                 min_skin_fraction=0.2):
+        for name in regions:
+            if name not in ROI_LAYOUTS:
+                raise ValueError(f"ROI tidak dikenal: {name}")
+        layouts = [ROI_LAYOUTS[name] for name in regions]
+        self.names = list(regions)
+        if grid is not None:
+            # Grid sub-patch di area pipi-hidung-dahi bawah box wajah
+            rows, cols = grid
+            for r in range(rows):
+                for c in range(cols):
+                    layouts.append((0.10 + 0.80 * c / cols, 0.05 + 0.80 * r / rows, 0.80 / cols, 0.80 / rows))
+                    self.names.append(f"grid_{r}_{c}")
+        self._layouts = np.array(layouts, dtype=np.float64)
+        self.skin_mask = skin_mask
+        self.fs = fs
+        self.lowcut = lowcut
+        self.highcut = highcut
+        self.weight_update_interval = max(1, weight_update_interval)
+        self.min_skin_fraction = min_skin_fraction
+        # Nilai tiap ROI (NaN jika ROI tidak valid pada frame itu), untuk estimasi SNR
+        self.roi_buffer = RingBuffer(history, channels=len(self._layouts))
+        self.reset()
+
+    def reset(self):
+        self.roi_buffer.clear()
+        # Jumlah dan cacah nilai finit per ROI di roi_buffer (NaN = ROI tidak valid, tidak dihitung)
+        self._dc_sum = np.zeros(len(self._layouts))
+        self._dc_count = np.zeros(len(self._layouts))
+        self.weights = np.full(len(self._layouts), 1.0 / len(self._layouts))
+        self.snr = np.zeros(len(self._layouts))
+        self.last_rects = []
+        self.last_means = None # Rata-rata BGR (R, 3) tiap ROI pada sampel terakhir
+        self._samples_since_weights = 0
+
+    def roi_means(self, frame_bgr, face_bbox):
+        """Rata-rata BGR (R, 3) setiap ROI; baris NaN untuk ROI kosong atau minim kulit."""
+        frame_h, frame_w = frame_bgr.shape[:2]
+        rects = layout_rects([face_bbox], self._layouts, frame_w, frame_h)
+        means = integral_box_means(frame_bgr, rects, self.skin_mask, self.min_skin_fraction)
+        valid = (rects[:, 2] > rects[:, 0]) & (rects[:, 3] > rects[:, 1])
+        self.last_rects = [(int(r[0]), int(r[1]), int(r[2] - r[0]), int(r[3] - r[1])) for r in rects[valid]]
+        return means
+
+    def _dc_means(self):
+        # nanmean per kolom tanpa RuntimeWarning untuk ROI yang seluruhnya NaN
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._dc_sum / self._dc_count
+
+    def _append(self, green):
+        buffer = self.roi_buffer
+        if buffer.is_full:
+            oldest = buffer.values()[0] # Sampel yang tertimpa append berikutnya
+            finite = np.isfinite(oldest)
+            self._dc_sum[finite] -= oldest[finite]
+            self._dc_count -= finite
+        buffer.append(green)
+        finite = np.isfinite(green)
+        self._dc_sum[finite] += green[finite]
+        self._dc_count += finite
+
+    def _update_weights(self):
+        # SNR per ROI: daya di sekitar puncak (dan harmonik pertama) dibanding sisa pita HR
+        values = self.roi_buffer.values()
+        n = len(values)
+        if n < 2 * self.fs:
+            return
+        traces = np.array(values)
+        # Jumlah berjalan DC disinkronkan ulang di sini, membatasi akumulasi error pembulatan
+        finite = np.isfinite(traces)
+        self._dc_sum = np.where(finite, traces, 0.0).sum(axis=0)
+        self._dc_count = finite.sum(axis=0).astype(np.float64)
+        col_mean = self._dc_means()
+        usable = np.isfinite(col_mean) & (col_mean > 0)
+        if not usable.any():
+            return
+        nan_rows, nan_cols = np.where(np.isnan(traces))
+        traces[nan_rows, nan_cols] = col_mean[nan_cols]
+        # Normalisasi AC/DC, lalu satu rfft 2-D untuk semua ROI
+        traces = traces[:, usable] / col_mean[usable] - 1.0
+        traces -= traces.mean(axis=0)
+        _, start, stop = _band_grid(n, float(self.fs), self.lowcut, self.highcut)
+        stop = min(stop, n // 2)
+        if stop - start < 3:
+            return
+        power = np.abs(np.fft.rfft(traces, axis=0)[start:stop]) ** 2
+        peaks = np.argmax(power, axis=0)
+        bins = np.arange(stop - start)[:, None]
+        in_signal = (np.abs(bins - peaks) <= 1) | (np.abs(bins - 2 * peaks - start) <= 1)
+        signal_power = np.where(in_signal, power, 0.0).sum(axis=0)
+        noise_power = np.where(in_signal, 0.0, power).sum(axis=0)
+        snr = np.zeros(len(self._layouts))
+        snr[usable] = signal_power / np.maximum(noise_power, 1e-12)
+        self.snr = snr
+        if snr.sum() > 0:
+            self.weights = snr / snr.sum()
+
+    def sample(self, frame_bgr, face_bbox):
+        """
+        Ekstrak satu sampel gabungan (kromatisitas hijau, dinormalisasi per ROI
+        terhadap rata-ratanya) dari frame. None jika tidak ada ROI yang valid.
+        """
+        means = self.roi_means(frame_bgr, face_bbox)
+        self.last_means = means
+        totals = means.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            green = np.where(totals > 0, means[:, 1] / totals, np.nan) # G / (R + G + B) per ROI
+        self._append(green)
+        self._samples_since_weights += 1
+        if self._samples_since_weights >= self.weight_update_interval:
+            self._samples_since_weights = 0
+            self._update_weights()
+
+        valid = np.isfinite(green)
+        if not valid.any():
+            return None
+        # Bobot diterapkan pada variasi relatif (AC/DC) sehingga perbedaan level DC antar ROI
+        # dan perubahan bobot tidak menimbulkan lompatan pada sinyal gabungan
+        dc = self._dc_means()
+        weights = self.weights * valid
+        if weights.sum() <= 0:
+            weights = valid.astype(np.float64)
+        weights = weights / weights.sum()
+        return float(np.sum(weights[valid] * green[valid] / dc[valid]))
@@ -1,29 +1,53 @@
 import cv2
 import numpy as np
-import mediapipe as mp
-from mediapipe.tasks import python as mp_python
-from mediapipe.tasks.python import vision as mp_vision
-import scipy.signal as signal
 import os
+import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
-def extract_rppg_signal(frame, roi):
+from .ring_buffer import RingBuffer
+from .spectral import SpectralEstimator, SlidingDFT
+from .tracking import bbox_from_detection
+from .detection import DetectionInputScaler
+from .roi import MultiRoiExtractor
+from .algorithms import RppgAlgorithmEngine
+from .resampling import estimate_effective_fs, quantize_fs, resample_uniform
+from .instrumentation import PerfMonitor
+from .quality import SignalQualityMonitor, roi_saturation
+from .vitals import VitalSignsEstimator
+from .beats import BeatDetector, filter_settle_time
+from .startup import lazy_import
+
+# Modul berat diimpor saat pertama dipakai (lihat utils/startup.py), bukan saat aplikasi dibuka
+mp = lazy_import("mediapipe")
+mp_python = lazy_import("mediapipe.tasks.python")
+mp_vision = lazy_import("mediapipe.tasks.python.vision")
+signal = lazy_import("scipy.signal")
+
+def extract_rgb_means(frame, roi):
     x, y, w, h = roi
     if w > 0 and h > 0:
         roi_frame = frame[y:y+h, x:x+w]
         # Calculate mean of each channel (B, G, R)
-        means = cv2.mean(roi_frame)
-        b_mean, g_mean, r_mean = means[0], means[1], means[2]
-        
-        # Green Chromaticity Normalization: G / (R + G + B)
-        # Adds robustness to lighting intensity changes
-        total_intensity = r_mean + g_mean + b_mean
-        if total_intensity == 0:
-            return 0.0
-            
-        normalized_green = g_mean / total_intensity
-        return normalized_green
+        b_mean, g_mean, r_mean, _ = cv2.mean(roi_frame)
+        return np.array([r_mean, g_mean, b_mean]) # Urutan R, G, B untuk algoritma rPPG
     return None
 
+def green_chromaticity(rgb):
+    # Green Chromaticity Normalization: G / (R + G + B)
+    # Adds robustness to lighting intensity changes
+    total_intensity = rgb[0] + rgb[1] + rgb[2]
+    if total_intensity == 0:
+        return 0.0
+    return rgb[1] / total_intensity
+
+def extract_rppg_signal(frame, roi):
+    rgb = extract_rgb_means(frame, roi)
+    return green_chromaticity(rgb) if rgb is not None else None
+
+# Koefisien di-cache per (band, fs, orde): fs efektif bisa berubah-ubah selama sesi
+@lru_cache(maxsize=32)
 def butter_bandpass(lowcut, highcut, fs, order=5):
     nyq = 0.5 * fs # Frekuensi Nyquist
     low = lowcut / nyq
@@ -31,59 +55,235 @@ def butter_bandpass(lowcut, highcut, fs, order=5):
     b, a = signal.butter(order, [low, high], btype='band')
     return b, a
 
-def calculate_rate_from_fft(signal_values, fs, lowcut_hz, highcut_hz):
-    if len(signal_values) < 20: # Membutuhkan panjang sinyal yang cukup untuk analisis FFT
-        return 0
+@lru_cache(maxsize=32)
+def butter_bandpass_sos(lowcut, highcut, fs, order=5):
+    # Versi second-order sections dari butter_bandpass, lebih stabil secara numerik untuk filter kausal
+    nyq = 0.5 * fs
+    return signal.butter(order, [lowcut / nyq, highcut / nyq], btype='band', output='sos')
 
-    N = len(signal_values)
-    yf = np.fft.fft(signal_values)
-    xf = np.fft.fftfreq(N, 1 / fs)
+class RunningStats:
+    """
+    Rata-rata dan varians berjalan untuk standardisasi sinyal per sampel,
+    pengganti standardisasi ulang seluruh buffer. Selama `window` sampel
+    pertama dipakai Welford (eksak atas semua sampel, tanpa transien awal),
+    setelah itu bentuk eksponensial dengan alpha = 1/window.
+    """
+    def __init__(self, window):
+        self.window = max(1, window)
+        self.alpha = 1.0 / self.window
+        self.reset()
 
-    # Ambil hanya spektrum positif dan normalisasi amplitudo
-    xf_positive = xf[:N//2]
-    yf_positive = 2.0/N * np.abs(yf[0:N//2])
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
 
-    # Cari indeks frekuensi dalam rentang yang valid
-    valid_indices = np.where((xf_positive >= lowcut_hz) & (xf_positive <= highcut_hz))[0]
+    def standardize(self, x):
+        self.count += 1
+        diff = x - self.mean
+        if self.count <= self.window:
+            self.mean += diff / self.count
+            self.var += (diff * (x - self.mean) - self.var) / self.count
+        else:
+            incr = self.alpha * diff
+            self.mean += incr
+            self.var = (1.0 - self.alpha) * (self.var + diff * incr)
+        std = np.sqrt(self.var)
+        if std > 1e-6: # Avoid division by zero
+            return (x - self.mean) / std
+        return x - self.mean
 
-    if len(valid_indices) == 0: # Tidak ada frekuensi dalam rentang valid
-        return 0
+class StreamingBandpass:
+    """
+    Bandpass Butterworth kausal (SOS) dengan state zi yang dipertahankan antar
+    pemanggilan, sehingga hanya sampel baru yang perlu difilter.
+    """
+    def __init__(self, lowcut, highcut, fs, order=5):
+        self.sos = butter_bandpass_sos(lowcut, highcut, fs, order)
+        self._zi_unit = signal.sosfilt_zi(self.sos)
+        self.zi = None
 
-    valid_yf = yf_positive[valid_indices]
-    valid_xf = xf_positive[valid_indices]
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.size == 0:
+            return samples
+        if self.zi is None: # Inisialisasi state pada kondisi steady-state sampel pertama
+            self.zi = self._zi_unit * samples[0]
+        filtered, self.zi = signal.sosfilt(self.sos, samples, zi=self.zi)
+        return filtered
 
-    if len(valid_yf) == 0: # Pengecekan tambahan
-        return 0
+    def reset(self):
+        self.zi = None
 
-    # Temukan frekuensi dengan amplitudo terbesar (puncak dominan)
-    dominant_peak_index_in_valid = np.argmax(valid_yf)
-    dominant_frequency_hz = valid_xf[dominant_peak_index_in_valid]
+def band_for_fs(lowcut, highcut, fs):
+    # Batas atas pita dijaga di bawah Nyquist saat laju sampel rendah (mis. kamera di-throttle)
+    return lowcut, min(highcut, 0.45 * fs)
 
-    rate_per_minute = dominant_frequency_hz * 60 # Konversi Hz ke per menit
-    return rate_per_minute
+# Estimator default tanpa zero-padding/interpolasi: hasil identik dengan argmax bin FFT
+_default_rate_estimator = SpectralEstimator()
 
+def calculate_rate_from_fft(signal_values, fs, lowcut_hz, highcut_hz, estimator=None):
+    # Grid frekuensi dan indeks pita di-cache per (N, fs, band) di dalam SpectralEstimator
+    estimator = estimator or _default_rate_estimator
+    return estimator.estimate_rate(signal_values, fs, lowcut_hz, highcut_hz)
+
+
+# Pemetaan nama mode ke nama RunningMode MediaPipe (di-resolve saat model dimuat)
+_RUNNING_MODES = {
+    "image": "IMAGE",
+    "video": "VIDEO",
+    "live_stream": "LIVE_STREAM",
+}
 
 class HealthAnalyzer:
     def __init__(self, face_model_path="models/blaze_face_short_range.tflite",
                  fps=30,
                  rppg_lowcut=0.67, rppg_highcut=4.0,
                  min_signal_length_factor=2,
-                 frame_buffer_factor=10):
+                 frame_buffer_factor=10,
+                 filter_mode="accurate",
+                 fft_zero_pad_factor=4,
+                 peak_interpolation="parabolic",
+                 running_mode="image",
+                 async_result_history=64,
+                 detection_max_side=None,
+                 detection_crop_margin=None,
+                 roi_mode="forehead",
+                 roi_grid=None,
+                 skin_mask=False,
+                 rppg_algorithm="green",
+                 compare_algorithms=(),
+                 resample_method="linear",
+                 target_fs=None,
+                 min_quality=0.2,
+                 vitals_window_s=32.0,
+                 beat_history=64,
+                 perf_monitor=None):
+        if resample_method not in (None, "linear", "cubic"):
+            raise ValueError(f"resample_method tidak dikenal: {resample_method}")
+        if rppg_algorithm not in RppgAlgorithmEngine.ALGORITHMS:
+            raise ValueError(f"rppg_algorithm tidak dikenal: {rppg_algorithm}")
+        if roi_mode not in ("forehead", "multi"):
+            raise ValueError(f"roi_mode tidak dikenal: {roi_mode}")
+        if running_mode not in _RUNNING_MODES:
+            raise ValueError(f"running_mode tidak dikenal: {running_mode}")
+        if filter_mode not in ("accurate", "streaming"):
+            raise ValueError(f"filter_mode tidak dikenal: {filter_mode}")
         self.fps = fps
+        self.filter_mode = filter_mode
+        self.min_signal_length_factor = min_signal_length_factor
         self.min_signal_length = int(min_signal_length_factor * self.fps)
         self.frame_buffer_limit = int(frame_buffer_factor * self.fps)
+        self.peak_interpolation = peak_interpolation
+        # Latensi per stage (detect/roi/dsp) dan counter deteksi; default no-op
+        self.perf = perf_monitor or PerfMonitor(enabled=False)
+
+        # Sampel diresample ke grid seragam berdasarkan timestamp capture sebelum difilter,
+        # sehingga jitter timer, cap.read() yang lambat, atau throttling FPS tidak membiaskan HR.
+        # resample_method=None: anggap laju tetap `fps` (perilaku lama)
+        self.resample_method = resample_method
+        self.target_fs = target_fs # None: pakai laju efektif terukur (dibulatkan 0.5 Hz)
+        self.effective_fs = float(fps) # Laju sampel efektif terukur dari jendela terakhir
+        self.analysis_fs = float(fps) # Laju grid yang dipakai untuk filter/FFT terakhir
 
         self.rppg_lowcut = rppg_lowcut
         self.rppg_highcut = rppg_highcut
 
+        # Mode "video" untuk input file, "live_stream" untuk kamera dengan detect_async
+        self.running_mode = running_mode
+        self._last_submitted_ts_ms = -1
+        # Hasil detect_async disimpan per timestamp agar bisa dipasangkan dengan frame yang tepat
+        self._async_lock = threading.Lock()
+        self._async_results = OrderedDict()
+        self._async_result_history = async_result_history
+        # Frame yang menunggu hasil detect_async, per timestamp: (waktu kirim, transformasi input detektor)
+        self._pending_submits = OrderedDict()
+        # Latensi kirim -> callback detect_async terakhir: waktu inferensi di thread MediaPipe
+        self.last_async_latency_s = 0.0
+
+        # Jalur deteksi beresolusi rendah (None: frame penuh dikirim ke detektor)
+        self.detection_scaler = None
+        if detection_max_side:
+            self.detection_scaler = DetectionInputScaler(detection_max_side, detection_crop_margin)
+
+        # face_model_path=None: hanya stage DSP (mis. replay rekaman sesi), tanpa detektor
         self.face_detector = None
-        self._load_models(face_model_path) # Muat model MediaPipe
+        if face_model_path is not None:
+            self._load_models(face_model_path) # Muat model MediaPipe
 
         # Desain koefisien filter untuk rPPG
         self.rppg_b, self.rppg_a = butter_bandpass(self.rppg_lowcut, self.rppg_highcut, self.fps)
 
-        # Buffer untuk menyimpan sinyal mentah yang diekstrak
-        self.rppg_signal_buffer = []
+        # Buffer melingkar untuk sinyal mentah yang diekstrak beserta timestamp tiap sampel
+        self.rppg_signal_buffer = RingBuffer(self.frame_buffer_limit)
+        # Rata-rata (R, G, B) per sampel, sejajar dengan rppg_signal_buffer, untuk CHROM/POS/ICA
+        self.rgb_buffer = RingBuffer(self.frame_buffer_limit, channels=3)
+        self.last_roi_rects = [] # ROI (x, y, w, h) yang dipakai pada sampel terakhir
+        self.last_spectrum = None # (freqs, magnitudo) pita HR dari estimasi terakhir, untuk plot
+        # SessionRecorder opsional: setiap frame (timestamp, box, RGB, nilai rPPG) ikut direkam
+        self.recorder = None
+
+        # Indeks kualitas sinyal per jendela: jendela di bawah min_quality tidak difilter/di-FFT
+        # dan HR-nya tidak dipublikasikan (0). min_quality=None: confidence saja, tanpa gating
+        self.quality = SignalQualityMonitor(self.fps, self.rppg_lowcut, self.rppg_highcut, min_quality=min_quality)
+        self.last_quality = None # SignalQuality dari estimasi terakhir
+        self.hr_confidence = 0.0 # Confidence (0..1) untuk HR terakhir; 0 bila tidak dipublikasikan
+
+        # Laju napas + proksi HRV dari trace mentah yang sama, lewat cabang 10 Hz berjendela panjang
+        # (satu rFFT untuk kedua pita, diperbarui per detik). vitals_window_s=None: tidak dihitung
+        self.vitals = None
+        if vitals_window_s:
+            self.vitals = VitalSignsEstimator(window_s=vitals_window_s, fs=max(10.0, 2.5 * self.rppg_highcut),
+                                              hr_band=(self.rppg_lowcut, self.rppg_highcut),
+                                              min_window_s=min(12.0, vitals_window_s))
+        self.last_vitals = None # Vitals dari estimasi terakhir; None bila belum cukup data/sinyal tidak layak
+
+        # Detektor detak inkremental pada sinyal terfilter: HR sesaat + RMSSD/SDNN dari riwayat
+        # beat_history IBI terakhir. Keluaran filtfilt di tepi jendela masih berubah tiap pembaruan,
+        # sehingga mode accurate menahan sepanjang transien filter pita HR (sampai sisa energi respons
+        # impuls 1%, sekitar 1.8 detik pada 30 FPS). beat_history=None: tidak dihitung
+        self.beats = None
+        if beat_history:
+            settle_s = 0.0
+            if filter_mode == "accurate":
+                settle_s = filter_settle_time(self.rppg_b, self.rppg_a, self.fps, tolerance=0.1)
+            self.beats = BeatDetector(self.rppg_lowcut, self.rppg_highcut, history=beat_history, settle_s=settle_s)
+        self.last_beats = None # BeatStats terakhir; None bila sinyal tidak layak
+        self.last_new_beats = [] # (waktu_detak, ibi) yang diterima pada pembaruan terakhir
+        self._analysis_times = None # Timestamp jendela yang difilter pada mode accurate
+
+        # Mode "multi": dahi + kedua pipi (+ grid opsional) lewat integral image, digabung berbobot SNR
+        self.roi_extractor = None
+        if roi_mode == "multi":
+            self.roi_extractor = MultiRoiExtractor(grid=roi_grid, skin_mask=skin_mask, fs=self.fps,
+                                                   lowcut=self.rppg_lowcut, highcut=self.rppg_highcut,
+                                                   history=self.frame_buffer_limit)
+
+        # State mode streaming: filter SOS kausal + statistik berjalan, hasilnya disimpan di ring buffer sendiri
+        self.rppg_stream_filter = StreamingBandpass(self.rppg_lowcut, self.rppg_highcut, self.fps)
+        self.rppg_running_stats = RunningStats(self.frame_buffer_limit)
+        self.filtered_signal_buffer = RingBuffer(self.frame_buffer_limit)
+        self._stream_consumed = 0 # Jumlah sampel mentah yang sudah melewati filter streaming
+        self._stream_fs = float(fps) # Laju desain filter streaming dan sliding DFT
+        self._stream_last = None # (t, nilai) sampel mentah terakhir, titik awal interpolasi grid streaming
+        self._stream_next_t = None # Waktu titik grid seragam berikutnya
+
+        # Estimator spektrum: zero-padding + interpolasi puncak untuk resolusi sub-BPM
+        self.hr_estimator = SpectralEstimator(zero_pad_factor=fft_zero_pad_factor,
+                                              interpolation=peak_interpolation)
+        # Algoritma pulsa untuk mode accurate; compare_algorithms dihitung pada jendela yang sama
+        # untuk perbandingan (hasilnya di algorithm_rates). Mode streaming selalu memakai "green".
+        self.rppg_algorithm = rppg_algorithm
+        self.compare_algorithms = tuple(a for a in compare_algorithms if a != rppg_algorithm)
+        self.algorithm_engine = RppgAlgorithmEngine((rppg_algorithm,) + self.compare_algorithms, fs=self.fps,
+                                                    lowcut=self.rppg_lowcut, highcut=self.rppg_highcut)
+        self._compare_estimator = SpectralEstimator(zero_pad_factor=fft_zero_pad_factor,
+                                                    interpolation=peak_interpolation)
+        self.algorithm_rates = {} # nama algoritma -> HR dari estimasi terakhir
+
+        # Sliding DFT untuk mode streaming: hanya bin dalam pita HR yang diperbarui per sampel
+        self.rppg_sdft = SlidingDFT(self.frame_buffer_limit, self.fps, self.rppg_lowcut, self.rppg_highcut,
+                                    interpolation=peak_interpolation)
 
     def _load_models(self, face_model_path):
         try:
@@ -93,8 +293,9 @@ class HealthAnalyzer:
             face_base_options = mp_python.BaseOptions(model_asset_path=face_model_path)
             face_options = mp_vision.FaceDetectorOptions(
                 base_options=face_base_options,
-                running_mode=mp_vision.RunningMode.IMAGE,
-                min_detection_confidence=0.5
+                running_mode=getattr(mp_vision.RunningMode, _RUNNING_MODES[self.running_mode]),
+                min_detection_confidence=0.5,
+                result_callback=self._on_async_detection if self.running_mode == "live_stream" else None
             )
             self.face_detector = mp_vision.FaceDetector.create_from_options(face_options)
 
@@ -103,23 +304,144 @@ class HealthAnalyzer:
             print(f"Error saat memuat model MediaPipe di HealthAnalyzer: {e}")
             raise e
 
-    def detect_faces(self, mp_image):
+    def _next_timestamp_ms(self, timestamp_ms):
+        # MediaPipe mensyaratkan timestamp naik secara ketat pada mode VIDEO/LIVE_STREAM
+        if timestamp_ms is None:
+            timestamp_ms = int(time.monotonic() * 1000)
+        timestamp_ms = max(int(timestamp_ms), self._last_submitted_ts_ms + 1)
+        self._last_submitted_ts_ms = timestamp_ms
+        return timestamp_ms
+
+    def _on_async_detection(self, result, output_image, timestamp_ms):
+        # Dipanggil dari thread internal MediaPipe
+        now = time.perf_counter()
+        if not result.detections:
+            self.perf.count("detector_misses")
+        with self._async_lock:
+            # Buang frame yang di-drop MediaPipe (timestamp lebih lama)
+            submitted, transform = None, None
+            while self._pending_submits:
+                ts, pending = self._pending_submits.popitem(last=False)
+                if ts == timestamp_ms:
+                    submitted, transform = pending
+                    break
+                if ts > timestamp_ms:
+                    self._pending_submits[ts] = pending
+                    self._pending_submits.move_to_end(ts, last=False)
+                    break
+            if submitted is not None:
+                self.last_async_latency_s = now - submitted
+                self.perf.record("detect_async", self.last_async_latency_s)
+            if transform is not None:
+                self.detection_scaler.back_project(result, transform)
+            self._async_results[timestamp_ms] = result
+            while len(self._async_results) > self._async_result_history:
+                self._async_results.popitem(last=False)
+
+    def get_timed_detection_for(self, timestamp_ms):
+        """Seperti get_detection_for, tetapi mengembalikan pasangan (timestamp_ms_deteksi, hasil)."""
+        with self._async_lock:
+            if timestamp_ms in self._async_results:
+                return timestamp_ms, self._async_results[timestamp_ms]
+            for ts in reversed(self._async_results):
+                if ts <= timestamp_ms:
+                    return ts, self._async_results[ts]
+        return None, None
+
+    def get_detection_for(self, timestamp_ms):
+        """
+        Hasil detect_async untuk frame dengan timestamp tersebut, atau hasil
+        terbaru sebelum timestamp itu jika frame tersebut belum/tidak diproses.
+        """
+        return self.get_timed_detection_for(timestamp_ms)[1]
+
+    def detect_faces(self, mp_image, timestamp_ms=None, transform=None):
+        """
+        Deteksi wajah sesuai running_mode. Pada mode live_stream frame dikirim
+        secara async dan yang dikembalikan adalah hasil terbaru yang sudah
+        tersedia untuk timestamp tersebut (bisa berasal dari frame sebelumnya).
+        `transform` (dari DetectionInputScaler) memetakan box ke frame penuh.
+        """
         if self.face_detector:
             try:
-                return self.face_detector.detect(mp_image)
+                if self.running_mode == "image":
+                    result = self.face_detector.detect(mp_image)
+                else:
+                    timestamp_ms = self._next_timestamp_ms(timestamp_ms)
+                    if self.running_mode == "live_stream":
+                        with self._async_lock:
+                            self._pending_submits[timestamp_ms] = (time.perf_counter(), transform)
+                        self.face_detector.detect_async(mp_image, timestamp_ms)
+                        return self.get_detection_for(timestamp_ms)
+                    result = self.face_detector.detect_for_video(mp_image, timestamp_ms)
+                if not result.detections:
+                    self.perf.count("detector_misses")
+                if transform is not None:
+                    self.detection_scaler.back_project(result, transform)
+                return result
             except Exception as e:
                 print(f"Error deteksi wajah: {e}")
         return None
 
-    def process_rppg_from_face(self, frame_for_signal, face_detection_result):
-        if face_detection_result is None or not face_detection_result.detections:
-            return None
+    def detect_faces_in_frame(self, frame_bgr, timestamp_ms=None, prev_bbox=None):
+        """
+        Deteksi wajah langsung dari frame BGR. Jika detection_max_side diatur,
+        frame (atau crop di sekitar prev_bbox) diperkecil dulu dan box hasilnya
+        dipetakan kembali ke koordinat resolusi penuh.
+        """
+        self.perf.count("detector_runs")
+        with self.perf.measure("detect"):
+            if self.detection_scaler is None:
+                rgb_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB) # Konversi ke RGB untuk MediaPipe
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+                return self.detect_faces(mp_image, timestamp_ms)
+            mp_image, transform = self.detection_scaler.prepare(frame_bgr, prev_bbox)
+            return self.detect_faces(mp_image, timestamp_ms, transform)
 
+    def process_rppg_from_face(self, frame_for_signal, face_detection_result, timestamp=None, draw_roi=True):
         # Dapatkan bounding box utama wajah
-        detection = face_detection_result.detections[0]
-        bbox = detection.bounding_box
+        face_bbox = bbox_from_detection(face_detection_result)
+        if face_bbox is None:
+            self.note_missing_face(timestamp)
+            return None
+        return self.process_rppg_from_bbox(frame_for_signal, face_bbox, timestamp, draw_roi)
+
+    def process_rppg_from_bbox(self, frame_for_signal, face_bbox, timestamp=None, draw_roi=True):
+        # Timestamp monotonic saat sampel diambil (dipakai bila frame tidak membawa timestamp)
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self.perf.measure("roi"):
+            rppg_value = self._sample_from_bbox(frame_for_signal, face_bbox, timestamp, draw_roi)
+            if rppg_value is None:
+                self.quality.observe_frame(timestamp, False)
+            else:
+                self.quality.observe_frame(timestamp, True, face_bbox,
+                                           roi_saturation(frame_for_signal, self.last_roi_rects))
+        if self.recorder is not None:
+            # Sampel valid: RGB persis seperti yang masuk ke buffer
+            rgb = self.rgb_buffer.latest() if rppg_value is not None else None
+            self.recorder.record(timestamp, rppg_value, rgb, face_bbox, self.last_roi_rects)
+        return rppg_value
+
+    def note_missing_face(self, timestamp=None):
+        """Catat frame tanpa wajah (rasio kehadiran wajah dan rekaman sesi), mis. saat pelacak kehilangan wajah."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.last_roi_rects = []
+        self.quality.observe_frame(timestamp, False)
+        if self.recorder is not None:
+            self.recorder.record(timestamp, None)
+
+    def feed_sample(self, rppg_value, rgb, timestamp=None, face_bbox=None):
+        """Masukkan sampel yang sudah diekstrak langsung ke stage DSP (mis. replay rekaman)."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self._append_sample(rppg_value, rgb, timestamp)
+        self.quality.observe_frame(timestamp, True, face_bbox)
+
+    def _sample_from_bbox(self, frame_for_signal, face_bbox, timestamp, draw_roi):
+        # Box wajah bisa berasal dari detektor maupun pelacak (FaceTracker)
+        # draw_roi=False: frame tidak diubah, ROI cukup dibaca dari last_roi_rects (mis. untuk overlay Qt)
+        self.last_roi_rects = []
         frame_h, frame_w, _ = frame_for_signal.shape
-        x, y, w, h = int(bbox.origin_x), int(bbox.origin_y), int(bbox.width), int(bbox.height)
+        x, y, w, h = face_bbox
 
         # Validasi bounding box utama
         x = max(0, min(x, frame_w - 1))
@@ -130,52 +452,271 @@ class HealthAnalyzer:
         if not (w > 0 and h > 0):
             return None
 
+        if self.roi_extractor is not None:
+            rppg_value = self.roi_extractor.sample(frame_for_signal, (x, y, w, h))
+            self.last_roi_rects = list(self.roi_extractor.last_rects)
+            if draw_roi:
+                for rx, ry, rw, rh in self.last_roi_rects:
+                    cv2.rectangle(frame_for_signal, (rx, ry), (rx + rw, ry + rh), (0, 255, 255), 1)
+            if rppg_value is not None:
+                means = self.roi_extractor.last_means
+                rgb = means[np.isfinite(means).all(axis=1)].mean(axis=0)[::-1] # BGR -> RGB
+                self._append_sample(rppg_value, rgb, timestamp)
+            return rppg_value
+
         extracted_signals = [] 
         # Definisi, validasi, ekstraksi, dan penggambaran untuk ROI Dahi
         fh_x, fh_y, fh_w, fh_h = int(x+w*0.25), int(y+h*(-0.1)), int(w*0.5), int(h*0.20)
         fh_x,fh_y = max(0,min(fh_x,frame_w-1)),max(0,min(fh_y,frame_h-1))
         fh_w,fh_h = max(0,min(fh_w,frame_w-fh_x)),max(0,min(fh_h,frame_h-fh_y))
         if fh_w > 0 and fh_h > 0:
-            val = extract_rppg_signal(frame_for_signal, (fh_x, fh_y, fh_w, fh_h))
-            if val is not None: extracted_signals.append(val)
-            cv2.rectangle(frame_for_signal, (fh_x, fh_y), (fh_x + fh_w, fh_y + fh_h), (0, 255, 255), 1) # Cyan
+            rgb = extract_rgb_means(frame_for_signal, (fh_x, fh_y, fh_w, fh_h))
+            if rgb is not None: extracted_signals.append(rgb)
+            self.last_roi_rects.append((fh_x, fh_y, fh_w, fh_h))
+            if draw_roi:
+                cv2.rectangle(frame_for_signal, (fh_x, fh_y), (fh_x + fh_w, fh_y + fh_h), (0, 255, 255), 1) # Cyan
 
         if extracted_signals:
-            rppg_value = np.mean(extracted_signals)
-            self.rppg_signal_buffer.append(rppg_value)
-            if len(self.rppg_signal_buffer) > self.frame_buffer_limit:
-                self.rppg_signal_buffer.pop(0)
+            rgb = np.mean(extracted_signals, axis=0)
+            rppg_value = green_chromaticity(rgb)
+            self._append_sample(rppg_value, rgb, timestamp)
             return rppg_value
         return None
 
+    def _append_sample(self, rppg_value, rgb, timestamp):
+        # Timestamp monotonic saat sampel diambil (dipakai bila frame tidak membawa timestamp)
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.rppg_signal_buffer.append(rppg_value, timestamp)
+        self.rgb_buffer.append(rgb, timestamp)
+        if self.vitals is not None:
+            self.vitals.push(rppg_value, timestamp)
+
+    def _update_streaming_filter(self):
+        # Filter hanya sampel yang masuk sejak pemanggilan terakhir
+        new_count = self.rppg_signal_buffer.total_appended - self._stream_consumed
+        if new_count <= 0:
+            return
+        new_count = min(new_count, len(self.rppg_signal_buffer))
+        new_samples = self.rppg_signal_buffer.values(new_count)
+        new_times = self.rppg_signal_buffer.timestamps(new_count)
+        if self.resample_method is not None:
+            new_times, new_samples = self._stream_uniform(new_times, new_samples)
+            new_count = len(new_samples)
+            if new_count == 0:
+                self._stream_consumed = self.rppg_signal_buffer.total_appended
+                return
+        standardized = np.fromiter((self.rppg_running_stats.standardize(v) for v in new_samples),
+                                   dtype=np.float64, count=new_count)
+        filtered = self.rppg_stream_filter.process(standardized)
+        for value, ts in zip(filtered, new_times):
+            # Sampel yang akan tergeser keluar dari jendela sliding DFT
+            old_value = self.filtered_signal_buffer.values(self.filtered_signal_buffer.capacity)[0] \
+                if self.filtered_signal_buffer.is_full else 0.0
+            self.rppg_sdft.update(value, old_value)
+            self.filtered_signal_buffer.append(value, ts)
+        if self.rppg_sdft.needs_resync():
+            self.rppg_sdft.reset(self.filtered_signal_buffer.values())
+        self._stream_consumed = self.rppg_signal_buffer.total_appended
+
+    def _stream_uniform(self, times, values):
+        # Interpolasi linear (juga untuk resample_method="cubic": kubik butuh sampel masa depan)
+        # sampel baru ke grid seragam _stream_fs, melanjutkan grid dari pemanggilan sebelumnya
+        if self._stream_last is not None:
+            times = np.concatenate(([self._stream_last[0]], times))
+            values = np.concatenate(([self._stream_last[1]], values))
+        self._stream_last = (times[-1], values[-1])
+        if self._stream_next_t is None:
+            self._stream_next_t = times[0]
+        count = int(np.floor((times[-1] - self._stream_next_t) * self._stream_fs + 1e-9)) + 1
+        if count <= 0:
+            return times[:0], values[:0]
+        grid = self._stream_next_t + np.arange(count) / self._stream_fs
+        self._stream_next_t = grid[-1] + 1.0 / self._stream_fs
+        return grid, np.interp(grid, times, values)
+
+    def _maybe_redesign_streaming(self):
+        # Filter kausal dan sliding DFT hanya valid untuk satu laju: desain ulang bila laju efektif
+        # bergeser lebih dari 10%, lalu filter ulang seluruh isi buffer mentah pada laju baru
+        timestamps = self.rppg_signal_buffer.timestamps()
+        if len(timestamps) < self.min_signal_length:
+            return
+        self.effective_fs = estimate_effective_fs(timestamps) or float(self.fps)
+        fs = self.target_fs or quantize_fs(self.effective_fs)
+        if abs(fs - self._stream_fs) <= 0.1 * self._stream_fs:
+            return
+        self._stream_fs = fs
+        lowcut, highcut = band_for_fs(self.rppg_lowcut, self.rppg_highcut, fs)
+        self.rppg_stream_filter = StreamingBandpass(lowcut, highcut, fs)
+        self.rppg_sdft = SlidingDFT(self.frame_buffer_limit, fs, lowcut, highcut, interpolation=self.peak_interpolation)
+        self.rppg_running_stats.reset()
+        self.filtered_signal_buffer.clear()
+        self._stream_last = None
+        self._stream_next_t = None
+        self._stream_consumed = self.rppg_signal_buffer.total_appended - len(self.rppg_signal_buffer)
+
+    def _filter_and_calculate_hr_streaming(self):
+        if self.resample_method is not None:
+            self._maybe_redesign_streaming()
+        self._update_streaming_filter()
+        filtered_signal = self.filtered_signal_buffer.values()
+        if len(filtered_signal) < self.min_signal_length:
+            return self.rppg_signal_buffer.values().tolist(), 0.0
+        hr = self.rppg_sdft.estimate_rate()
+        self.last_spectrum = self.rppg_sdft.band_spectrum()
+        self._update_beats(filtered_signal, self.filtered_signal_buffer.timestamps(), hr)
+        return filtered_signal.tolist(), hr
+
     def filter_and_calculate_hr(self):
-        if len(self.rppg_signal_buffer) < self.min_signal_length:
-            return list(self.rppg_signal_buffer), 0.0 # Kembalikan buffer mentah jika terlalu pendek
+        """
+        Filter + estimasi HR jendela saat ini. Kembalikan (sinyal terfilter, HR);
+        confidence HR ada di hr_confidence dan rinciannya di last_quality, laju napas
+        dan proksi HRV di last_vitals, HR sesaat/RMSSD/SDNN di last_beats. Jendela
+        yang tidak layak (tanpa wajah, ROI jenuh, banyak gerakan, pulsa lemah)
+        dilewati tanpa filter/FFT dan menghasilkan ([], 0.0).
+        """
+        with self.perf.measure("dsp"):
+            quality = self.assess_quality()
+            if not quality.usable:
+                self.hr_confidence = 0.0
+                self.algorithm_rates = {}
+                self.last_spectrum = None
+                self.last_vitals = None
+                if self.beats is not None:
+                    self.beats.interrupt() # IBI tidak diukur melintasi jendela yang dilewati
+                self.last_beats = None
+                self.last_new_beats = []
+                return [], 0.0
+            # Mode streaming: O(sampel baru) per pembaruan, cocok untuk update HR setiap frame
+            if self.filter_mode == "streaming":
+                filtered, hr = self._filter_and_calculate_hr_streaming()
+            else:
+                filtered, hr = self._filter_and_calculate_hr_accurate()
+            self.hr_confidence = quality.index if hr > 0 else 0.0
+            self.last_vitals = self.vitals.estimate() if self.vitals is not None else None
+            return filtered, hr
+
+    def assess_quality(self):
+        """Indeks kualitas sinyal jendela saat ini (murah: rFFT buffer mentah paling sering tiap 0.5 detik)."""
+        buffer = self.rppg_signal_buffer
+        fs = estimate_effective_fs(buffer.timestamps()) or float(self.fps)
+        self.last_quality = self.quality.assess(buffer.values(), fs, sample_count=buffer.total_appended)
+        return self.last_quality
+
+    def _filter_and_calculate_hr_accurate(self):
+        # Mode accurate: filtfilt zero-phase pada seluruh jendela
+        # View kontigu tanpa salinan langsung dari ring buffer
+        signal_array = self.rppg_signal_buffer.values()
+        if len(signal_array) < self.min_signal_length:
+            return signal_array.tolist(), 0.0 # Kembalikan buffer mentah jika terlalu pendek
         try:
+            green, rgb, fs = self._uniform_window(signal_array)
+            lowcut, highcut = band_for_fs(self.rppg_lowcut, self.rppg_highcut, fs)
+            pulses = self._pulse_signals(green, rgb, fs)
+            names = list(pulses)
+            # Semua algoritma distandardisasi dan difilter bersama sebagai satu array (n, algoritma)
+            stacked = np.column_stack([pulses[name] for name in names])
+
             # Tentukan panjang padding untuk filtfilt, hindari error jika sinyal terlalu pendek
-            padlen = min(self.min_signal_length -1, len(self.rppg_signal_buffer)-1)
-            
+            padlen = min(int(self.min_signal_length_factor * fs) - 1, len(green) - 1)
+
             # Standardization: (Signal - Mean) / StdDev
             # Adds robustness to amplitude variations (e.g. motion artifacts)
-            signal_array = np.array(self.rppg_signal_buffer)
-            if np.std(signal_array) > 1e-6: # Avoid division by zero
-                standardized_signal = (signal_array - np.mean(signal_array)) / np.std(signal_array)
-                signal_to_filter = standardized_signal.tolist()
-            else:
-                signal_to_filter = self.rppg_signal_buffer
+            std = np.std(stacked, axis=0)
+            # Avoid division by zero
+            signal_to_filter = (stacked - np.mean(stacked, axis=0)) / np.where(std > 1e-6, std, 1.0)
+            signal_to_filter[:, std <= 1e-6] = stacked[:, std <= 1e-6]
 
             if padlen <=0: # Tidak cukup data untuk filtfilt yang stabil
-                 filtered_signal = list(signal_to_filter)
+                 filtered = signal_to_filter
             else:
-                 filtered_signal = signal.filtfilt(self.rppg_b, self.rppg_a, signal_to_filter, padlen=padlen).tolist()
+                 # Koefisien filter di-cache per fs: desain ulang hanya saat laju grid berubah
+                 b, a = butter_bandpass(lowcut, highcut, fs)
+                 filtered = signal.filtfilt(b, a, signal_to_filter, axis=0, padlen=padlen)
 
-            hr = calculate_rate_from_fft(filtered_signal, self.fps, self.rppg_lowcut, self.rppg_highcut)
-            return filtered_signal, hr
+            self.algorithm_rates = {}
+            for j, name in enumerate(names[1:], start=1):
+                self.algorithm_rates[name] = calculate_rate_from_fft(
+                    filtered[:, j], fs, lowcut, highcut, estimator=self._compare_estimator)
+            filtered_signal = filtered[:, 0]
+            hr = calculate_rate_from_fft(filtered_signal, fs, lowcut, highcut, estimator=self.hr_estimator)
+            self.algorithm_rates[self.rppg_algorithm] = hr
+            if self.hr_estimator.last_band_spectrum is not None:
+                freqs, mags = self.hr_estimator.last_band_spectrum
+                self.last_spectrum = (freqs, mags.copy())
+            self._update_beats(filtered_signal, self._analysis_times, hr)
+            return filtered_signal.tolist(), hr
         except ValueError: # Jika terjadi error saat filtering/FFT
-            return list(self.rppg_signal_buffer), 0.0
+            return self.rppg_signal_buffer.values().tolist(), 0.0
+
+    def _uniform_window(self, signal_array):
+        """Jendela sinyal green dan RGB pada grid waktu seragam, beserta laju grid tersebut."""
+        rgb = self.rgb_buffer.values()
+        timestamps = self.rppg_signal_buffer.timestamps()
+        self.effective_fs = estimate_effective_fs(timestamps) or float(self.fps)
+        if self.resample_method is None:
+            self.analysis_fs = float(self.fps)
+            self._analysis_times = timestamps
+            return signal_array, rgb, self.analysis_fs
+        fs = self.target_fs or quantize_fs(self.effective_fs)
+        self.analysis_fs = fs
+        # Green dan RGB diresample bersama dalam satu panggilan
+        self._analysis_times, uniform = resample_uniform(timestamps, np.column_stack([signal_array, rgb]), fs,
+                                                         self.resample_method)
+        return uniform[:, 0], uniform[:, 1:], fs
+
+    def _update_beats(self, filtered_signal, times, hr):
+        # Hanya sampel yang lebih baru dari pembaruan sebelumnya yang diperiksa detektor
+        self.last_new_beats = []
+        if self.beats is None:
+            return
+        if hr > 0 and times is not None and len(times) == len(filtered_signal):
+            self.last_new_beats = self.beats.update(filtered_signal, times, expected_ibi=60.0 / hr)
+        self.last_beats = self.beats.stats()
+
+    def _pulse_signals(self, green_signal, rgb, fs):
+        """Sinyal pulsa mentah per algoritma (algoritma utama lebih dulu) dari jendela buffer saat ini."""
+        names = (self.rppg_algorithm,) + self.compare_algorithms
+        # RGB hanya diproses bila ada algoritma selain "green"; satu run() untuk semua algoritma
+        from_rgb = [name for name in names if name != "green"]
+        computed = self.algorithm_engine.run(rgb, from_rgb, fs=fs) if from_rgb else {}
+        # "green" memakai rppg_signal_buffer (pada mode multi-ROI sudah berupa fusi berbobot SNR)
+        computed["green"] = green_signal
+        return {name: computed[name] for name in names}
 
     def clear_buffers(self):
+        with self._async_lock:
+            self._async_results.clear()
+            self._pending_submits.clear()
+            self.last_async_latency_s = 0.0
         self.rppg_signal_buffer.clear()
+        self.rgb_buffer.clear()
+        self.algorithm_rates = {}
+        self.quality.reset()
+        self.last_quality = None
+        self.hr_confidence = 0.0
+        if self.vitals is not None:
+            self.vitals.reset()
+        self.last_vitals = None
+        if self.beats is not None:
+            self.beats.reset()
+        self.last_beats = None
+        self.last_new_beats = []
+        self._analysis_times = None
+        self.filtered_signal_buffer.clear()
+        if self.roi_extractor is not None:
+            self.roi_extractor.reset()
+        self.rppg_stream_filter.reset()
+        self.rppg_running_stats.reset()
+        self.rppg_sdft.reset()
+        self._stream_consumed = 0
+        self._stream_last = None
+        self._stream_next_t = None
+        self.last_spectrum = None
 
     def has_models(self):
-        return self.face_detector is not None
\ No newline at end of file
+        return self.face_detector is not None
+
+    @property
+    def waveform_fs(self):
+        """Laju sampel sinyal terfilter yang dikembalikan filter_and_calculate_hr terakhir."""
+        return self._stream_fs if self.filter_mode == "streaming" else self.analysis_fs
\ No newline at end of file
@@ -0,0 +1,184 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=32)
+def _band_grid(nfft, fs, lowcut_hz, highcut_hz):
+    # Grid frekuensi rfft dan rentang indeks pita, dihitung sekali per (nfft, fs, band)
+    freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+    freqs.flags.writeable = False
+    start = int(np.searchsorted(freqs, lowcut_hz, side='left'))
+    stop = int(np.searchsorted(freqs, highcut_hz, side='right'))
+    return freqs, start, stop
+
+@lru_cache(maxsize=32)
+def _window_coefficients(name, n):
+    if name is None:
+        return None
+    if name == "hann":
+        w = np.hanning(n)
+    elif name == "hamming":
+        w = np.hamming(n)
+    else:
+        raise ValueError(f"Window tidak dikenal: {name}")
+    w.flags.writeable = False
+    return w
+
+def _next_pow2(n):
+    return 1 << max(0, int(n - 1).bit_length())
+
+def parabolic_peak_offset(left, center, right):
+    """
+    Offset sub-bin (-0.5..0.5) dari puncak parabola yang melalui tiga titik
+    bin bertetangga.
+    """
+    denom = left - 2.0 * center + right
+    if denom == 0:
+        return 0.0
+    offset = 0.5 * (left - right) / denom
+    return float(min(0.5, max(-0.5, offset)))
+
+def _interpolated_peak(mags, peak, interpolation):
+    # Interpolasi puncak menggunakan bin tetangga jika tersedia
+    if interpolation is None or peak <= 0 or peak >= len(mags) - 1:
+        return float(peak)
+    left, center, right = mags[peak - 1], mags[peak], mags[peak + 1]
+    if interpolation == "log-parabolic": # Parabola pada log-magnitudo (lebih akurat untuk puncak berjendela)
+        eps = 1e-12
+        left, center, right = np.log(left + eps), np.log(center + eps), np.log(right + eps)
+    elif interpolation != "parabolic":
+        raise ValueError(f"Metode interpolasi tidak dikenal: {interpolation}")
+    return peak + parabolic_peak_offset(left, center, right)
+
+
+class SpectralEstimator:
+    """
+    Estimator laju (per menit) berbasis rfft dengan grid frekuensi dan indeks
+    pita yang di-cache, zero-padding opsional, dan interpolasi puncak sub-bin.
+    """
+    def __init__(self, zero_pad_factor=1, interpolation=None, window=None, min_length=20):
+        if zero_pad_factor < 1:
+            raise ValueError(f"zero_pad_factor minimal 1, didapat {zero_pad_factor}")
+        self.zero_pad_factor = zero_pad_factor
+        self.interpolation = interpolation
+        self.window = window
+        self.min_length = min_length
+        self.last_band_spectrum = None # (freqs, mags) di dalam pita dari estimasi terakhir
+
+    def nfft_for(self, n):
+        if self.zero_pad_factor == 1:
+            return n
+        return _next_pow2(n * self.zero_pad_factor)
+
+    def spectrum(self, signal_values, fs):
+        """Kembalikan (freqs, magnitudo) spektrum satu sisi yang dinormalisasi 2/N."""
+        values = np.asarray(signal_values, dtype=np.float64)
+        n = len(values)
+        window = _window_coefficients(self.window, n)
+        if window is not None:
+            values = values * window
+        nfft = self.nfft_for(n)
+        freqs, _, _ = _band_grid(nfft, float(fs), 0.0, 0.0)
+        mags = np.abs(np.fft.rfft(values, n=nfft))
+        mags *= 2.0 / n
+        return freqs, mags
+
+    def peak_frequency(self, signal_values, fs, lowcut_hz, highcut_hz):
+        n = len(signal_values)
+        if n < self.min_length: # Membutuhkan panjang sinyal yang cukup untuk analisis FFT
+            return 0.0
+        nfft = self.nfft_for(n)
+        freqs, start, stop = _band_grid(nfft, float(fs), float(lowcut_hz), float(highcut_hz))
+        # Abaikan bin Nyquist agar konsisten dengan spektrum positif N//2 sebelumnya
+        stop = min(stop, nfft // 2)
+        if stop <= start: # Tidak ada frekuensi dalam rentang valid
+            return 0.0
+        _, mags = self.spectrum(signal_values, fs)
+        self.last_band_spectrum = (freqs[start:stop], mags[start:stop])
+        peak = start + int(np.argmax(mags[start:stop]))
+        refined_bin = _interpolated_peak(mags, peak, self.interpolation)
+        return refined_bin * fs / nfft
+
+    def estimate_rate(self, signal_values, fs, lowcut_hz, highcut_hz):
+        return self.peak_frequency(signal_values, fs, lowcut_hz, highcut_hz) * 60 # Konversi Hz ke per menit
+
+
+class SlidingDFT:
+    """
+    Sliding DFT yang hanya memperbarui bin di dalam pita (ditambah bin tetangga
+    untuk interpolasi dan window Hann) setiap ada sampel baru: O(jumlah bin) per sampel.
+
+    Pemanggil menyerahkan sampel baru beserta sampel yang keluar dari jendela
+    sepanjang `window_length` (0.0 selama jendela belum penuh).
+    """
+    def __init__(self, window_length, fs, lowcut_hz, highcut_hz, interpolation="parabolic",
+                 window="hann", resync_interval=None):
+        self.window_length = int(window_length)
+        self.fs = float(fs)
+        self.interpolation = interpolation
+        if window not in (None, "hann"):
+            raise ValueError(f"Window sliding DFT tidak didukung: {window}")
+        self.window = window
+        _, start, stop = _band_grid(self.window_length, self.fs, float(lowcut_hz), float(highcut_hz))
+        stop = min(stop, self.window_length // 2)
+        self._band_start = start
+        self._band_stop = stop
+        # Bin yang dilacak: pita + bin tetangga untuk interpolasi (dan konvolusi Hann di domain frekuensi)
+        margin = 2 if window == "hann" else 1
+        self._k_first = max(0, start - margin)
+        self._k = np.arange(self._k_first, min(stop + margin, self.window_length // 2 + 1))
+        self._twiddle = np.exp(2j * np.pi * self._k / self.window_length)
+        self._bins = np.zeros(len(self._k), dtype=np.complex128)
+        # Resinkronisasi periodik membatasi akumulasi error pembulatan
+        self.resync_interval = resync_interval or 10 * self.window_length
+        self._updates_since_resync = 0
+
+    def update(self, new_sample, old_sample=0.0):
+        self._bins += new_sample - old_sample
+        self._bins *= self._twiddle
+        self._updates_since_resync += 1
+
+    def needs_resync(self):
+        return self._updates_since_resync >= self.resync_interval
+
+    def reset(self, window_values=None):
+        """Hitung ulang bin secara eksak dari isi jendela (atau nol-kan jika kosong)."""
+        self._updates_since_resync = 0
+        if window_values is None or len(window_values) == 0:
+            self._bins[:] = 0
+            return
+        values = np.zeros(self.window_length)
+        tail = np.asarray(window_values, dtype=np.float64)[-self.window_length:]
+        values[self.window_length - len(tail):] = tail
+        self._bins[:] = np.fft.rfft(values)[self._k]
+
+    def magnitudes(self):
+        bins = self._bins
+        if self.window == "hann":
+            # Window Hann diterapkan sebagai konvolusi 3-tap pada bin: 0.5 X[k] - 0.25 (X[k-1] + X[k+1])
+            windowed = 0.5 * bins
+            windowed[1:] -= 0.25 * bins[:-1]
+            windowed[:-1] -= 0.25 * bins[1:]
+            bins = windowed
+        return np.abs(bins) * (2.0 / self.window_length)
+
+    def band_spectrum(self):
+        """(freqs, magnitudo) untuk bin di dalam pita."""
+        lo = self._band_start - self._k_first
+        hi = self._band_stop - self._k_first
+        freqs = self._k[lo:hi] * self.fs / self.window_length
+        return freqs, self.magnitudes()[lo:hi]
+
+    def peak_frequency(self):
+        if self._band_stop <= self._band_start:
+            return 0.0
+        mags = self.magnitudes()
+        lo = self._band_start - self._k_first
+        hi = self._band_stop - self._k_first
+        peak = lo + int(np.argmax(mags[lo:hi]))
+        refined_bin = self._k_first + _interpolated_peak(mags, peak, self.interpolation)
+        return refined_bin * self.fs / self.window_length
+
+    def estimate_rate(self):
+        return self.peak_frequency() * 60
@@ -0,0 +1,89 @@
+import importlib
+import json
+import sys
+import threading
+import time
+
+# Durasi import modul berat yang ditunda lewat lazy_import, {nama: detik}
+_import_times = {}
+_import_lock = threading.Lock()
+
+
+class _LazyModule:
+    """
+    Pengganti modul yang baru mengimpor modul aslinya saat atribut pertama
+    diakses, sehingga `signal.filtfilt(...)` tetap bisa ditulis seperti biasa.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with _import_lock:
+                if self._module is None:
+                    already_loaded = self._name in sys.modules
+                    start = time.perf_counter()
+                    self._module = importlib.import_module(self._name)
+                    if not already_loaded:
+                        _import_times[self._name] = time.perf_counter() - start
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Modul `name` yang diimpor saat pertama kali dipakai (mis. mediapipe, scipy.signal)."""
+    return _LazyModule(name)
+
+
+def preload(*modules):
+    """Impor modul lazy sekarang juga, mis. di thread latar sebelum dibutuhkan jalur panas."""
+    for module in modules:
+        if isinstance(module, _LazyModule):
+            module._load()
+
+
+def import_times():
+    return dict(_import_times)
+
+
+class StartupReport:
+    """
+    Catatan waktu startup: setiap fase ditandai relatif terhadap `t0`
+    (sebaiknya diambil di baris pertama skrip), ditambah durasi import lazy.
+    """
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        with self._lock:
+            self.marks.setdefault(phase, time.perf_counter() - self.t0)
+
+    def as_dict(self):
+        with self._lock:
+            marks = dict(self.marks)
+        return {"phases_s": marks, "lazy_imports_s": import_times()}
+
+    def summary_text(self):
+        report = self.as_dict()
+        lines = ["Startup (detik sejak proses dimulai):"]
+        lines += [f"  {phase:<22}{t:7.3f}" for phase, t in sorted(report["phases_s"].items(), key=lambda x: x[1])]
+        if report["lazy_imports_s"]:
+            lines.append("Import tertunda:")
+            lines += [f"  {name:<30}{t:7.3f}" for name, t in report["lazy_imports_s"].items()]
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return path
@@ -0,0 +1,269 @@
+import numpy as np
+
+from .ring_buffer import RingBuffer
+from .roi import ROI_LAYOUTS, layout_rects, integral_box_means
+from .spectral import _band_grid, _interpolated_peak, _next_pow2
+from .signal_processing import butter_bandpass, band_for_fs
+from .resampling import estimate_effective_fs, quantize_fs, resample_uniform
+from .quality import SignalQualityMonitor, roi_saturation
+from .startup import lazy_import
+
+signal = lazy_import("scipy.signal")
+
+
+def boxes_from_detection(face_detection_result):
+    """Semua bounding box (N, 4) x, y, w, h dari hasil FaceDetector."""
+    if face_detection_result is None or not face_detection_result.detections:
+        return np.zeros((0, 4))
+    return np.array([(d.bounding_box.origin_x, d.bounding_box.origin_y,
+                      d.bounding_box.width, d.bounding_box.height)
+                     for d in face_detection_result.detections], dtype=np.float64)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """IoU berpasangan (N, M) antara box (N, 4) dan (M, 4) berformat x, y, w, h."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(1, -1, 4)
+    iw = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def associate(track_boxes, detection_boxes, iou_threshold=0.3):
+    """
+    Pasangkan track dengan deteksi secara greedy berdasarkan IoU tertinggi.
+    Kembalikan (daftar pasangan (i_track, i_deteksi), indeks deteksi tanpa pasangan).
+    """
+    n_dets = len(detection_boxes)
+    if len(track_boxes) == 0 or n_dets == 0:
+        return [], list(range(n_dets))
+    iou = iou_matrix(track_boxes, detection_boxes)
+    pairs = []
+    # Urutkan semua pasangan kandidat sekali, lalu ambil yang belum terpakai
+    order = np.argsort(iou, axis=None)[::-1]
+    used_tracks, used_dets = set(), set()
+    for flat in order:
+        ti, di = divmod(int(flat), n_dets)
+        if iou[ti, di] < iou_threshold:
+            break
+        if ti in used_tracks or di in used_dets:
+            continue
+        pairs.append((ti, di))
+        used_tracks.add(ti)
+        used_dets.add(di)
+    return pairs, [di for di in range(n_dets) if di not in used_dets]
+
+
+class SubjectTrack:
+    """Satu subjek (wajah) dengan ID stabil, satu kolom buffer sinyal, dan state HR sendiri."""
+    def __init__(self, track_id, slot, bbox, timestamp, start_count, quality_monitor):
+        self.id = track_id
+        self.slot = slot # Kolom di buffer sinyal bersama
+        self.bbox = tuple(float(v) for v in bbox)
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.hits = 1
+        self.start_count = start_count # total_appended buffer saat sampel pertama track ini
+        self.last_value = None
+        self.hr = 0.0
+        self.filtered = []
+        self.spectrum = None # (freqs, magnitudo) pita HR dari estimasi terakhir
+        self.roi_rects = []
+        self.quality_monitor = quality_monitor # SignalQualityMonitor milik track ini
+        self.quality = None # SignalQuality dari estimasi terakhir
+
+    def length(self, total_appended, capacity):
+        return max(0, min(total_appended - self.start_count, capacity))
+
+
+class MultiSubjectAnalyzer:
+    """
+    Pengukuran rPPG untuk banyak subjek sekaligus. Track diasosiasikan antar
+    pemanggilan detektor lewat IoU dan kedaluwarsa saat wajah tidak lagi terdeteksi.
+    Setiap track menempati satu kolom RingBuffer 2-D, sehingga ekstraksi ROI
+    (satu integral image untuk semua wajah) serta filter dan FFT berjalan sebagai
+    operasi NumPy 2-D untuk semua track sekaligus. Setiap track punya indeks
+    kualitas sendiri; HR track yang jendelanya tidak layak tidak dipublikasikan (0).
+    """
+    def __init__(self, fps=30, max_subjects=6, rppg_lowcut=0.67, rppg_highcut=4.0,
+                 min_signal_length_factor=2, frame_buffer_factor=10, iou_threshold=0.3,
+                 expiry_seconds=1.5, regions=("forehead", "left_cheek", "right_cheek"), skin_mask=False,
+                 fft_zero_pad_factor=4, peak_interpolation="parabolic", resample_method="linear", min_quality=0.2):
+        if max_subjects <= 0:
+            raise ValueError(f"max_subjects harus positif, didapat {max_subjects}")
+        self.fps = fps
+        self.min_signal_length_factor = min_signal_length_factor
+        self.resample_method = resample_method # None: anggap laju tetap `fps`
+        self.analysis_fs = float(fps)
+        self.max_subjects = max_subjects
+        self.rppg_lowcut = rppg_lowcut
+        self.rppg_highcut = rppg_highcut
+        self.min_signal_length = int(min_signal_length_factor * fps)
+        self.iou_threshold = iou_threshold
+        self.expiry_seconds = expiry_seconds
+        self.skin_mask = skin_mask
+        self.fft_zero_pad_factor = fft_zero_pad_factor
+        self.peak_interpolation = peak_interpolation
+        self.min_quality = min_quality # Sama seperti HealthAnalyzer; None: confidence saja, tanpa gating
+        self._layouts = np.array([ROI_LAYOUTS[name] for name in regions], dtype=np.float64)
+        # Satu kolom per slot subjek; slot kosong diisi 0 dan diabaikan
+        self.signal_buffer = RingBuffer(int(frame_buffer_factor * fps), channels=max_subjects)
+        self._row = np.zeros(max_subjects)
+        self.reset()
+
+    def reset(self):
+        self.signal_buffer.clear()
+        self.tracks = {} # slot -> SubjectTrack
+        self._next_id = 1
+        self._last_detection = None
+
+    @property
+    def active_tracks(self):
+        return sorted(self.tracks.values(), key=lambda t: t.id)
+
+    def primary_track(self):
+        """Subjek dengan wajah terbesar (paling dekat kamera), atau None."""
+        if not self.tracks:
+            return None
+        return max(self.tracks.values(), key=lambda t: t.bbox[2] * t.bbox[3])
+
+    def update_detections(self, face_detection_result, timestamp):
+        detections = boxes_from_detection(face_detection_result)
+        tracks = self.active_tracks
+        pairs, new_dets = associate([t.bbox for t in tracks], detections, self.iou_threshold)
+        for ti, di in pairs:
+            track = tracks[ti]
+            track.bbox = tuple(detections[di])
+            track.last_seen = timestamp
+            track.hits += 1
+        free_slots = [s for s in range(self.max_subjects) if s not in self.tracks]
+        for di in new_dets:
+            if not free_slots:
+                break # Subjek melebihi kapasitas diabaikan sampai ada slot kosong
+            slot = free_slots.pop(0)
+            monitor = SignalQualityMonitor(self.fps, self.rppg_lowcut, self.rppg_highcut, min_quality=self.min_quality)
+            self.tracks[slot] = SubjectTrack(self._next_id, slot, detections[di], timestamp,
+                                             self.signal_buffer.total_appended, monitor)
+            self._next_id += 1
+
+    def _expire(self, timestamp):
+        for slot in [s for s, t in self.tracks.items() if timestamp - t.last_seen > self.expiry_seconds]:
+            del self.tracks[slot]
+
+    def process_frame(self, frame_bgr, face_detection_result, timestamp):
+        """
+        Asosiasikan deteksi baru (objek hasil yang sama tidak diproses ulang),
+        hapus track kedaluwarsa, lalu ambil satu sampel untuk semua track aktif.
+        """
+        if face_detection_result is not None and face_detection_result is not self._last_detection:
+            self._last_detection = face_detection_result
+            self.update_detections(face_detection_result, timestamp)
+        self._expire(timestamp)
+        if not self.tracks:
+            return
+
+        tracks = list(self.tracks.values())
+        frame_h, frame_w = frame_bgr.shape[:2]
+        n_rois = len(self._layouts)
+        rects = layout_rects([t.bbox for t in tracks], self._layouts, frame_w, frame_h)
+        means = integral_box_means(frame_bgr, rects, self.skin_mask).reshape(len(tracks), n_rois, 3)
+        # Kromatisitas hijau per ROI, dirata-rata per subjek (ROI tidak valid diabaikan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            green = means[..., 1] / means.sum(axis=2)
+            finite = np.isfinite(green)
+            values = np.where(finite, green, 0.0).sum(axis=1) / finite.sum(axis=1)
+
+        self._row[:] = 0.0
+        next_count = self.signal_buffer.total_appended + 1
+        for i, track in enumerate(tracks):
+            value = values[i]
+            if not np.isfinite(value):
+                track.quality_monitor.observe_frame(timestamp, False)
+                if track.last_value is None:
+                    track.start_count = next_count # Belum ada sampel valid: mulai dari sampel berikutnya
+                    continue
+                value = track.last_value # Tahan nilai terakhir agar tidak ada celah di sinyal
+            track.last_value = value
+            self._row[track.slot] = value
+            valid = (rects[i * n_rois:(i + 1) * n_rois, 2] > rects[i * n_rois:(i + 1) * n_rois, 0])
+            track.roi_rects = [(int(r[0]), int(r[1]), int(r[2] - r[0]), int(r[3] - r[1]))
+                               for r in rects[i * n_rois:(i + 1) * n_rois][valid]]
+            if np.isfinite(values[i]):
+                track.quality_monitor.observe_frame(timestamp, True, track.bbox,
+                                                    roi_saturation(frame_bgr, track.roi_rects))
+        self.signal_buffer.append(self._row, timestamp)
+
+    def compute_hr(self):
+        """
+        Filter dan estimasi HR semua track yang sinyalnya cukup panjang dalam satu batch. Kembalikan {id: hr}.
+        Track yang jendelanya tidak layak (lihat SignalQualityMonitor) dilewati tanpa filter/FFT dan
+        HR-nya 0; rincian kualitas tiap track ada di track.quality.
+        """
+        total = self.signal_buffer.total_appended
+        capacity = self.signal_buffer.capacity
+        ready = [t for t in self.tracks.values() if t.length(total, capacity) >= self.min_signal_length]
+        if not ready:
+            return {}
+        lengths = np.array([t.length(total, capacity) for t in ready])
+        n = int(lengths.max())
+        data = np.array(self.signal_buffer.values(n)[:, [t.slot for t in ready]])
+        timestamps = self.signal_buffer.timestamps(n)
+        # Waktu sampel pertama tiap track: riwayat track yang lebih baru lebih pendek
+        track_start = timestamps[n - lengths]
+        fs = float(self.fps)
+        if self.resample_method is not None:
+            # Semua kolom diresample sekaligus karena berbagi timestamp yang sama
+            fs = quantize_fs(estimate_effective_fs(timestamps) or float(self.fps))
+            timestamps, data = resample_uniform(timestamps, data, fs, self.resample_method)
+            data = data.reshape(len(timestamps), len(ready))
+            n = len(timestamps)
+        self.analysis_fs = fs
+        lowcut, highcut = band_for_fs(self.rppg_lowcut, self.rppg_highcut, fs)
+        # Sampel sebelum awal track ditandai tidak valid
+        valid = timestamps[:, None] >= track_start[None, :] - 1e-9
+
+        # Indeks kualitas per track atas sinyal mentahnya sendiri; kolom yang tidak layak dibuang dari batch
+        usable = np.zeros(len(ready), dtype=bool)
+        for j, track in enumerate(ready):
+            track.quality = track.quality_monitor.assess(data[valid[:, j], j], fs)
+            usable[j] = track.quality.usable
+            if not usable[j]:
+                track.hr = 0.0
+                track.filtered = []
+                track.spectrum = None
+        if not usable.any():
+            return {}
+        ready = [t for j, t in enumerate(ready) if usable[j]]
+        data, valid = data[:, usable], valid[:, usable]
+        lengths = valid.sum(axis=0)
+
+        # Standardisasi per kolom hanya atas sampel valid; sisanya 0 (setara zero-padding di awal)
+        counts = valid.sum(axis=0)
+        mean = np.where(valid, data, 0.0).sum(axis=0) / counts
+        centered = np.where(valid, data - mean, 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=0) / counts)
+        standardized = centered / np.where(std > 1e-6, std, 1.0)
+
+        padlen = min(int(self.min_signal_length_factor * fs) - 1, n - 1)
+        b, a = butter_bandpass(lowcut, highcut, fs)
+        filtered = signal.filtfilt(b, a, standardized, axis=0, padlen=padlen)
+        filtered[~valid] = 0.0
+
+        # Satu rfft 2-D untuk semua subjek
+        nfft = n if self.fft_zero_pad_factor == 1 else _next_pow2(n * self.fft_zero_pad_factor)
+        freqs, start, stop = _band_grid(nfft, fs, float(lowcut), float(highcut))
+        stop = min(stop, nfft // 2)
+        mags = np.abs(np.fft.rfft(filtered, n=nfft, axis=0))
+        peaks = start + np.argmax(mags[start:stop], axis=0)
+
+        rates = {}
+        for j, track in enumerate(ready):
+            refined = _interpolated_peak(mags[:, j], int(peaks[j]), self.peak_interpolation)
+            track.hr = refined * fs / nfft * 60
+            track.filtered = filtered[n - lengths[j]:, j].tolist()
+            track.spectrum = (freqs[start:stop], mags[start:stop, j] * (2.0 / lengths[j]))
+            rates[track.id] = track.hr
+        return rates
@@ -0,0 +1,161 @@
+import cv2
+import numpy as np
+
+# Amplitudi relatif pulsa per kanal R, G, B pada kulit (de Haan & van Leest, 2014):
+# hijau paling kuat, merah paling lemah
+PULSE_SIGNATURE = np.array([0.33, 0.77, 0.53]) / 0.77
+_BGR = [2, 1, 0]
+
+
+class SyntheticFaceVideo:
+    """
+    Video sintetis tanpa kamera: patch wajah sederhana (cukup untuk detektor
+    BlazeFace) yang warna kulitnya dimodulasi pulsa dengan frekuensi diketahui,
+    ditambah noise sensor, gerakan kepala, dan drift iluminasi yang dapat diatur.
+    Antarmukanya meniru cv2.VideoCapture (isOpened/read/get/release), sehingga
+    bisa langsung dipakai oleh process_video maupun RppgPipeline.
+    """
+    def __init__(self, hr_bpm=72.0, fps=30.0, duration=20.0, width=640, height=480,
+                 pulse_amplitude=0.01, noise_std=2.0, motion_amplitude=0.0, motion_frequency=0.3,
+                 illumination_drift=0.0, drift_period=12.0, respiration_bpm=15.0, respiration_amplitude=0.0,
+                 rsa_bpm=0.0, seed=0):
+        if hr_bpm <= 0 or fps <= 0 or duration <= 0:
+            raise ValueError(f"hr_bpm, fps, dan duration harus positif, didapat {hr_bpm}, {fps}, {duration}")
+        self.hr_bpm = float(hr_bpm)
+        self.fps = float(fps)
+        self.frame_count = int(round(duration * fps))
+        self.width = width
+        self.height = height
+        self.pulse_amplitude = pulse_amplitude # Modulasi relatif kanal hijau pada kulit
+        self.noise_std = noise_std # Simpangan baku noise Gaussian, dalam level abu-abu
+        self.motion_amplitude = motion_amplitude # Pergeseran kepala maksimum, dalam piksel
+        self.motion_frequency = motion_frequency
+        self.illumination_drift = illumination_drift # Perubahan kecerahan relatif maksimum
+        self.drift_period = drift_period
+        self.respiration_bpm = respiration_bpm # Laju napas, per menit
+        self.respiration_amplitude = respiration_amplitude # Modulasi volume darah oleh napas, relatif amplitudo pulsa
+        self.rsa_bpm = rsa_bpm # Ayunan HR oleh napas (respiratory sinus arrhythmia), ±BPM
+        self.seed = seed
+        self.name = f"synthetic_{self.hr_bpm:g}bpm"
+        self._base, self._skin_delta, self._face_rect = self._draw_face()
+        self.reset()
+
+    def _draw_face(self):
+        w, h = self.width, self.height
+        # Latar dengan gradien lembut agar tidak seragam sempurna
+        ramp = np.linspace(0.85, 1.1, w, dtype=np.float32)[None, :, None]
+        base = np.empty((h, w, 3), dtype=np.uint8)
+        base[:] = (90, 100, 110)
+        skin = np.zeros((h, w), dtype=np.uint8)
+        cx, cy = w // 2, h // 2
+        fw, fh = int(0.23 * w), int(0.42 * h)
+
+        cv2.ellipse(base, (cx, cy), (fw // 2, fh // 2), 0, 0, 360, (140, 170, 215), -1)
+        cv2.ellipse(skin, (cx, cy), (fw // 2, fh // 2), 0, 0, 360, 255, -1)
+        # Rambut, mulut, mata, dan alis: digambar pada frame dan dikeluarkan dari masker kulit
+        features = [
+            ((cx, cy - fh // 2 + fh // 8), (fw // 2 + 5, fh // 4), 180, (40, 50, 60)),
+            ((cx, cy + fh // 4), (fw // 5, fh // 20), 0, (90, 90, 170)),
+        ]
+        for s in (-1, 1):
+            ex, ey = cx + s * fw // 5, cy - fh // 12
+            features += [
+                ((ex, ey), (fw // 9, fh // 25), 0, (250, 250, 250)),
+                ((ex, ey), (fh // 33, fh // 33), 0, (50, 40, 30)),
+                ((ex, ey - fh // 10), (fw // 8, max(1, fh // 80)), 0, (50, 60, 80)),
+            ]
+        for center, axes, start_angle, color in features:
+            cv2.ellipse(base, center, axes, 0, start_angle, 360, color, -1)
+            cv2.ellipse(skin, center, axes, 0, start_angle, 360, 0, -1)
+        # Hidung tetap kulit
+        cv2.ellipse(base, (cx, cy + fh // 10), (fw // 19, fh // 11), 0, 0, 360, (120, 145, 195), -1)
+
+        base = cv2.GaussianBlur(base, (7, 7), 0).astype(np.float32) * ramp
+        mask = cv2.GaussianBlur(skin, (7, 7), 0).astype(np.float32) / 255.0
+        # Komponen pulsa per piksel: warna kulit x tanda tangan pulsa, hanya pada area kulit
+        skin_delta = base * mask[..., None] * PULSE_SIGNATURE[_BGR].astype(np.float32) * self.pulse_amplitude
+        return base, skin_delta, (cx - fw // 2, cy - fh // 2, fw, fh)
+
+    def reset(self):
+        self.position = 0
+        self.last_bbox = None
+        self._rng = np.random.default_rng(self.seed)
+
+    def pulse(self, t):
+        # Gelombang pulsa dengan harmonik kedua (bentuk mirip PPG), amplitudi puncak sekitar 1
+        phase = 2 * np.pi * self.hr_bpm / 60.0 * t
+        resp_hz = self.respiration_bpm / 60.0
+        if self.rsa_bpm:
+            # Fase = integral HR sesaat hr_bpm + rsa_bpm * sin(2*pi*f_napas*t)
+            phase += self.rsa_bpm / 60.0 / resp_hz * (1.0 - np.cos(2 * np.pi * resp_hz * t))
+        value = (np.sin(phase) + 0.3 * np.sin(2 * phase + 0.8)) / 1.3
+        if self.respiration_amplitude:
+            value += self.respiration_amplitude * np.sin(2 * np.pi * resp_hz * t)
+        return value
+
+    def offset(self, t):
+        if self.motion_amplitude == 0:
+            return 0.0, 0.0
+        phase = 2 * np.pi * self.motion_frequency * t
+        return self.motion_amplitude * np.sin(phase), 0.5 * self.motion_amplitude * np.sin(1.3 * phase + 1.0)
+
+    def face_bbox(self, t):
+        """Bounding box wajah sebenarnya (x, y, w, h) pada waktu t."""
+        dx, dy = self.offset(t)
+        x, y, w, h = self._face_rect
+        return int(round(x + dx)), int(round(y + dy)), w, h
+
+    def render(self, index):
+        """Frame BGR uint8 ke-`index`; bounding box sebenarnya disimpan di last_bbox."""
+        t = index / self.fps
+        frame = self._base + self.pulse(t) * self._skin_delta
+        if self.illumination_drift:
+            frame *= 1.0 + self.illumination_drift * np.sin(2 * np.pi * t / self.drift_period)
+        if self.noise_std > 0:
+            frame += self._rng.standard_normal(frame.shape, dtype=np.float32) * self.noise_std
+        dx, dy = self.offset(t)
+        if dx or dy:
+            frame = cv2.warpAffine(frame, np.float32([[1, 0, dx], [0, 1, dy]]), (self.width, self.height),
+                                   borderMode=cv2.BORDER_REPLICATE)
+        self.last_bbox = self.face_bbox(t)
+        return np.clip(frame, 0, 255).astype(np.uint8)
+
+    def __len__(self):
+        return self.frame_count
+
+    # --- Antarmuka mirip cv2.VideoCapture ---
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        if self.position >= self.frame_count:
+            return False, None
+        frame = self.render(self.position)
+        self.position += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            frame = image
+        return True, frame
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_COUNT: float(self.frame_count),
+            cv2.CAP_PROP_FRAME_WIDTH: float(self.width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.height),
+            cv2.CAP_PROP_POS_FRAMES: float(self.position),
+        }.get(prop, 0.0)
+
+    def release(self):
+        pass
+
+    def write(self, path, fourcc="MJPG"):
+        """Simpan seluruh video ke file (mis. untuk diuji lewat batch.py)."""
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), self.fps, (self.width, self.height))
+        self.reset()
+        ok, frame = self.read()
+        while ok:
+            writer.write(frame)
+            ok, frame = self.read()
+        writer.release()
+        self.reset()
@@ -0,0 +1,421 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+PROTOCOL_VERSION = 1
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_MAX_HANDSHAKE_BYTES = 8192
+
+
+def _clean(value):
+    # Nilai NumPy menjadi tipe JSON biasa; NaN/inf (tidak valid di JSON standar) menjadi null
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_clean(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _encode(message):
+    return json.dumps(_clean(message), separators=(",", ":")).encode("utf-8")
+
+
+def _ws_frame(payload, opcode=0x1):
+    """Frame WebSocket (RFC 6455) tunggal tanpa masking, sebagaimana dikirim server."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+class _Client:
+    """
+    Antrian pesan satu subscriber. Penuh: pesan terlama dibuang, sehingga klien
+    yang lambat hanya kehilangan pesan miliknya sendiri dan tidak pernah menahan
+    publisher maupun klien lain.
+    """
+    def __init__(self, writer, capacity, websocket):
+        self.writer = writer
+        self.websocket = websocket
+        self.queue = deque(maxlen=capacity)
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        self.tasks = () # (pump, watch) selama koneksi aktif
+
+    def push(self, payload):
+        """Masukkan pesan ke antrian; True bila pesan terlama terbuang."""
+        full = len(self.queue) == self.queue.maxlen
+        if full:
+            self.dropped += 1
+        self.queue.append(payload)
+        self.wakeup.set()
+        return full
+
+
+class TelemetryServer:
+    """
+    Server telemetri lokal berbasis asyncio di thread latar: setiap pesan
+    publish() dikirim ke semua subscriber sebagai newline-delimited JSON lewat
+    TCP (tcp_port) dan/atau sebagai frame teks WebSocket (ws_port). publish()
+    aman dipanggil dari thread mana pun dan tidak pernah memblokir: pesan
+    diserialisasi sekali di thread server lalu dimasukkan ke antrian
+    drop-oldest milik setiap klien.
+    """
+    def __init__(self, host="127.0.0.1", tcp_port=8765, ws_port=8766, client_queue=64, max_clients=32):
+        if tcp_port is None and ws_port is None:
+            raise ValueError("TelemetryServer membutuhkan tcp_port dan/atau ws_port")
+        if client_queue < 1:
+            raise ValueError(f"client_queue minimal 1, didapat {client_queue}")
+        self.host = host
+        self.tcp_port = tcp_port
+        self.ws_port = ws_port
+        self.client_queue = client_queue
+        self.max_clients = max_clients
+        self.published = 0
+        self._clients = set()
+        self._dropped = 0 # Hanya diubah oleh thread event loop; dibaca lintas thread sebagai satu int
+        self._loop = None
+        self._thread = None
+        self._servers = []
+        self._handlers = set() # Task per koneksi (termasuk yang masih handshake WebSocket)
+        self._writers = set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def clients(self):
+        return len(self._clients)
+
+    @property
+    def dropped(self):
+        """Total pesan yang dibuang karena antrian klien penuh."""
+        return self._dropped
+
+    def start(self, timeout=5.0):
+        """Jalankan event loop di thread daemon; OSError bila port tidak bisa dipakai."""
+        if self.running:
+            return
+        ready = threading.Event()
+        failure = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            try:
+                loop.run_until_complete(self._open_servers())
+            except OSError as e:
+                failure.append(e)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self._shutdown())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="telemetry", daemon=True)
+        self._thread.start()
+        ready.wait(timeout)
+        if failure:
+            self._thread.join()
+            self._thread = None
+            self._loop = None
+            raise failure[0]
+
+    async def _open_servers(self):
+        if self.tcp_port is not None:
+            server = await asyncio.start_server(self._serve_tcp, self.host, self.tcp_port)
+            self.tcp_port = server.sockets[0].getsockname()[1] # Port 0: dipilih OS
+            self._servers.append(server)
+        if self.ws_port is not None:
+            server = await asyncio.start_server(self._serve_websocket, self.host, self.ws_port)
+            self.ws_port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+
+    async def _shutdown(self, timeout=2.0):
+        # Koneksi ditutup lebih dulu: sejak Python 3.12 wait_closed() menunggu semua koneksi selesai
+        for server in self._servers:
+            server.close()
+        for client in list(self._clients):
+            for task in client.tasks:
+                task.cancel()
+        for writer in list(self._writers):
+            writer.close() # Handler yang masih handshake selesai karena EOF
+        handlers = list(self._handlers)
+        if handlers:
+            await asyncio.wait(handlers, timeout=timeout)
+        for server in self._servers:
+            try:
+                await asyncio.wait_for(server.wait_closed(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._servers = []
+
+    def stop(self, timeout=5.0):
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self._loop = None
+
+    def publish(self, message):
+        """Kirim dict ke semua subscriber (non-blocking, aman lintas thread). False bila tidak ada subscriber."""
+        loop = self._loop
+        if loop is None or not self._clients:
+            return False
+        try:
+            loop.call_soon_threadsafe(self._broadcast, message)
+        except RuntimeError: # Loop sedang ditutup
+            return False
+        return True
+
+    def _broadcast(self, message):
+        self.published += 1
+        payload = _encode(message)
+        line = frame = None
+        dropped = 0
+        for client in self._clients:
+            if client.websocket:
+                frame = frame or _ws_frame(payload)
+                dropped += client.push(frame)
+            else:
+                line = line or payload + b"\n"
+                dropped += client.push(line)
+        self._dropped += dropped
+
+    async def _serve_tcp(self, reader, writer):
+        await self._serve_connection(reader, writer, websocket=False)
+
+    async def _serve_websocket(self, reader, writer):
+        await self._serve_connection(reader, writer, websocket=True)
+
+    async def _serve_connection(self, reader, writer, websocket):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        self._writers.add(writer)
+        try:
+            if not websocket or await self._handshake(reader, writer):
+                await self._serve_client(reader, writer, websocket)
+        finally:
+            self._handlers.discard(handler)
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _handshake(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return False
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if len(request) > _MAX_HANDSHAKE_BYTES or not key or headers.get("upgrade", "").lower() != "websocket":
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii"))
+        return True
+
+    async def _serve_client(self, reader, writer, websocket):
+        if len(self._clients) >= self.max_clients:
+            return
+        client = _Client(writer, self.client_queue, websocket)
+        self._clients.add(client)
+        hello = _encode({"type": "hello", "version": PROTOCOL_VERSION, "client_queue": self.client_queue})
+        client.push(_ws_frame(hello) if websocket else hello + b"\n")
+        pump = asyncio.ensure_future(self._pump(client))
+        watch = asyncio.ensure_future(self._watch_websocket(reader, client) if websocket else self._watch_tcp(reader))
+        client.tasks = (pump, watch)
+        try:
+            # Selesai saat klien menutup koneksi atau penulisan gagal
+            await asyncio.wait((pump, watch), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            pump.cancel()
+            watch.cancel()
+            self._clients.discard(client)
+
+    async def _pump(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                while client.queue:
+                    writer.write(client.queue.popleft())
+                    # Hanya coroutine klien ini yang menunggu bila socket-nya penuh
+                    await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _watch_tcp(self, reader):
+        # Klien NDJSON hanya membaca; data masuk diabaikan sampai EOF
+        try:
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+
+    async def _watch_websocket(self, reader, client):
+        # Frame dari klien (selalu bermasker): close diakhiri, ping dijawab pong, lainnya diabaikan
+        try:
+            while True:
+                b0, b1 = await reader.readexactly(2)
+                opcode, n = b0 & 0x0F, b1 & 0x7F
+                if n == 126:
+                    n = struct.unpack("!H", await reader.readexactly(2))[0]
+                elif n == 127:
+                    n = struct.unpack("!Q", await reader.readexactly(8))[0]
+                mask = await reader.readexactly(4) if b1 & 0x80 else b"\0\0\0\0"
+                data = await reader.readexactly(n) if n else b""
+                if opcode == 0x8:
+                    client.writer.write(_ws_frame(b"", 0x8))
+                    return
+                if opcode == 0x9:
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+                    client.push(_ws_frame(payload, 0xA))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+
+class TelemetryPublisher:
+    """
+    Ubah hasil estimasi menjadi pesan telemetri: "hr" (HR, confidence, kualitas,
+    vital, statistik detak), "waveform" (hanya sampel sinyal terfilter yang baru
+    sejak pesan sebelumnya), dan "timings" (snapshot PerfMonitor, paling sering
+    sekali per timings_interval_s).
+    """
+    def __init__(self, server, timings_interval_s=1.0):
+        self.server = server
+        self.timings_interval_s = timings_interval_s
+        self.reset()
+
+    def reset(self):
+        self._last_waveform_t = None
+        self._last_timings_t = None
+
+    def publish_result(self, timestamp, hr, confidence, filtered=None, fs=None, quality=None, vitals=None,
+                       beats=None, source=None):
+        """Kirim satu hasil DSP; `filtered` adalah jendela sinyal terfilter penuh berlaju `fs`."""
+        if not self.server.clients:
+            return
+        message = {"type": "hr", "t": timestamp, "hr": hr if hr > 0 else None, "confidence": confidence}
+        if source is not None:
+            message["source"] = source
+        if quality is not None:
+            message["quality"] = quality._asdict()
+        if vitals is not None:
+            message["vitals"] = vitals._asdict()
+        if beats is not None:
+            message["beats"] = beats._asdict()
+        self.server.publish(message)
+
+        if filtered is None or not len(filtered) or not fs:
+            return
+        # Potongan waveform: sampel yang mencakup waktu sejak potongan sebelumnya
+        n = len(filtered)
+        if self._last_waveform_t is not None:
+            n = min(n, int(round((timestamp - self._last_waveform_t) * fs)))
+        self._last_waveform_t = timestamp
+        if n <= 0:
+            return
+        message = {"type": "waveform", "t": timestamp, "fs": fs,
+                   "samples": np.round(np.asarray(filtered[-n:], dtype=np.float64), 4)}
+        if source is not None:
+            message["source"] = source
+        self.server.publish(message)
+
+    def publish_timings(self, perf, now=None):
+        """Kirim snapshot latensi per stage bila timings_interval_s sudah lewat."""
+        if not self.server.clients or perf is None or not perf.enabled:
+            return
+        now = time.monotonic() if now is None else now
+        if self._last_timings_t is not None and now - self._last_timings_t < self.timings_interval_s:
+            return
+        self._last_timings_t = now
+        self.server.publish({"type": "timings", "t": now, **perf.snapshot(), "telemetry_dropped": self.server.dropped})
+
+
+def stream_source(source, analyzer, publisher, tracking=None, process_interval=15, mirror=True, stop_event=None,
+                  perf=None):
+    """
+    Loop headless: capture dari `source` (indeks kamera atau path video), deteksi +
+    pelacakan wajah, dan DSP HealthAnalyzer (running_mode="video"), setiap hasil
+    dikirim lewat `publisher`. Berhenti saat sumber habis atau stop_event di-set.
+    Kembalikan jumlah frame yang diproses.
+    """
+    import cv2 # Hanya untuk loop headless; server sendiri tidak membutuhkan OpenCV
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Tidak dapat membuka sumber: {source}")
+    is_file = isinstance(source, str)
+    # File diputar sesuai FPS-nya agar timestamp dan laju pesan seperti kamera langsung
+    frame_period = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or analyzer.fps) if is_file else 0.0
+    frames = frames_since_process = 0
+    frame = None
+    next_frame_time = time.monotonic()
+    try:
+        while stop_event is None or not stop_event.is_set():
+            ret, frame = cap.read(frame) if frame is not None else cap.read()
+            if not ret:
+                break
+            t = time.monotonic()
+            frames += 1
+            if not is_file and mirror:
+                frame = cv2.flip(frame, 1)
+            if tracking is not None:
+                detection = None
+                if tracking.should_detect():
+                    detection = analyzer.detect_faces_in_frame(frame, timestamp_ms=int(t * 1000),
+                                                               prev_bbox=tracking.current_bbox())
+                face_bbox = tracking.update(frame, detection)
+                if face_bbox is not None:
+                    analyzer.process_rppg_from_bbox(frame, face_bbox, timestamp=t, draw_roi=False)
+                else:
+                    analyzer.note_missing_face(t)
+            else:
+                detection = analyzer.detect_faces_in_frame(frame, timestamp_ms=int(t * 1000))
+                analyzer.process_rppg_from_face(frame, detection, timestamp=t, draw_roi=False)
+
+            frames_since_process += 1
+            if frames_since_process >= process_interval and len(analyzer.rppg_signal_buffer) >= analyzer.min_signal_length:
+                frames_since_process = 0
+                filtered, hr = analyzer.filter_and_calculate_hr()
+                publisher.publish_result(t, hr, analyzer.hr_confidence, filtered, analyzer.waveform_fs,
+                                         analyzer.last_quality, analyzer.last_vitals, analyzer.last_beats)
+            publisher.publish_timings(perf or analyzer.perf, t)
+
+            if frame_period:
+                next_frame_time += frame_period
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.monotonic()
+    finally:
+        cap.release()
+    return frames
@@ -0,0 +1,230 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+def bbox_from_detection(face_detection_result):
+    """Bounding box (x, y, w, h) wajah utama dari hasil FaceDetector, atau None."""
+    if face_detection_result is None or not face_detection_result.detections:
+        return None
+    bbox = face_detection_result.detections[0].bounding_box
+    return int(bbox.origin_x), int(bbox.origin_y), int(bbox.width), int(bbox.height)
+
+
+def bbox_iou(box_a, box_b):
+    """Intersection-over-union dua box (x, y, w, h)."""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    iw = max(0.0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0.0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """
+    Pelacak bounding box wajah yang murah di antara pemanggilan detektor:
+    sparse optical flow (Lucas-Kanade) pada beberapa titik fitur di dalam box,
+    dihitung pada frame grayscale yang diperkecil.
+    """
+    def __init__(self, downscale=0.5, max_points=24, min_points=5, fb_error_threshold=1.0):
+        self.downscale = downscale
+        self.max_points = max_points
+        self.min_points = min_points
+        self.fb_error_threshold = fb_error_threshold
+        self._lk_params = dict(winSize=(15, 15), maxLevel=2,
+                               criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        # Dua buffer grayscale dipakai bergantian: frame sebelumnya tetap utuh untuk optical flow
+        self._gray_buffers = [None, None]
+        self._gray_index = 0
+        self.reset()
+
+    def reset(self):
+        self.bbox = None # (x, y, w, h) dalam koordinat resolusi penuh, float
+        self._prev_gray = None
+        self._points = None
+        self.confidence = 0.0
+        self.motion = 0.0 # Perpindahan median relatif terhadap ukuran box
+
+    def _small_gray(self, frame_bgr):
+        h, w = frame_bgr.shape[:2]
+        size = (max(1, int(w * self.downscale)), max(1, int(h * self.downscale)))
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        self._gray_index ^= 1
+        buffer = self._gray_buffers[self._gray_index]
+        if buffer is None or buffer.shape != (size[1], size[0]):
+            buffer = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._gray_buffers[self._gray_index] = buffer
+        return cv2.resize(gray, size, dst=buffer, interpolation=cv2.INTER_AREA)
+
+    def _seed_points(self, gray, bbox):
+        s = self.downscale
+        x, y, w, h = [int(v * s) for v in bbox]
+        mask = np.zeros_like(gray)
+        mask[max(0, y):y + h, max(0, x):x + w] = 255
+        points = cv2.goodFeaturesToTrack(gray, maxCorners=self.max_points, qualityLevel=0.01,
+                                         minDistance=max(2, min(w, h) // 8), mask=mask)
+        if points is None or len(points) < self.min_points:
+            # Permukaan wajah yang halus: pakai grid 3x3 di dalam box
+            gx, gy = np.meshgrid(np.linspace(x + w * 0.2, x + w * 0.8, 3),
+                                 np.linspace(y + h * 0.2, y + h * 0.8, 3))
+            points = np.stack([gx.ravel(), gy.ravel()], axis=1).reshape(-1, 1, 2)
+        return points.astype(np.float32)
+
+    def init(self, frame_bgr, bbox):
+        gray = self._small_gray(frame_bgr)
+        self.bbox = tuple(float(v) for v in bbox)
+        self._prev_gray = gray
+        self._points = self._seed_points(gray, bbox)
+        self.confidence = 1.0
+        self.motion = 0.0
+
+    def update(self, frame_bgr):
+        """Perbarui box dengan frame baru. Kembalikan box (int) atau None jika pelacakan hilang."""
+        if self.bbox is None or self._points is None or len(self._points) == 0:
+            return None
+        gray = self._small_gray(frame_bgr)
+        next_pts, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None, **self._lk_params)
+        back_pts, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, next_pts, None, **self._lk_params)
+        # Forward-backward error sebagai ukuran keandalan tiap titik
+        fb_error = np.linalg.norm((self._points - back_pts).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_error_threshold)
+        self.confidence = float(good.sum()) / len(self._points)
+        self._prev_gray = gray
+        if good.sum() < self.min_points:
+            self.reset()
+            return None
+
+        old = self._points.reshape(-1, 2)[good]
+        new = next_pts.reshape(-1, 2)[good]
+        shift = np.median(new - old, axis=0) / self.downscale
+        # Skala dari rasio sebaran titik terhadap pusatnya
+        old_spread = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+        new_spread = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+        scale = new_spread / old_spread if old_spread > 1e-3 else 1.0
+
+        x, y, w, h = self.bbox
+        cx, cy = x + w / 2 + shift[0], y + h / 2 + shift[1]
+        w, h = w * scale, h * scale
+        self.bbox = (cx - w / 2, cy - h / 2, w, h)
+        self.motion = float(np.hypot(shift[0], shift[1]) / max(1.0, min(w, h)))
+        self._points = new.reshape(-1, 1, 2)
+        return tuple(int(round(v)) for v in self.bbox)
+
+
+class AdaptiveInferenceController:
+    """
+    Mengatur interval inferensi detektor: makin jarang saat pelacak yakin dan
+    wajah diam, langsung deteksi ulang saat pelacakan hilang atau gerakan tinggi.
+    """
+    def __init__(self, min_interval=1, max_interval=15, confidence_threshold=0.6, motion_threshold=0.05,
+                 agreement_threshold=0.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.confidence_threshold = confidence_threshold
+        self.motion_threshold = motion_threshold
+        # IoU minimal antara box hasil lacak dan deteksi baru agar pelacak dianggap tidak drift
+        self.agreement_threshold = agreement_threshold
+        self.reset()
+
+    def reset(self):
+        self.interval = self.min_interval
+        self._frames_since_detection = 0
+        self._force_detection = True
+        self.detections_requested = 0
+
+    def should_detect(self):
+        """Dipanggil sekali per frame oleh stage deteksi."""
+        self._frames_since_detection += 1
+        if self._force_detection or self._frames_since_detection >= self.interval:
+            self._force_detection = False
+            self._frames_since_detection = 0
+            self.detections_requested += 1
+            return True
+        return False
+
+    def on_detection(self, found, agreement=None):
+        """`agreement`: IoU box pelacak vs deteksi baru (None jika pelacak belum punya box)."""
+        if not found:
+            self.interval = self.min_interval
+            self._force_detection = True
+        elif agreement is not None and agreement < self.agreement_threshold:
+            self.interval = self.min_interval # Pelacak drift: rapatkan deteksi
+        elif self.interval < self.max_interval:
+            self.interval += 1
+
+    def on_track(self, confidence, motion):
+        if confidence < self.confidence_threshold or motion > self.motion_threshold:
+            self.interval = self.min_interval
+            self._force_detection = True
+        elif self.interval < self.max_interval:
+            self.interval += 1 # Naik perlahan selama pelacakan stabil
+
+
+class FaceTrackingController:
+    """
+    Menggabungkan hasil detektor dan FaceTracker: box diinisialisasi ulang setiap
+    ada deteksi baru, dan dilacak setiap frame di antaranya.
+
+    Aman dipakai lintas thread (pipeline: detektor memanggil should_detect() dan
+    current_bbox(), DSP memanggil update()): semua akses ke pelacak dan pengendali
+    interval melewati satu lock, jadi jangan akses `tracker`/`controller` langsung
+    selagi pipeline berjalan.
+    """
+    def __init__(self, tracker=None, controller=None):
+        self.tracker = tracker or FaceTracker()
+        self.controller = controller or AdaptiveInferenceController()
+        self._last_detection = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.tracker.reset()
+            self.controller.reset()
+            self._last_detection = None
+
+    def should_detect(self):
+        with self._lock:
+            return self.controller.should_detect()
+
+    def current_bbox(self):
+        """Box terakhir hasil deteksi/pelacakan (x, y, w, h), atau None."""
+        with self._lock:
+            return self.tracker.bbox
+
+    def set_min_interval(self, interval):
+        """Naikkan/turunkan batas bawah interval inferensi (knob load shedding)."""
+        with self._lock:
+            controller = self.controller
+            controller.min_interval = interval
+            controller.max_interval = max(controller.max_interval, interval)
+            controller.interval = max(controller.interval, interval)
+
+    def update(self, frame_bgr, detection_result):
+        """
+        Kembalikan box wajah untuk frame ini. Hasil deteksi yang sama (objek
+        yang sama) dengan pemanggilan sebelumnya tidak dianggap deteksi baru.
+        """
+        with self._lock:
+            return self._update(frame_bgr, detection_result)
+
+    def _update(self, frame_bgr, detection_result):
+        if detection_result is not None and detection_result is not self._last_detection:
+            self._last_detection = detection_result
+            bbox = bbox_from_detection(detection_result)
+            tracked = self.tracker.bbox
+            agreement = bbox_iou(tracked, bbox) if (tracked is not None and bbox is not None) else None
+            self.controller.on_detection(bbox is not None, agreement)
+            if bbox is None:
+                self.tracker.reset()
+                return None
+            self.tracker.init(frame_bgr, bbox)
+            return bbox
+        bbox = self.tracker.update(frame_bgr)
+        if bbox is None:
+            self.controller.on_detection(False)
+            return None
+        self.controller.on_track(self.tracker.confidence, self.tracker.motion)
+        return bbox
@@ -0,0 +1,138 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+from .spectral import _band_grid, _interpolated_peak, _next_pow2, _window_coefficients
+
+# Vital tambahan dari satu spektrum jendela panjang; respiration_rpm 0 bila puncak napas tidak
+# menonjol dari noise. hr_bpm adalah HR jendela panjang (titik tengah proksi HRV), bukan HR yang dipublikasikan
+Vitals = namedtuple("Vitals", ["respiration_rpm", "hrv_bpm", "hr_bpm", "window_s"])
+
+
+@lru_cache(maxsize=32)
+def _window_spread_hz(n, nfft, fs, halfwidth_hz):
+    # Lebar spektral (std frekuensi berbobot daya) sebuah nada murni berjendela Hann sepanjang n,
+    # yaitu pelebaran puncak oleh jendela itu sendiri; dikurangkan dari lebar terukur
+    power = np.abs(np.fft.rfft(np.hanning(n), n=nfft)) ** 2
+    freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+    keep = freqs <= halfwidth_hz
+    # Spektrum simetris terhadap 0, sehingga rata-ratanya 0 dan variansnya E[f^2]
+    weights = power[keep] * np.where(freqs[keep] > 0, 2.0, 1.0)
+    return float(np.sqrt(np.sum(weights * freqs[keep] ** 2) / np.sum(weights)))
+
+
+class VitalSignsEstimator:
+    """
+    Laju napas dan proksi HRV dari trace rPPG mentah yang sama dengan HR.
+    Sampel dirata-rata per blok waktu ke cabang berlaju rendah (default 10 Hz),
+    sehingga jendela panjang (default 32 detik) hanya beberapa ratus titik.
+    Satu rFFT jendela itu dipakai bersama untuk pita napas dan pita HR; proksi
+    HRV adalah lebar puncak HR (std frekuensi berbobot daya) setelah pelebaran
+    akibat jendela dikurangkan, dalam BPM.
+    """
+    def __init__(self, window_s=32.0, fs=10.0, hr_band=(0.67, 4.0), resp_band=(0.1, 0.5), min_window_s=12.0,
+                 zero_pad_factor=4, interpolation="parabolic", hrv_halfwidth_hz=0.3, update_interval_s=1.0,
+                 max_gap_s=2.0, min_resp_prominence=5.0):
+        if fs <= 2 * hr_band[1]:
+            raise ValueError(f"fs cabang vital ({fs} Hz) harus di atas 2x batas atas pita HR ({hr_band[1]} Hz)")
+        if min_window_s > window_s:
+            raise ValueError(f"min_window_s ({min_window_s}) melebihi window_s ({window_s})")
+        self.fs = float(fs)
+        self.hr_band = hr_band
+        self.resp_band = resp_band
+        self.zero_pad_factor = zero_pad_factor
+        self.interpolation = interpolation
+        self.hrv_halfwidth_hz = hrv_halfwidth_hz
+        # Daya puncak napas minimal relatif rata-rata daya pita napas (noise putih: median ±3)
+        self.min_resp_prominence = min_resp_prominence
+        self.min_length = int(min_window_s * self.fs)
+        self._update_every = max(1, int(update_interval_s * self.fs)) # Sampel cabang antar estimasi ulang
+        self._max_gap_slots = int(max_gap_s * self.fs) # Celah lebih panjang dari ini memutus jendela
+        # Cabang berlaju rendah: satu nilai (rata-rata blok) per 1/fs detik, dengan timestamp tengah blok
+        self.buffer = RingBuffer(int(round(window_s * self.fs)))
+        self.reset()
+
+    def reset(self):
+        self.buffer.clear()
+        self._slot = None # Indeks blok yang sedang diakumulasi, floor(t * fs)
+        self._sum = 0.0
+        self._count = 0
+        self._last_slot = None # Blok terakhir yang sudah masuk buffer
+        self._last_value = 0.0
+        self._last_total = -1
+        self.last = None
+
+    def push(self, value, timestamp):
+        """Tambahkan satu sampel mentah; O(1), blok yang selesai langsung masuk buffer."""
+        slot = int(np.floor(timestamp * self.fs))
+        if self._slot is not None and slot > self._slot:
+            self._emit(self._slot, self._sum / self._count)
+            self._sum, self._count = 0.0, 0
+        if self._slot is None or slot > self._slot:
+            self._slot = slot
+        self._sum += value # Timestamp mundur tetap dihitung pada blok yang sedang berjalan
+        self._count += 1
+
+    def _emit(self, slot, value):
+        if self._last_slot is not None:
+            missing = slot - self._last_slot - 1
+            if missing > self._max_gap_slots:
+                self.buffer.clear() # Celah terlalu panjang (wajah hilang lama): mulai jendela baru
+                self._last_total = -1
+            elif missing > 0:
+                # Blok tanpa sampel (frame tanpa wajah) diisi interpolasi linear
+                fill = np.linspace(self._last_value, value, missing + 2)[1:-1]
+                for k, v in enumerate(fill, start=1):
+                    self.buffer.append(v, (self._last_slot + k + 0.5) / self.fs)
+        self.buffer.append(value, (slot + 0.5) / self.fs)
+        self._last_slot, self._last_value = slot, value
+
+    def estimate(self):
+        """Vitals jendela saat ini, atau None bila jendela belum cukup panjang. Dihitung ulang per update_interval_s."""
+        n = len(self.buffer)
+        if n < self.min_length:
+            self.last = None
+            return None
+        total = self.buffer.total_appended
+        if self.last is not None and total - self._last_total < self._update_every:
+            return self.last
+        self._last_total = total
+
+        x = np.asarray(self.buffer.values(), dtype=np.float64)
+        t = np.arange(n) - (n - 1) / 2.0
+        x = x - x.mean()
+        x = x - t * (np.dot(t, x) / np.dot(t, t)) # Detrend linear: drift iluminasi tidak masuk pita napas
+        nfft = _next_pow2(n * self.zero_pad_factor)
+        mags = np.abs(np.fft.rfft(x * _window_coefficients("hann", n), n=nfft))
+        power = mags ** 2
+
+        resp_hz = self._peak_hz(mags, nfft, self.resp_band, self.min_resp_prominence)
+        hr_hz = self._peak_hz(mags, nfft, self.hr_band)
+        hrv_hz = 0.0
+        if hr_hz > 0:
+            # Indeks dicari langsung: batas pita ini bergeser mengikuti HR, tidak layak di-cache
+            freqs = _band_grid(nfft, self.fs, 0.0, 0.0)[0]
+            start, stop = np.searchsorted(freqs, (hr_hz - self.hrv_halfwidth_hz, hr_hz + self.hrv_halfwidth_hz))
+            weights = power[start:stop]
+            if weights.sum() > 0:
+                mean = np.dot(weights, freqs[start:stop]) / weights.sum()
+                var = np.dot(weights, (freqs[start:stop] - mean) ** 2) / weights.sum()
+                floor = _window_spread_hz(n, nfft, self.fs, self.hrv_halfwidth_hz)
+                hrv_hz = float(np.sqrt(max(0.0, var - floor ** 2)))
+        self.last = Vitals(resp_hz * 60, hrv_hz * 60, hr_hz * 60, n / self.fs)
+        return self.last
+
+    def _peak_hz(self, mags, nfft, band, min_prominence=None):
+        # 0.0 bila pita kosong atau puncaknya tidak menonjol dari noise
+        _, start, stop = _band_grid(nfft, self.fs, float(band[0]), float(band[1]))
+        stop = min(stop, nfft // 2)
+        if stop <= start:
+            return 0.0
+        peak = start + int(np.argmax(mags[start:stop]))
+        if min_prominence is not None:
+            band_power = mags[start:stop] ** 2
+            if band_power[peak - start] < min_prominence * band_power.mean():
+                return 0.0
+        return _interpolated_peak(mags, peak, self.interpolation) * self.fs / nfft
@@ -0,0 +1,195 @@
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF, QImage, QFont
+from PyQt5.QtCore import Qt, QRectF
+
+
+def _polygon_from_arrays(xs, ys):
+    """
+    Bangun QPolygonF langsung dari array NumPy dengan menulis ke buffer
+    internal polygon (tanpa membuat QPointF satu per satu).
+    """
+    n = len(xs)
+    polygon = QPolygonF(n)
+    if n == 0:
+        return polygon
+    ptr = polygon.data()
+    ptr.setsize(n * 2 * 8) # QPointF = dua double
+    coords = np.frombuffer(ptr, dtype=np.float64).reshape(n, 2)
+    coords[:, 0] = xs
+    coords[:, 1] = ys
+    return polygon
+
+
+class WaveformWidget(QWidget):
+    """
+    Plot garis real-time berbasis QPainter. Data diterima sebagai array NumPy
+    dan digambar sebagai satu polyline; tidak ada figure/axes yang di-render ulang.
+    """
+    def __init__(self, title="", color="#FF6B6B", y_range=None, x_range=None, y_margin=0.1,
+                 value_format="{:.2f}", parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.color = QColor(color)
+        self.fixed_y_range = y_range # None: autoscale dengan smoothing
+        self.fixed_x_range = x_range
+        self.y_margin = y_margin
+        self.value_format = value_format
+        self.background = QColor("#1E1E1E")
+        self.grid_color = QColor("#333333")
+        self.text_color = QColor("#AAAAAA")
+        self.markers = [] # Garis vertikal penanda (mis. batas pita frekuensi), dalam satuan x
+        self._xs = np.zeros(0)
+        self._ys = np.zeros(0)
+        self._band = None # (bawah, atas) sejajar dengan _xs, mis. min/max tren teragregasi
+        self._y_range = None
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumHeight(60)
+
+    def set_data(self, ys, xs=None, band=None):
+        ys = np.array(ys, dtype=np.float64) # Salinan: view ring buffer bisa berubah setelah ini
+        if xs is None:
+            xs = np.arange(len(ys), dtype=np.float64)
+        else:
+            xs = np.array(xs, dtype=np.float64)
+        self._xs, self._ys = xs, ys
+        self._band = None
+        if band is not None:
+            self._band = (np.array(band[0], dtype=np.float64), np.array(band[1], dtype=np.float64))
+        if self.fixed_y_range is None and len(ys):
+            lo, hi = float(np.min(ys)), float(np.max(ys))
+            if self._band is not None:
+                lo, hi = min(lo, float(np.min(self._band[0]))), max(hi, float(np.max(self._band[1])))
+            if self._y_range is None:
+                self._y_range = (lo, hi)
+            else: # Smoothing skala agar plot tidak "melompat" setiap update
+                old_lo, old_hi = self._y_range
+                self._y_range = (min(lo, old_lo * 0.9 + lo * 0.1), max(hi, old_hi * 0.9 + hi * 0.1))
+        self.update()
+
+    def clear(self):
+        self._xs = np.zeros(0)
+        self._ys = np.zeros(0)
+        self._band = None
+        self._y_range = None
+        self.update()
+
+    def _ranges(self):
+        if self.fixed_x_range is not None:
+            x0, x1 = self.fixed_x_range
+        elif len(self._xs) > 1:
+            x0, x1 = float(self._xs[0]), float(self._xs[-1])
+        else:
+            x0, x1 = 0.0, 1.0
+        y0, y1 = self.fixed_y_range or self._y_range or (0.0, 1.0)
+        if y1 - y0 < 1e-12:
+            y0, y1 = y0 - 0.5, y1 + 0.5
+        pad = (y1 - y0) * self.y_margin
+        if x1 - x0 < 1e-12:
+            x1 = x0 + 1.0
+        return x0, x1, y0 - pad, y1 + pad
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.background)
+        w, h = self.width(), self.height()
+        x0, x1, y0, y1 = self._ranges()
+
+        # Grid horizontal tetap (murah, tanpa perhitungan tick)
+        painter.setPen(QPen(self.grid_color, 1, Qt.DashLine))
+        for i in range(1, 4):
+            gy = int(h * i / 4)
+            painter.drawLine(0, gy, w, gy)
+
+        sx = w / (x1 - x0)
+        sy = h / (y1 - y0)
+        if self.markers:
+            painter.setPen(QPen(self.text_color, 1, Qt.DotLine))
+            for mx in self.markers:
+                px = int((mx - x0) * sx)
+                painter.drawLine(px, 0, px, h)
+
+        if self._band is not None and len(self._xs) > 1:
+            # Pita bawah-atas sebagai satu polygon: tepi atas maju, tepi bawah mundur
+            band_color = QColor(self.color)
+            band_color.setAlpha(60)
+            px = (self._xs - x0) * sx
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(band_color)
+            painter.drawPolygon(_polygon_from_arrays(np.concatenate((px, px[::-1])),
+                                                     h - (np.concatenate((self._band[1], self._band[0][::-1])) - y0) * sy))
+            painter.setBrush(Qt.NoBrush)
+        if len(self._ys) > 1:
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            painter.setPen(QPen(self.color, 1.5))
+            polygon = _polygon_from_arrays((self._xs - x0) * sx, h - (self._ys - y0) * sy)
+            painter.drawPolyline(polygon)
+
+        painter.setPen(self.text_color)
+        painter.setFont(QFont("Segoe UI", 8))
+        label = self.title
+        if self.title and len(self._ys):
+            label = f"{self.title}  {self.value_format.format(self._ys[-1])}"
+        painter.drawText(QRectF(6, 4, w - 12, 16), Qt.AlignLeft | Qt.AlignTop, label)
+        painter.end()
+
+
+class SpectrogramWidget(QWidget):
+    """
+    Spektrum bergulir (waterfall): setiap kolom adalah satu spektrum yang
+    dinormalisasi ke grid frekuensi tetap, disimpan di array uint8 melingkar
+    dan digambar sebagai QImage Indexed8 tanpa konversi per piksel di Python.
+    """
+    def __init__(self, title="", freq_range=(0.67, 4.0), bins=64, history=120, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.freq_range = freq_range
+        self.bins = bins
+        self.history = history
+        self._grid = np.linspace(freq_range[0], freq_range[1], bins)
+        # Dua salinan berdampingan (seperti RingBuffer) agar jendela waktu selalu kontigu
+        self._columns = np.zeros((bins, 2 * history), dtype=np.uint8)
+        self._image_buffer = np.zeros((bins, history), dtype=np.uint8)
+        self._head = 0
+        self.peak_hz = None
+        # Gradasi hitam -> teal (warna utama UI)
+        self._color_table = [QColor(0, int(173 * i / 255), int(181 * i / 255)).rgb() for i in range(256)]
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumHeight(60)
+
+    def push_spectrum(self, freqs, mags):
+        freqs = np.asarray(freqs, dtype=np.float64)
+        mags = np.asarray(mags, dtype=np.float64)
+        if freqs.size < 2:
+            return
+        column = np.interp(self._grid, freqs, mags, left=0.0, right=0.0)
+        peak = column.max()
+        self.peak_hz = float(self._grid[int(np.argmax(column))]) if peak > 0 else None
+        column = (255.0 * column / peak) if peak > 0 else column
+        # Frekuensi rendah di bawah: baris dibalik
+        column = column[::-1].astype(np.uint8)
+        self._columns[:, self._head] = column
+        self._columns[:, self._head + self.history] = column
+        self._head = (self._head + 1) % self.history
+        self.update()
+
+    def clear(self):
+        self._columns[:] = 0
+        self._head = 0
+        self.peak_hz = None
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1E1E1E"))
+        np.copyto(self._image_buffer, self._columns[:, self._head:self._head + self.history])
+        image = QImage(self._image_buffer.data, self.history, self.bins, self.history, QImage.Format_Indexed8)
+        image.setColorTable(self._color_table)
+        painter.drawImage(self.rect(), image)
+        painter.setPen(QColor("#AAAAAA"))
+        painter.setFont(QFont("Segoe UI", 8))
+        label = self.title
+        if self.peak_hz is not None:
+            label = f"{self.title}  {self.peak_hz * 60:.0f} BPM"
+        painter.drawText(QRectF(6, 4, self.width() - 12, 16), Qt.AlignLeft | Qt.AlignTop, label)
+        painter.end()